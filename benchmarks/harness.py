@@ -0,0 +1,161 @@
+"""
+https://github.com/Hideousmon/SPLayout (Version >= 0.5.17)
+Common helpers for the benchmarks: timing, peak memory, scaling exponents and JSON results that can be compared with
+the results of a previous release (regressions make the benchmark exit with status 1).
+"""
+
+import numpy as np
+import tracemalloc
+import platform
+import json
+import time
+import sys
+import os
+import gc
+
+
+def measure(function, repeat = 3, memory = True):
+    """
+    Time a function (best of repeat) and measure its peak memory (an extra run under tracemalloc).
+
+    Returns
+    -------
+    out : Dict
+        time (s), peak_memory (byte, None if memory is False) and result of the last call.
+    """
+    best = np.inf
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    peak_memory = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"time": best, "peak_memory": peak_memory, "result": result}
+
+
+def scaling_exponent(sizes, times):
+    """
+    Slope of log(time) over log(size), e.g. 1 for linear scaling.
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    valid = (sizes > 0) & (times > 0)
+    if np.sum(valid) < 2:
+        return float("nan")
+    return float(np.polyfit(np.log(sizes[valid]), np.log(times[valid]), 1)[0])
+
+
+class BenchmarkResults:
+    """
+    Results of a benchmark suite, each record is a case (e.g. "draw Waveguide") at a size.
+    """
+    def __init__(self, suite):
+        self.suite = suite
+        self.records = []
+
+    def add(self, case, size, measurement, **extra):
+        record = {"case": case, "size": int(size), "time": measurement["time"],
+                  "peak_memory": measurement["peak_memory"]}
+        record.update(extra)
+        self.records.append(record)
+        memory = "-" if measurement["peak_memory"] is None else "%.2f" % (measurement["peak_memory"] / 1e6)
+        print("%-42s %10d %12.6f %14.3f %12s" % (case, size, measurement["time"],
+                                                 measurement["time"] / max(size, 1) * 1e6, memory))
+        sys.stdout.flush()
+
+    @staticmethod
+    def print_header():
+        print("%-42s %10s %12s %14s %12s" % ("case", "size", "time (s)", "per item (μs)", "peak (MB)"))
+
+    def cases(self):
+        names = []
+        for record in self.records:
+            if record["case"] not in names:
+                names.append(record["case"])
+        return names
+
+    def print_scaling(self):
+        print("\n%-42s %10s" % ("case", "exponent"))
+        for case in self.cases():
+            records = [record for record in self.records if record["case"] == case]
+            print("%-42s %10.2f" % (case, scaling_exponent([record["size"] for record in records],
+                                                            [record["time"] for record in records])))
+
+    def to_dict(self):
+        import splayout
+        return {"suite": self.suite,
+                "splayout_version": getattr(splayout, "__version__", "unknown"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "records": self.records}
+
+    def save(self, filename):
+        directory = os.path.dirname(os.path.abspath(filename))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(filename, "w") as result_file:
+            json.dump(self.to_dict(), result_file, indent=1)
+        print("\nresults saved to " + filename)
+
+    def compare(self, baseline_filename, tolerance = 1.25, minimum_time = 1e-3):
+        """
+        Compare with saved results, a case is a regression when its time (or peak memory) is more than tolerance times
+        the baseline (cases faster than minimum_time in both runs are ignored as noise).
+
+        Returns
+        -------
+        out : List of String
+            Descriptions of the regressions.
+        """
+        with open(baseline_filename) as baseline_file:
+            baseline = json.load(baseline_file)
+        baseline_records = {(record["case"], record["size"]): record for record in baseline["records"]}
+        regressions = []
+        print("\n%-42s %10s %12s %12s %9s" % ("case (vs " + str(baseline.get("splayout_version")) + ")", "size",
+                                             "baseline (s)", "current (s)", "ratio"))
+        for record in self.records:
+            key = (record["case"], record["size"])
+            if key not in baseline_records:
+                continue
+            old = baseline_records[key]
+            ratio = record["time"] / old["time"] if old["time"] > 0 else float("inf")
+            print("%-42s %10d %12.6f %12.6f %9.2f" % (record["case"], record["size"], old["time"], record["time"], ratio))
+            if max(record["time"], old["time"]) >= minimum_time and ratio > tolerance:
+                regressions.append("%s (size %d): time %.6f s -> %.6f s" % (key[0], key[1], old["time"], record["time"]))
+            if (record["peak_memory"] is not None and old.get("peak_memory") is not None and old["peak_memory"] > 0
+                    and record["peak_memory"] / old["peak_memory"] > tolerance):
+                regressions.append("%s (size %d): peak memory %d B -> %d B" % (key[0], key[1], old["peak_memory"],
+                                                                               record["peak_memory"]))
+        return regressions
+
+
+def add_common_arguments(parser, default_output):
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of each case (best is reported)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory measurement")
+    parser.add_argument("--output", default=default_output, help="JSON file for the results")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown ratio against the baseline")
+    return parser
+
+
+def finish(results, args):
+    results.print_scaling()
+    if args.output:
+        results.save(args.output)
+    if args.baseline:
+        regressions = results.compare(args.baseline, args.tolerance)
+        if len(regressions):
+            print("\nregressions:")
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print("\nno regressions")
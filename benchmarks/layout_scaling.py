@@ -0,0 +1,134 @@
+"""
+https://github.com/Hideousmon/SPLayout (Version >= 0.5.17)
+Benchmark for the layout side of SPLayout: construction and draw of the components, Layer boolean operations,
+draw_layout of the pixels regions and make_gdsii_file, at increasing numbers of instances.
+
+usage: python benchmarks/layout_scaling.py [--sizes 10 100 1000] [--baseline benchmarks/results/layout_scaling.json]
+The results (time, peak memory and scaling exponents) are saved as JSON, comparing with the results of a previous
+release exits with status 1 on regressions.
+"""
+
+from splayout import *
+from harness import measure, BenchmarkResults, add_common_arguments, finish
+import numpy as np
+import argparse
+import tempfile
+import os
+
+LAYER = Layer(1, 0)
+CUT_LAYER = Layer(2, 0)
+PITCH = 40
+BENCHMARK_CELL = Cell("benchmark")
+
+
+def reset_library():
+    BENCHMARK_CELL.remove_components()
+    for cell in list(common_lib.cells.values()):
+        if cell is not BENCHMARK_CELL.cell:
+            common_lib.remove(cell)
+    return BENCHMARK_CELL
+
+
+def grid_points(size):
+    columns = int(np.ceil(np.sqrt(size)))
+    return [Point((i % columns) * PITCH, (i // columns) * PITCH) for i in range(size)]
+
+
+COMPONENTS = {
+    "Waveguide": lambda point: Waveguide(point, point + (20, 0), width=0.5),
+    "SBend": lambda point: SBend(point, point + (20, 5), width=0.5),
+    "Bend": lambda point: Bend(point, 0, np.pi / 2, width=0.5, radius=5),
+    "AddDropMicroring": lambda point: AddDropMicroring(point, radius=5, gap=0.18, wg_width=0.45, coupling_length=0),
+    "SimpleAsymmetricDirectionalCoupler": lambda point: SimpleAsymmetricDirectionalCoupler(
+        point, coupling_length=10, bus_width=0.5, bus_coupler_gap=0.2, coupler_width=0.3, sbend_length=5),
+}
+
+
+def run_components(results, sizes, args):
+    for name, constructor in COMPONENTS.items():
+        for size in sizes:
+            points = grid_points(size)
+            construction = measure(lambda: [constructor(point) for point in points], args.repeat, not args.no_memory)
+            results.add("construct " + name, size, construction)
+
+            def draw():
+                cell = reset_library()
+                for component in [constructor(point) for point in points]:
+                    component.draw(cell, LAYER)
+
+            drawing = measure(draw, args.repeat, not args.no_memory)
+            ## the construction is included in draw (a component may keep temporary cells), report the difference
+            drawing["time"] = max(drawing["time"] - construction["time"], 0)
+            results.add("draw " + name, size, drawing)
+
+
+def prepare_boolean_layers(size):
+    cell = reset_library()
+    for point in grid_points(size):
+        Waveguide(point, point + (20, 0), width=0.5).draw(cell, LAYER)
+        Rectangle(point + (10, 0), width=2, height=2).draw(cell, CUT_LAYER)
+    return cell
+
+
+def run_boolean(results, sizes, args):
+    operations = {"cut": lambda: LAYER.cut(CUT_LAYER, output_layer=Layer(3, 0)),
+                  "add": lambda: LAYER.add(CUT_LAYER, output_layer=Layer(3, 0)),
+                  "common": lambda: LAYER.common(CUT_LAYER, output_layer=Layer(3, 0))}
+    for name, operation in operations.items():
+        for size in sizes:
+            prepare_boolean_layers(size)
+            results.add("Layer." + name, size, measure(operation, args.repeat, not args.no_memory))
+
+
+def run_pixels(results, sizes, args):
+    regions = {"RectanglePixelsRegion": lambda side: RectanglePixelsRegion((0, 0), (side * 0.12, side * 0.12), 0.1, 0.1,
+                                                                           fdtd_engine=None),
+               "CirclePixelsRegion": lambda side: CirclePixelsRegion((0, 0), (side * 0.12, side * 0.12), 0.05,
+                                                                     fdtd_engine=None)}
+    rng = np.random.default_rng(0)
+    for name, constructor in regions.items():
+        for size in sizes:
+            side = max(int(round(np.sqrt(size))), 1)
+            region = constructor(side)
+            matrix = (rng.random((side, side)) > 0.5).astype(np.double)
+
+            def draw_layout():
+                cell = reset_library()
+                region.draw_layout(matrix, cell, LAYER)
+
+            results.add("draw_layout " + name, side * side, measure(draw_layout, args.repeat, not args.no_memory))
+
+
+def run_gdsii(results, sizes, args):
+    directory = tempfile.mkdtemp()
+    for size in sizes:
+        cell = reset_library()
+        for point in grid_points(size):
+            Waveguide(point, point + (20, 0), width=0.5).draw(cell, LAYER)
+        filename = os.path.join(directory, "benchmark_" + str(size) + ".gds")
+        measurement = measure(lambda: make_gdsii_file(filename), args.repeat, not args.no_memory)
+        results.add("make_gdsii_file", size, measurement, file_size=os.path.getsize(filename))
+        os.remove(filename)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--suites", nargs="+", default=["components", "boolean", "pixels", "gdsii"],
+                        choices=["components", "boolean", "pixels", "gdsii"])
+    add_common_arguments(parser, os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                              "layout_scaling.json"))
+    args = parser.parse_args()
+
+    results = BenchmarkResults("layout_scaling")
+    BenchmarkResults.print_header()
+    if "components" in args.suites:
+        run_components(results, args.sizes, args)
+    if "boolean" in args.suites:
+        run_boolean(results, args.sizes, args)
+    if "pixels" in args.suites:
+        run_pixels(results, args.sizes, args)
+    if "gdsii" in args.suites:
+        run_gdsii(results, args.sizes, args)
+    finish(results, args)
@@ -0,0 +1,111 @@
+"""
+https://github.com/Hideousmon/SPLayout (Version >= 0.5.17)
+Benchmark for the algorithms with the synthetic cost functions of benchmarks/synthetic_objectives.py: per-evaluation
+overhead of the algorithm (run time outside the cost function), evaluations to reach the target and the scaling with
+loS and noS. The global NumPy generator is seeded before every run, so that results are comparable run to run.
+
+usage: python benchmarks/optimizer_overhead.py [--algorithms DBS BGA] [--objectives onemax pixel] [--budget 2000]
+The JSON results can be compared with a previous run with --baseline (exit status 1 on regressions).
+"""
+
+from splayout import *
+from harness import measure, BenchmarkResults, add_common_arguments, finish
+from synthetic_objectives import OBJECTIVES
+import numpy as np
+import argparse
+import time
+import os
+
+
+def build_algorithm(name, objective, noS, budget, synchronous):
+    """
+    Create an algorithm whose number of evaluations is about the budget (the first population included).
+    """
+    loS = objective.loS
+    if (name == "DBS"):
+        return DirectBinarySearchAlgorithm(loS, objective, max_iteration=max(budget // loS, 1))
+    iterations = max(budget // noS - 1, 1)
+    if (name == "BGA"):
+        return BinaryGeneticAlgorithm(noS, loS, objective, max_iteration=iterations)
+    if (name == "BPSO"):
+        return BinaryParticleSwarmAlgorithm(noS, loS, objective, max_iteration=iterations, synchronous=synchronous,
+                                            batch_cost_function=objective.batch if synchronous else None)
+    if (name == "BBA"):
+        return BinaryBatAlgorithm(noS, loS, objective, max_iteration=iterations)
+    if (name == "PSO"):
+        return ParticleSwarmAlgorithm(objective.param_constrains(), noS, objective, max_iteration=iterations,
+                                      synchronous=synchronous,
+                                      batch_cost_function=objective.batch if synchronous else None)
+    raise Exception("Unknown algorithm: " + name)
+
+
+def run_case(name, objective, noS, budget, seed, synchronous):
+    np.random.seed(seed)
+    objective.reset()
+    start = time.perf_counter()
+    algorithm = build_algorithm(name, objective, noS, budget, synchronous)
+    algorithm.run()
+    statistics = objective.statistics()
+    statistics["total_time"] = time.perf_counter() - start
+    return statistics
+
+
+def add_case(results, case, size, name, objective, noS, args):
+    measurement = measure(lambda: run_case(name, objective, noS, args.budget, args.seed, args.synchronous),
+                          args.repeat, not args.no_memory)
+    statistics = measurement["result"]
+    overhead = (statistics["total_time"] - statistics["objective_time"]) / max(statistics["evaluations"], 1)
+    results.add(case, size, measurement, loS=objective.loS, noS=noS, evaluations=statistics["evaluations"],
+                overhead_per_evaluation=overhead, best_cost=statistics["best_cost"],
+                evaluations_to_target=statistics["evaluations_to_target"])
+    return overhead, statistics
+
+
+def compatible(name, objective_class):
+    return (name == "PSO") != objective_class.binary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algorithms", nargs="+", default=["DBS", "BGA", "BPSO", "BBA", "PSO"],
+                        choices=["DBS", "BGA", "BPSO", "BBA", "PSO"])
+    parser.add_argument("--objectives", nargs="+", default=list(OBJECTIVES.keys()), choices=list(OBJECTIVES.keys()))
+    parser.add_argument("--loS", type=int, nargs="+", default=[16, 64, 256], help="lengths of a solution (squares)")
+    parser.add_argument("--noS", type=int, nargs="+", default=[10, 20, 40], help="numbers of solutions")
+    parser.add_argument("--budget", type=int, default=2000, help="evaluations for each run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--synchronous", action="store_true", help="synchronous update for BPSO and PSO")
+    add_common_arguments(parser, os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                              "optimizer_overhead.json"))
+    args = parser.parse_args()
+
+    results = BenchmarkResults("optimizer_overhead")
+    summary = []
+    BenchmarkResults.print_header()
+    for name in args.algorithms:
+        for objective_name in args.objectives:
+            objective_class = OBJECTIVES[objective_name]
+            if not compatible(name, objective_class):
+                continue
+            ## scaling with loS (the first noS)
+            for loS in args.loS:
+                objective = objective_class(loS)
+                overhead, statistics = add_case(results, name + " " + objective_name + " loS", loS, name, objective,
+                                                args.noS[0], args)
+                summary.append((name, objective_name, loS, args.noS[0], statistics, overhead))
+            ## scaling with noS (the last loS), DBS has no population
+            if (name != "DBS"):
+                objective = objective_class(args.loS[-1])
+                for noS in args.noS:
+                    overhead, statistics = add_case(results, name + " " + objective_name + " noS", noS, name,
+                                                    objective, noS, args)
+                    summary.append((name, objective_name, args.loS[-1], noS, statistics, overhead))
+
+    print("\n%-6s %-10s %6s %6s %12s %14s %12s %16s" % ("algo", "objective", "loS", "noS", "evaluations",
+                                                         "overhead (μs)", "best cost", "evals to target"))
+    for name, objective_name, loS, noS, statistics, overhead in summary:
+        to_target = "-" if statistics["evaluations_to_target"] is None else str(statistics["evaluations_to_target"])
+        print("%-6s %-10s %6d %6d %12d %14.2f %12.4g %16s" % (name, objective_name, loS, noS if name != "DBS" else 1,
+                                                              statistics["evaluations"], overhead * 1e6,
+                                                              statistics["best_cost"], to_target))
+    finish(results, args)
@@ -0,0 +1,192 @@
+"""
+https://github.com/Hideousmon/SPLayout (Version >= 0.5.17)
+Cheap synthetic cost functions (lower means better) for tuning the algorithms without the solver.
+
+Binary objectives (input: Array of 0/1, size (loS,)): OneMax, Trap and PixelTransmissionProxy.
+Continuous objectives (input: Array of params, size (loS,)): Quadratic and Rastrigin.
+Every objective counts its evaluations, the time spent inside it and the evaluation that first reached the target.
+"""
+
+import numpy as np
+import time
+
+
+class SyntheticObjective:
+    """
+    Base of the synthetic objectives, subclasses implement cost(solution).
+
+    Parameters
+    ----------
+    loS : Int
+        Length of a single solution.
+    target : Float
+        Cost regarded as solved.
+    """
+    binary = True
+
+    def __init__(self, loS, target):
+        self.loS = int(loS)
+        self.target = target
+        self.reset()
+
+    def reset(self):
+        """
+        Reset the statistics (and the noise generator of the noisy objectives).
+        """
+        self.evaluations = 0
+        self.objective_time = 0.0
+        self.best_cost = np.inf
+        self.evaluations_to_target = None
+
+    def cost(self, solution):
+        raise Exception("The cost of the synthetic objective should be implemented by the subclass.")
+
+    def __call__(self, solution):
+        start = time.perf_counter()
+        cost = float(self.cost(np.asarray(solution).reshape(-1)))
+        self.objective_time += time.perf_counter() - start
+        self.evaluations += 1
+        if (cost < self.best_cost):
+            self.best_cost = cost
+        if (type(self.evaluations_to_target) == type(None) and cost <= self.target):
+            self.evaluations_to_target = self.evaluations
+        return cost
+
+    def batch(self, solutions):
+        """
+        Batch cost function (for synchronous BinaryParticleSwarmAlgorithm and ParticleSwarmAlgorithm).
+        """
+        return np.array([self(solution) for solution in solutions])
+
+    def statistics(self):
+        return {"evaluations": self.evaluations,
+                "objective_time": self.objective_time,
+                "best_cost": self.best_cost,
+                "evaluations_to_target": self.evaluations_to_target}
+
+
+class OneMax(SyntheticObjective):
+    """
+    Number of zeros in the solution (optimum: all ones, cost 0).
+    """
+    def __init__(self, loS):
+        SyntheticObjective.__init__(self, loS, target=0)
+
+    def cost(self, solution):
+        return self.loS - np.sum(solution)
+
+
+class Trap(SyntheticObjective):
+    """
+    Concatenated deceptive trap functions: in every block of k bits, u ones score k if u == k and k - 1 - u otherwise,
+    so that the local slope leads to all zeros (optimum: all ones, cost 0).
+
+    Parameters
+    ----------
+    loS : Int
+        Length of a single solution, a multiple of k.
+    k : Int
+        Length of a block (default: 4).
+    """
+    def __init__(self, loS, k = 4):
+        if (loS % k != 0):
+            raise Exception("The loS of a Trap objective should be a multiple of k.")
+        self.k = k
+        SyntheticObjective.__init__(self, loS, target=0)
+
+    def cost(self, solution):
+        ones = np.sum(solution.reshape(-1, self.k), axis=1)
+        score = np.where(ones == self.k, self.k, self.k - 1 - ones)
+        return self.k * (self.loS // self.k) - np.sum(score)
+
+
+class PixelTransmissionProxy(SyntheticObjective):
+    """
+    Noisy stand-in for the transmission of a pixelated device: the pixels (a square matrix, 1 for the core material)
+    are blurred like a filtered permittivity and overlapped with a smooth target pattern, cost = 1 - overlap + noise.
+
+    Parameters
+    ----------
+    loS : Int
+        Length of a single solution, a square number.
+    noise : Float
+        Standard deviation of the Gaussian noise on the cost (default: 0.01).
+    seed : Int
+        Seed of the target pattern and the noise (default: 0).
+    """
+    def __init__(self, loS, noise = 0.01, seed = 0):
+        side = int(round(np.sqrt(loS)))
+        if (side * side != loS):
+            raise Exception("The loS of a PixelTransmissionProxy objective should be a square number.")
+        self.side = side
+        self.noise = noise
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        coordinates = np.linspace(-1, 1, side)
+        xx, yy = np.meshgrid(coordinates, coordinates, indexing="ij")
+        bend = 0.5 * np.sin(np.pi * xx / 2 + rng.uniform(0, np.pi))
+        self.pattern = np.exp(-((yy - bend) / 0.35) ** 2)
+        self.norm = np.sqrt(np.sum(self.pattern ** 2))
+        SyntheticObjective.__init__(self, loS, target=0.2)
+
+    def reset(self):
+        SyntheticObjective.reset(self)
+        self.rng = np.random.default_rng(self.seed + 1)
+
+    def cost(self, solution):
+        pixels = solution.reshape(self.side, self.side).astype(np.double)
+        padded = np.pad(pixels, 1, mode="edge")
+        blurred = 0.25 * padded[:-2, :] + 0.5 * padded[1:-1, :] + 0.25 * padded[2:, :]
+        blurred = 0.25 * blurred[:, :-2] + 0.5 * blurred[:, 1:-1] + 0.25 * blurred[:, 2:]
+        overlap = np.sum(blurred * self.pattern) / (self.norm * max(np.sqrt(np.sum(blurred ** 2)), 1e-12))
+        return 1 - overlap ** 2 + self.noise * self.rng.standard_normal()
+
+
+class Quadratic(SyntheticObjective):
+    """
+    Ill-conditioned quadratic surface sum(a_i * (x_i - c_i)^2), params in [-5, 5] (optimum: cost 0).
+
+    Parameters
+    ----------
+    loS : Int
+        Number of params.
+    condition : Float
+        Ratio between the largest and the smallest curvature (default: 100).
+    seed : Int
+        Seed of the center (default: 0).
+    """
+    binary = False
+
+    def __init__(self, loS, condition = 100, seed = 0):
+        self.center = np.random.default_rng(seed).uniform(-2, 2, int(loS))
+        self.curvature = condition ** np.linspace(0, 1, int(loS))
+        SyntheticObjective.__init__(self, loS, target=1e-2 * loS)
+
+    def param_constrains(self):
+        return [(-5, 5)] * self.loS
+
+    def cost(self, solution):
+        return np.sum(self.curvature * (solution - self.center) ** 2)
+
+
+class Rastrigin(SyntheticObjective):
+    """
+    Multimodal Rastrigin surface 10 n + sum(x_i^2 - 10 cos(2 pi x_i)), params in [-5.12, 5.12] (optimum: cost 0).
+    """
+    binary = False
+
+    def __init__(self, loS):
+        SyntheticObjective.__init__(self, loS, target=1.0 * loS)
+
+    def param_constrains(self):
+        return [(-5.12, 5.12)] * self.loS
+
+    def cost(self, solution):
+        return 10 * self.loS + np.sum(solution ** 2 - 10 * np.cos(2 * np.pi * solution))
+
+
+OBJECTIVES = {"onemax": OneMax,
+              "trap": Trap,
+              "pixel": PixelTransmissionProxy,
+              "quadratic": Quadratic,
+              "rastrigin": Rastrigin}
@@ -0,0 +1,70 @@
+"""
+https://github.com/Hideousmon/SPLayout (Version >= 0.5.17)
+Benchmark for transferring polygon vertices to Lumerical: script String (lumerical_list) versus binary matrix (putv).
+
+usage: python benchmarks/vertex_transfer.py [--lumerical]
+Without --lumerical only the client side (conversion time, payload size, precision) is measured.
+"""
+
+from splayout import *
+import numpy as np
+import argparse
+import time
+
+
+def ring_vertices(points):
+    theta = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    radius = 5 + 0.25 * np.sin(7 * theta)
+    return [(r * np.cos(t) + 1e-7 * np.pi, r * np.sin(t)) for r, t in zip(radius, theta)]
+
+
+def time_call(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run_client_side(sizes, repeat):
+    print("%10s %14s %14s %14s %14s %12s" % ("vertices", "string (s)", "binary (s)", "string (B)", "binary (B)",
+                                             "max err (m)"))
+    for size in sizes:
+        vertices = ring_vertices(size)
+        string_time, string = time_call(lambda: FDTDSimulation.lumerical_list(vertices), repeat)
+        binary_time, matrix = time_call(lambda: FDTDSimulation.lumerical_matrix(vertices), repeat)
+        parsed = np.array([[float(value) for value in row.split(",")] for row in string[1:-1].split(";")])
+        max_error = np.max(np.abs(parsed - np.asarray(vertices) * 1e-6))
+        print("%10d %14.6f %14.6f %14d %14d %12.3e" % (size, string_time, binary_time, len(string), matrix.nbytes,
+                                                       max_error))
+
+
+def run_lumerical(sizes, repeat):
+    fdtd = FDTDSimulation(hide=1)
+    print("%10s %14s %14s" % ("vertices", "string (s)", "binary (s)"))
+    for size in sizes:
+        vertices = ring_vertices(size)
+        fdtd.eval("addpoly;set(\"name\",\"bench_polygon\");")
+
+        def string_path():
+            fdtd.eval("select(\"bench_polygon\");")
+            fdtd.eval("set(\"vertices\"," + FDTDSimulation.lumerical_list(vertices) + ");")
+
+        def binary_path():
+            fdtd.update_polygon("bench_polygon", vertices)
+
+        string_time, _ = time_call(string_path, repeat)
+        binary_time, _ = time_call(binary_path, repeat)
+        fdtd.remove("bench_polygon")
+        print("%10d %14.6f %14.6f" % (size, string_time, binary_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lumerical", action="store_true", help="also time the round trip through Lumerical FDTD")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    run_client_side(args.sizes, args.repeat)
+    if args.lumerical:
+        run_lumerical(args.sizes, args.repeat)
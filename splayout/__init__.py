@@ -6,6 +6,8 @@ from . import components
 from . import algorithms
 from . import lumericalcommun
 from . import adjointmethod
+from . import solvers
+from . import circuits
 
 ## Components
 from .components.AEMDgrating import MAKE_AEMD_GRATING
@@ -22,12 +24,24 @@ from .components.text import Text
 from .components.waveguide import Waveguide, ArbitraryAngleWaveguide
 from .components.sbend import SBend, ASBend
 from .components.filledpattern import Circle, Rectangle
-from .components.pixelsregion import RectanglePixelsRegion, CirclePixelsRegion, CirclePixelsRegionwithGroup
+from .components.pixelsregion import RectanglePixelsRegion, CirclePixelsRegion, PixelsRegionwithGroup, CirclePixelsRegionwithGroup, \
+    RectanglePixelsRegionwithGroup, EllipsePixelsRegionwithGroup, PolygonPixelsRegionwithGroup
 
 ## Lumerical Commun
 from .lumericalcommun.fdtdapi import FDTDSimulation
 from .lumericalcommun.modeapi import MODESimulation
 
+## Solvers
+from .solvers.fdfd2d import FDFDSimulation
+from .solvers.modesolver import solve_slab_modes, solve_channel_modes, rectangular_cross_section, ModeProfileCache, \
+    mode_profile_to_imported_source
+
+## Circuits
+from .circuits.compactmodels import CompactModel, WaveguideModel, DirectionalCouplerModel, AddDropRingModel, SMatrixModel, \
+    effective_index, model_from_component
+from .circuits.circuit import Circuit
+from .circuits.modeltable import CompactModelTable
+
 ## Adjoint Method
 from .adjointmethod.shaperegion2d import ShapeOptRegion2D
 from .adjointmethod.shaperegion3d import ShapeOptRegion3D
@@ -37,6 +51,10 @@ from .adjointmethod.scalabletoregion3d import ScalableToOptRegion3D
 from .adjointmethod.adjointshapeopt import AdjointForShapeOpt
 from .adjointmethod.adjointtopologyopt import AdjointForTO
 from .adjointmethod.adjointmultitoopt import AdjointForMultiTO
+from .adjointmethod.forwardcache import ForwardSolutionCache
+from .adjointmethod.adjointsessionpool import AdjointSessionPool
+from .adjointmethod.fieldspill import FieldSpill, field_product
+from .adjointmethod.pixelssensitivity import PixelsRegionSensitivity
 
 ## Algorithms
 from .algorithms.binarybatalgorithm import BinaryBatAlgorithm
@@ -44,6 +62,9 @@ from .algorithms.directbinarysearchalgorithm import DirectBinarySearchAlgorithm
 from .algorithms.particleswarmalgorithm import ParticleSwarmAlgorithm
 from .algorithms.binaryparticleswarmalgorithm import BinaryParticleSwarmAlgorithm
 from .algorithms.binarygeneticalgorithm import BinaryGeneticAlgorithm
+from .algorithms.binarysolutions import pack_solutions, unpack_solutions, packed_crossover, packed_mutation, hamming_distance
+from .algorithms.costsurrogate import CostSurrogate
+from .algorithms.multifidelity import MultiFidelityCostFunction
 
 ## Utils
 from .utils import *
\ No newline at end of file
@@ -7,5 +7,7 @@ from .scalabletoregion3d import ScalableToOptRegion3D
 from .adjointshapeopt import AdjointForShapeOpt
 from .adjointtopologyopt import AdjointForTO
 from .adjointmultitoopt import AdjointForMultiTO
-
-
+from .forwardcache import ForwardSolutionCache
+from .adjointsessionpool import AdjointSessionPool
+from .fieldspill import FieldSpill, field_product
+from .pixelssensitivity import PixelsRegionSensitivity
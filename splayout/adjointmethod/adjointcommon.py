@@ -0,0 +1,195 @@
+from .topologyregion3d import TopologyOptRegion3D
+from .topologyregion2d import TopologyOptRegion2D
+from .scalabletoregion3d import ScalableToOptRegion3D
+from .fieldspill import field_product
+from ..utils.integration import linear_interpolation_matrix
+import numpy as np
+import scipy.constants
+import os
+
+## Helpers shared by AdjointForTO and AdjointForMultiTO.
+
+
+def spill_field(field_spill, field):
+    """
+    Spill a forward field with the policy of the optimizer (unchanged without field_spill).
+    """
+    if (type(field_spill) == type(None)):
+        return field
+    return field_spill.spill(field)
+
+
+def get_chunk_size(field_spill):
+    """
+    Chunk size of field_product for the spill policy of the optimizer (None without field_spill).
+    """
+    if (type(field_spill) == type(None)):
+        return None
+    return field_spill.chunk_size
+
+
+def solve_forward(optimizer, params, run_forward, solution_names):
+    """
+    Reuse the cached forward solution of params or run the forward simulation and cache it.
+
+    Parameters
+    ----------
+    optimizer : AdjointForTO or AdjointForMultiTO
+        The optimizer, which holds forward_cache and the attributes in solution_names.
+    params : Array
+        Parameters for the structure.
+    run_forward : func
+        Forward simulation, input: params, it sets the attributes in solution_names.
+    solution_names : List of String
+        Attributes of the optimizer that make up a forward solution.
+
+    Returns
+    -------
+    out : Bytes, Dict, Bool
+        Key of params, forward solution, whether the forward simulation was run.
+    """
+    forward_key = optimizer.forward_cache.key(params)
+    forward_solution = optimizer.forward_cache.get(forward_key)
+    if (type(forward_solution) == type(None)):
+        run_forward(params)
+        forward_solution = {name: getattr(optimizer, name) for name in solution_names}
+        optimizer.forward_cache.put(forward_key, forward_solution)
+        return forward_key, forward_solution, 1
+    for name in solution_names:
+        setattr(optimizer, name, forward_solution[name])
+    return forward_key, forward_solution, 0
+
+
+def run_adjoint_simulation(fdtd_engine, backward_source_name, phase_prefactor, omega, filename = "temp"):
+    """
+    Run the adjoint simulation of a backward source and return the scaling factor of its field products.
+    """
+    fdtd_engine.set_enable(backward_source_name)
+    fdtd_engine.run(filename)
+    adjoint_source_power = fdtd_engine.get_source_power(backward_source_name)
+    return np.conj(phase_prefactor) * omega * 1j / np.sqrt(adjoint_source_power)
+
+
+def get_adjoint_field(fdtd_engine, design_region, if_get_spatial = 0):
+    """
+    Adjoint field of a design region, from the region itself in its own session or from the monitor in a cloned one.
+    """
+    if (fdtd_engine is design_region.fdtd_engine):
+        return design_region.get_E_distribution(if_get_spatial=if_get_spatial)
+    return fdtd_engine.get_E_distribution(field_monitor_name=design_region.field_region_name,
+                                          if_get_spatial=if_get_spatial)
+
+
+def region_partial_fom(fdtd_engine, design_region, forward_field, scaling_factor, omega, y_antisymmetric = 0,
+                       chunk_size = None):
+    """
+    Partial derivatives of the FoM of a backward source to the parameters of a design region, after the adjoint
+    simulation has been run in fdtd_engine.
+
+    Returns
+    -------
+    out : Array, Array
+        Partial FoM, size: (parameters, frequency points), adjoint field of the region.
+    """
+    if type(design_region) == TopologyOptRegion3D:
+        adjoint_field, x_list, y_list, z_list = get_adjoint_field(fdtd_engine, design_region, if_get_spatial=1)
+        cell = design_region.x_mesh * 1e-6 * design_region.y_mesh * 1e-6 * design_region.z_mesh * 1e-6
+        gradient_field = 2.0 * cell * scipy.constants.epsilon_0 * field_product(forward_field, adjoint_field, chunk_size)
+        dF_dEps = resample_gradient_field(design_region, gradient_field, x_list, y_list, z_list)
+    elif type(design_region) == TopologyOptRegion2D:
+        adjoint_field, x_list, y_list, z_list = get_adjoint_field(fdtd_engine, design_region, if_get_spatial=1)
+        dF_dEps = 2.0 * design_region.x_mesh * 1e-6 * design_region.y_mesh * 1e-6 * scipy.constants.epsilon_0 * field_product(
+            forward_field, adjoint_field, chunk_size)
+        dF_dEps = resample_gradient_field(design_region, dF_dEps, x_list, y_list, z_list)
+    elif type(design_region) == ScalableToOptRegion3D:
+        adjoint_field, x_list, y_list, z_list = get_adjoint_field(fdtd_engine, design_region, if_get_spatial=1)
+        cell = design_region.x_mesh * 1e-6 * design_region.y_mesh * 1e-6 * design_region.z_mesh * 1e-6
+        gradient_field = 2.0 * cell * scipy.constants.epsilon_0 * field_product(forward_field, adjoint_field, chunk_size)
+        gradient_field = resample_gradient_field(design_region, gradient_field, x_list, y_list, z_list)
+        dF_dEps = np.zeros((design_region.get_x_size(), design_region.get_y_size(), gradient_field.shape[2]),
+                           dtype=gradient_field.dtype)
+        for k in range(0, gradient_field.shape[2]):
+            dF_dEps[:, :, k] = design_region.scaling(gradient_field[:, :, k])
+    else:
+        raise Exception("Unacceptable design region provided.")
+
+    frequency_indices = get_frequency_indices(design_region, len(omega))
+    for wl in range(0, len(frequency_indices)):
+        dF_dEps[:, :, wl] = dF_dEps[:, :, wl] * scaling_factor[frequency_indices[wl]]
+
+    if (y_antisymmetric):
+        dF_dEps = np.real(dF_dEps)[:, int(dF_dEps.shape[1] / 2):, :]
+    else:
+        dF_dEps = np.real(dF_dEps)
+
+    topo_grad = dF_dEps * (design_region.higher_epsilon - design_region.lower_epsilon)
+    partial_fom = topo_grad.reshape(-1, topo_grad.shape[-1])
+    partial_fom = interpolate_partial_fom(design_region, partial_fom,
+                                          2.0 * np.pi * scipy.constants.speed_of_light / omega)
+    return partial_fom, adjoint_field
+
+
+def resample_gradient_field(design_region, gradient_field, x_list, y_list, z_list):
+    """
+    Interpolate the gradient field of a down sampled field region back to the grid of the design region.
+    """
+    if (design_region.down_sample <= 1):
+        return gradient_field
+    if (type(design_region) != TopologyOptRegion2D and np.size(z_list) > 0):
+        gradient_field = gradient_field * (design_region.z_size / np.size(z_list))
+    x_matrix = linear_interpolation_matrix(np.array(x_list).flatten() * 1e6, design_region.x_positions)
+    y_matrix = linear_interpolation_matrix(np.array(y_list).flatten() * 1e6, design_region.y_positions)
+    return np.einsum("ax,by,xyw->abw", x_matrix, y_matrix, gradient_field)
+
+
+def get_frequency_indices(design_region, frequency_number):
+    """
+    Frequency points recorded by the field region of a design region.
+    """
+    if (type(design_region.frequency_indices) == type(None)):
+        return np.arange(0, frequency_number)
+    return design_region.frequency_indices
+
+
+def interpolate_partial_fom(design_region, partial_fom, wavelength):
+    """
+    Interpolate a partial FoM on the recorded frequency points of a design region to all the wavelengths.
+    """
+    if (type(design_region.frequency_indices) == type(None)):
+        return partial_fom
+    wavelength = np.array(wavelength).flatten()
+    return partial_fom.dot(linear_interpolation_matrix(wavelength[design_region.frequency_indices], wavelength).transpose())
+
+
+def parallel_adjoint_partial_foms(fdtd_engine, session_pool, sim_name, adjoint_function, source_number, omega):
+    """
+    Run the adjoint simulations of the backward sources on the sessions of session_pool.
+
+    Parameters
+    ----------
+    fdtd_engine : FDTDSimulation
+        The FDTDSimulation object, its project is saved and loaded into the sessions.
+    session_pool : AdjointSessionPool
+        Cloned sessions.
+    sim_name : String
+        Name of the temporary simulation.
+    adjoint_function : func
+        Adjoint simulation of a backward source, input: (fdtd_engine, source index, omega, filename).
+    source_number : Int
+        Number of backward sources.
+    omega : Array
+        Angular frequencies.
+
+    Returns
+    -------
+    out : List
+        Results of adjoint_function in the order of the backward sources.
+    """
+    project_file = os.path.abspath(sim_name + "_adjoint.fsp")
+    fdtd_engine.save(project_file)
+    session_pool.load(project_file)
+
+    def adjoint_task(session, session_index, i):
+        return adjoint_function(session, i, omega, filename=sim_name + "_adjoint_" + str(session_index))
+
+    return session_pool.map(adjoint_task, range(0, source_number))
@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
+import os
+
+
+class AdjointSessionPool:
+    """
+    Pool of cloned Lumerical FDTD sessions for running independent adjoint simulations in parallel.
+
+    Parameters
+    ----------
+    fdtd_engine : FDTDSimulation
+        The FDTDSimulation object to be cloned.
+    session_number : Int
+        Number of cloned sessions (default: 2).
+    hide : Bool
+        Whether the Lumerical windows of the cloned sessions are hidden (default: True).
+    """
+    def __init__(self, fdtd_engine, session_number = 2, hide = 1):
+        if (session_number < 1):
+            raise Exception("The session_number should be at least 1.")
+        self.sessions = [fdtd_engine.clone(hide=hide) for _ in range(0, int(session_number))]
+        self.__idle_sessions = queue.Queue()
+        for i in range(0, len(self.sessions)):
+            self.__idle_sessions.put(i)
+        self.__executor = ThreadPoolExecutor(max_workers=len(self.sessions))
+
+    def get_session_number(self):
+        """
+        Return the number of sessions.
+
+        Returns
+        -------
+        out : Int
+            Number of sessions.
+        """
+        return len(self.sessions)
+
+    def load(self, filename):
+        """
+        Load a saved project into all the sessions (in parallel).
+
+        Parameters
+        ----------
+        filename : String
+            File path of the ".fsp" project.
+        """
+        filename = os.path.abspath(filename)
+        futures = [self.__executor.submit(session.load, filename) for session in self.sessions]
+        for future in futures:
+            future.result()
+
+    def map(self, function, items):
+        """
+        Call function(session, session_index, item) for each item on the idle sessions and collect the results as they
+        complete.
+
+        Parameters
+        ----------
+        function : Function
+            Task to run on a session, session is the FDTDSimulation of the session.
+        items : List
+            Inputs of the tasks.
+
+        Returns
+        -------
+        out : List
+            Results in the order of items.
+        """
+        items = list(items)
+        futures = {}
+        for item_index, item in enumerate(items):
+            futures[self.__executor.submit(self.__call_on_session, function, item)] = item_index
+        results = [None] * len(items)
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+        return results
+
+    def close(self):
+        """
+        Close all the sessions.
+        """
+        self.__executor.shutdown(wait=True)
+        for session in self.sessions:
+            session.close()
+
+    def __call_on_session(self, function, item):
+        session_index = self.__idle_sessions.get()
+        try:
+            return function(self.sessions[session_index], session_index, item)
+        finally:
+            self.__idle_sessions.put(session_index)
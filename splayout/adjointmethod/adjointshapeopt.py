@@ -1,5 +1,7 @@
 from ..utils.utils import *
+from ..utils.integration import trapezoid_weights, linear_interpolation_matrix
 import numpy as np
+import scipy.constants
 
 class AdjointForShapeOpt:
     """
@@ -25,8 +27,21 @@ class AdjointForShapeOpt:
         New name for the components in Lumerical(default: "Adjoint").
     record_forward_field : Bool or Int
         Whether to record field in the forward simulation.
+    partial_fom_in_python : Bool or Int
+        Whether to fetch the fields and the epsilon differences from Lumerical once and calculate the partial FoM
+        with NumPy instead of the script loop in Lumerical CAD (default: True).
+    chunk_size : Int
+        Number of parameters contracted at once in the Python calculation of the partial FoM (default: 16).
+    field_spill : FieldSpill
+        Spill policy for the forward field recorded in Python, which is written to a memory-mapped scratch file right
+        after the forward simulation and streamed back during the gradient calculation (default: None, in RAM).
+
+    Notes
+    -----
+    When the design region has a polygon_function, the epsilon derivatives and the partial FoM are calculated in
+    Python (the forward field is always recorded), otherwise the structure is perturbed and evaluated in Lumerical CAD.
     """
-    def __init__(self, fdtd_engine, fom_monitor_name, target_fom, design_region, forward_source_name, backward_source_name, dx = 0.001, sim_name = "Adjoint", record_forward_field = 1):
+    def __init__(self, fdtd_engine, fom_monitor_name, target_fom, design_region, forward_source_name, backward_source_name, dx = 0.001, sim_name = "Adjoint", record_forward_field = 1, partial_fom_in_python = 1, chunk_size = 16, field_spill = None):
         self.fdtd_engine = fdtd_engine
         self.design_region = design_region
         self.fom_monitor_name = fom_monitor_name
@@ -36,6 +51,9 @@ class AdjointForShapeOpt:
         self.dx = dx
         self.sim_name = sim_name
         self.record_forward_field = record_forward_field
+        self.partial_fom_in_python = partial_fom_in_python
+        self.chunk_size = chunk_size
+        self.field_spill = field_spill
 
     @staticmethod
     def cal_epsilon_diff_in_CAD(fdtd_engine, design_region, params, origin_epsilon_name, data_name, dx):
@@ -120,6 +138,153 @@ class AdjointForShapeOpt:
         partial_fom = fdtd_engine.lumapi.getVar(fdtd_engine.fdtd.handle, 'partial_fom_derivs_vs_lambda')
         return partial_fom
 
+    @staticmethod
+    def cal_partial_fom_with_numpy(fdtd_engine, forward_field_name, adjoint_field_name, scaling_factor, epsilon_diff_name,
+                                   chunk_size = 16):
+        """
+        Calculate Partial FoM with NumPy, the same as cal_partial_fom_in_CAD but the fields and the epsilon differences
+        are fetched from Lumerical only once and all the partial derivatives are calculated as a tensor contraction.
+
+        Parameters
+        ----------
+        fdtd_engine : FDTDSimulation
+            The FDTDSimulation object.
+        forward_field_name : String
+            Name of the forward field data in Lumerical.
+        adjoint_field_name : String
+            Name of the adjoint field data in Lumerical.
+        scaling_factor : Array
+            Scaling factor of the adjoint field, size: (frequency points,).
+        epsilon_diff_name : String
+            Name of the cell of epsilon differences in Lumerical (from cal_epsilon_diff_in_CAD).
+        chunk_size : Int
+            Number of parameters contracted at once (default: 16).
+
+        Returns
+        -------
+        partial_fom : Array
+            Shape: (frequencies, number of parameters).
+        """
+        fdtd_engine.eval("splayout_forward_E = {0}.E; splayout_adjoint_E = {1}.E;".format(forward_field_name, adjoint_field_name) +
+                         "splayout_x = {0}.x; splayout_y = {0}.y; splayout_z = {0}.z;".format(forward_field_name))
+        handle = fdtd_engine.fdtd.handle
+        forward_field = fdtd_engine.lumapi.getVar(handle, "splayout_forward_E")
+        adjoint_field = fdtd_engine.lumapi.getVar(handle, "splayout_adjoint_E")
+        x_positions = fdtd_engine.lumapi.getVar(handle, "splayout_x")
+        y_positions = fdtd_engine.lumapi.getVar(handle, "splayout_y")
+        z_positions = fdtd_engine.lumapi.getVar(handle, "splayout_z")
+        epsilon_diff = fdtd_engine.lumapi.getVar(handle, epsilon_diff_name)
+        fdtd_engine.eval("clear(splayout_forward_E, splayout_adjoint_E, splayout_x, splayout_y, splayout_z);")
+        if not isinstance(epsilon_diff, (list, tuple)):
+            epsilon_diff = [epsilon_diff]
+        field_shape = np.shape(forward_field)
+        epsilon_diff = [np.reshape(item, field_shape[0:3] + (-1, 3)) for item in epsilon_diff]
+        return AdjointForShapeOpt.contract_partial_fom(forward_field, adjoint_field, scaling_factor, epsilon_diff,
+                                                       x_positions, y_positions, z_positions, chunk_size)
+
+    @staticmethod
+    def contract_partial_fom(forward_field, adjoint_field, scaling_factor, epsilon_diff, x_positions, y_positions,
+                             z_positions, chunk_size = 16, x_chunk_size = None):
+        """
+        Integrate 2 * eps0 * E_forward * E_adjoint * d(epsilon) over the region for all the parameters with trapezoid
+        weights, chunked by parameter (and by x for spilled fields) to bound the memory.
+
+        Parameters
+        ----------
+        forward_field : Array
+            Electric field of the forward simulation, size: (x mesh, y mesh, z mesh, frequency points, 3).
+        adjoint_field : Array
+            Electric field of the adjoint simulation, size: (x mesh, y mesh, z mesh, frequency points, 3).
+        scaling_factor : Array
+            Scaling factor of the adjoint field, size: (frequency points,).
+        epsilon_diff : Array or List of Array
+            Epsilon differences of the parameters, size: (number of parameters, x mesh, y mesh, z mesh, 1 or
+            frequency points, 3).
+        x_positions : Array
+            x positions of the fields (unit: m).
+        y_positions : Array
+            y positions of the fields (unit: m).
+        z_positions : Array
+            z positions of the fields (unit: m).
+        chunk_size : Int
+            Number of parameters contracted at once (default: 16).
+        x_chunk_size : Int
+            Number of x mesh points of the fields read at once (default: None, all at once).
+
+        Returns
+        -------
+        partial_fom : Array
+            Shape: (frequencies, number of parameters).
+        """
+        if (chunk_size < 1):
+            raise Exception("The chunk_size should be at least 1.")
+        x_size = np.shape(forward_field)[0]
+        if (type(x_chunk_size) == type(None)):
+            x_chunk_size = max(x_size, 1)
+        x_weights = trapezoid_weights(x_positions)
+        y_weights = trapezoid_weights(y_positions)
+        z_weights = trapezoid_weights(z_positions)
+        parameter_number = len(epsilon_diff)
+        partial_fom = np.zeros((np.shape(forward_field)[3], parameter_number), dtype=np.complex128)
+        for x_start in range(0, x_size, int(x_chunk_size)):
+            x_end = min(x_start + int(x_chunk_size), x_size)
+            gradient_field = 2.0 * scipy.constants.epsilon_0 * np.asarray(forward_field[x_start:x_end]) * np.asarray(adjoint_field[x_start:x_end])
+            gradient_field = np.einsum("xyzwc,x,y,z->xyzwc", gradient_field, x_weights[x_start:x_end], y_weights, z_weights)
+            for start in range(0, parameter_number, int(chunk_size)):
+                chunk = np.asarray([item[x_start:x_end] for item in epsilon_diff[start:start + int(chunk_size)]])
+                if (chunk.shape[4] == 1):
+                    partial_fom[:, start:start + chunk.shape[0]] += np.einsum("xyzwc,pxyzc->wp", gradient_field,
+                                                                             chunk[:, :, :, :, 0, :], optimize=True)
+                else:
+                    partial_fom[:, start:start + chunk.shape[0]] += np.einsum("xyzwc,pxyzwc->wp", gradient_field, chunk,
+                                                                             optimize=True)
+        return partial_fom * np.reshape(scaling_factor, (-1, 1))
+
+    @staticmethod
+    def cal_partial_fom_in_python(forward_field, adjoint_field, scaling_factor, epsilon_derivatives, x_positions,
+                                  y_positions, z_positions, chunk_size = 16, x_chunk_size = None):
+        """
+        Calculate Partial FoM in Python, the same as cal_partial_fom_in_CAD with the epsilon derivatives from the
+        rasterized polygons (uniform along z in the region).
+
+        Parameters
+        ----------
+        forward_field : Array
+            Electric field of the forward simulation, size: (x mesh, y mesh, z mesh, frequency points, 3).
+        adjoint_field : Array
+            Electric field of the adjoint simulation, size: (x mesh, y mesh, z mesh, frequency points, 3).
+        scaling_factor : Array
+            Scaling factor of the adjoint field, size: (frequency points,).
+        epsilon_derivatives : Array
+            Derivatives of epsilon (unit: 1/m), size: (number of parameters, x mesh, y mesh, 3).
+        x_positions : Array
+            x positions of the fields (unit: m).
+        y_positions : Array
+            y positions of the fields (unit: m).
+        z_positions : Array
+            z positions of the fields (unit: m).
+        chunk_size : Int
+            Number of parameters contracted at once (default: 16).
+        x_chunk_size : Int
+            Number of x mesh points of the fields read at once (default: None, all at once).
+
+        Returns
+        -------
+        partial_fom : Array
+            Shape: (frequencies, number of parameters).
+        """
+        epsilon_derivatives = np.asarray(epsilon_derivatives)[:, :, :, None, None, :]
+        return AdjointForShapeOpt.contract_partial_fom(forward_field, adjoint_field, scaling_factor, epsilon_derivatives,
+                                                       x_positions, y_positions, z_positions, chunk_size, x_chunk_size)
+
+    def __get_x_chunk_size(self):
+        if (type(self.field_spill) == type(None)):
+            return None
+        return self.field_spill.chunk_size
+
+    def __gradient_in_python(self):
+        return type(getattr(self.design_region, "polygon_function", None)) != type(None)
+
     def call_fom(self, params):
         """
         Calculate FoM(Figure of Merit) and return.
@@ -140,10 +305,13 @@ class AdjointForShapeOpt:
         self.fdtd_engine.set_disable(self.backward_source_name)
         self.design_region.update(params)
         self.fdtd_engine.run()
-        if (self.record_forward_field):
+        if (self.record_forward_field or self.__gradient_in_python()):
             self.forward_field = self.design_region.get_E_distribution()
-        self.forward_field_name = self.design_region.get_E_distribution_in_CAD("ForwardField")
-        self.forward_epsilon_name = self.design_region.get_epsilon_distribution_in_CAD("ForwardEpsilon")
+            if (type(self.field_spill) != type(None)):
+                self.forward_field = self.field_spill.spill(self.forward_field)
+        if not self.__gradient_in_python():
+            self.forward_field_name = self.design_region.get_E_distribution_in_CAD("ForwardField")
+            self.forward_epsilon_name = self.design_region.get_epsilon_distribution_in_CAD("ForwardEpsilon")
         mode_coefficient = self.fdtd_engine.get_mode_coefficient(expansion_name=self.fom_monitor_name)
         forward_source_power = self.fdtd_engine.get_source_power(self.forward_source_name)
         self.T_fwd_vs_wavelength = np.real(mode_coefficient * mode_coefficient.conj() / forward_source_power)
@@ -178,20 +346,38 @@ class AdjointForShapeOpt:
         self.fdtd_engine.set_enable(self.backward_source_name)
         self.fdtd_engine.set_disable(self.forward_source_name)
         self.fdtd_engine.run()
-        self.adjoint_field_name = self.design_region.get_E_distribution_in_CAD("BackwardField")
 
         omega = self.fdtd_engine.get_omega()
         adjoint_source_power = self.fdtd_engine.get_source_power(self.backward_source_name)
         scaling_factor = np.conj(self.phase_prefactors) * omega * 1j / np.sqrt(adjoint_source_power)
+        frequency_indices = getattr(self.design_region, "frequency_indices", None)
+        if (type(frequency_indices) != type(None)):
+            scaling_factor = np.array(scaling_factor).flatten()[frequency_indices]
 
-        epsilon_diff_name = self.cal_epsilon_diff_in_CAD(self.fdtd_engine, self.design_region, params,
-                                                                      self.forward_epsilon_name, "epsilon_diff", self.dx)
+        if (self.__gradient_in_python()):
+            self.adjoint_field, x_positions, y_positions, z_positions = self.design_region.get_E_distribution(if_get_spatial=1)
+            epsilon_derivatives = self.design_region.get_epsilon_derivatives(params, self.dx, x_positions * 1e6,
+                                                                             y_positions * 1e6) / 1e-6
+            partial_fom = self.cal_partial_fom_in_python(self.forward_field, self.adjoint_field, scaling_factor,
+                                                         epsilon_derivatives, x_positions, y_positions, z_positions,
+                                                         self.chunk_size, self.__get_x_chunk_size())
+        else:
+            self.adjoint_field_name = self.design_region.get_E_distribution_in_CAD("BackwardField")
+            epsilon_diff_name = self.cal_epsilon_diff_in_CAD(self.fdtd_engine, self.design_region, params,
+                                                                          self.forward_epsilon_name, "epsilon_diff", self.dx)
 
-        self.fdtd_engine.lumapi.putMatrix(self.fdtd_engine.fdtd.handle, "scaling_factor", scaling_factor)
-        partial_fom = self.cal_partial_fom_in_CAD(self.fdtd_engine, self.forward_field_name, self.adjoint_field_name,
-                                                        "scaling_factor", epsilon_diff_name)
+            if (self.partial_fom_in_python):
+                partial_fom = self.cal_partial_fom_with_numpy(self.fdtd_engine, self.forward_field_name,
+                                                              self.adjoint_field_name, scaling_factor,
+                                                              epsilon_diff_name, self.chunk_size)
+            else:
+                self.fdtd_engine.lumapi.putMatrix(self.fdtd_engine.fdtd.handle, "scaling_factor", scaling_factor)
+                partial_fom = self.cal_partial_fom_in_CAD(self.fdtd_engine, self.forward_field_name, self.adjoint_field_name,
+                                                                "scaling_factor", epsilon_diff_name)
 
         wavelength = self.fdtd_engine.get_wavelength()
+        if (type(frequency_indices) != type(None)):
+            partial_fom = linear_interpolation_matrix(wavelength[frequency_indices], wavelength).dot(partial_fom)
         wavelength_range = wavelength.max() - wavelength.min()
         T_fwd_error = self.T_fwd_vs_wavelength - self.target_fom
         const_factor = -1.0
@@ -1,9 +1,8 @@
 from ..utils.utils import *
-from .topologyregion3d import TopologyOptRegion3D
-from .topologyregion2d import TopologyOptRegion2D
-from .scalabletoregion3d import ScalableToOptRegion3D
+from .forwardcache import ForwardSolutionCache
+from .adjointcommon import spill_field, get_chunk_size, solve_forward, run_adjoint_simulation, region_partial_fom, \
+    parallel_adjoint_partial_foms
 import numpy as np
-import scipy.constants
 
 class AdjointForTO:
     """
@@ -31,9 +30,19 @@ class AdjointForTO:
         `Whether use the default figure of merit(default: 1).
     backward_T_monitor_names : String or List of String
         Monitor names for deriving FoM which need to calculate in the backward direction.
+    forward_cache_size : Int
+        Number of forward solutions kept for reuse, call_fom and call_grad never re-run the forward simulation for cached
+        parameters (default: 1).
+    session_pool : AdjointSessionPool
+        Cloned sessions for running the adjoint simulations of the backward sources in parallel (default: None, the
+        adjoint simulations run one by one in fdtd_engine).
+    field_spill : FieldSpill
+        Spill policy for the forward fields, which are written to memory-mapped scratch files right after the forward
+        simulation and streamed back during the gradient calculation (default: None, the forward fields stay in RAM).
     """
     def __init__(self,fdtd_engine, T_monitor_names, target_T, design_region, forward_source_names, backward_source_names,
-                 sim_name = "Adjoint", y_antisymmetric = 0, if_default_fom = 1, backward_T_monitor_names = None):
+                 sim_name = "Adjoint", y_antisymmetric = 0, if_default_fom = 1, backward_T_monitor_names = None,
+                 forward_cache_size = 1, session_pool = None, field_spill = None):
         self.fdtd_engine = fdtd_engine
         self.design_region = design_region
         self.T_monitor_names = np.array([T_monitor_names]).flatten()
@@ -48,6 +57,10 @@ class AdjointForTO:
             self.backward_T_monitor_names = []
         else:
             self.backward_T_monitor_names = np.array([backward_T_monitor_names]).flatten()
+        self.forward_cache = ForwardSolutionCache(forward_cache_size)
+        self.session_pool = session_pool
+        self.field_spill = field_spill
+        self.__design_key = None
 
     def get_total_source_power(self, source_names):
         """
@@ -100,13 +113,20 @@ class AdjointForTO:
         - self.fom : Float
             Figure of Merit (if_default_fom = 1) or Transmission(if_default_fom = 0).
         """
+        self.__solve_forward(params)
+        return self.fom
+
+    def __update_design(self, params):
         params = np.reshape(params,(self.design_region.get_x_size(),self.design_region.get_y_size()))
+        self.design_region.update(params)
+
+    def __run_forward(self, params):
         self.fdtd_engine.switch_to_layout()
         self.fdtd_engine.set_enable(self.forward_source_names.tolist())
         self.fdtd_engine.set_disable(self.backward_source_names.tolist())
-        self.design_region.update(params)
+        self.__update_design(params)
         self.fdtd_engine.run(self.sim_name)
-        self.forward_field = self.design_region.get_E_distribution()
+        self.forward_field = spill_field(self.field_spill, self.design_region.get_E_distribution())
 
         self.get_forward_transmission_properties()
 
@@ -126,7 +146,13 @@ class AdjointForTO:
         else:
             self.fom = self.T_fwd_vs_wavelengths
 
-        return self.fom
+    def __solve_forward(self, params):
+        forward_key, forward_solution, simulated = solve_forward(self, params, self.__run_forward,
+                                                                 ["forward_field", "T_fwd_vs_wavelengths",
+                                                                  "phase_prefactors", "fom"])
+        if (simulated):
+            self.__design_key = forward_key
+        return forward_key, forward_solution
 
     def call_grad(self, params):
         """
@@ -143,7 +169,13 @@ class AdjointForTO:
         - T_fwd_partial_derivs: Array
             Gradients.
         """
+        forward_key, forward_solution = self.__solve_forward(params)
+        if ("grad" in forward_solution):
+            return forward_solution["grad"].copy()
         self.fdtd_engine.switch_to_layout()
+        if (self.__design_key != forward_key):
+            self.__update_design(params)
+            self.__design_key = forward_key
         self.fdtd_engine.set_disable(self.forward_source_names.tolist())
         self.fdtd_engine.set_disable(self.backward_source_names.tolist())
         omega = self.fdtd_engine.get_omega()
@@ -152,47 +184,18 @@ class AdjointForTO:
 
         d = np.diff(wavelength)
         T_fwd_partial_derivs = []
+        if (type(self.session_pool) == type(None)):
+            adjoint_results = [self.__adjoint_partial_fom(self.fdtd_engine, i, omega)
+                               for i in range(0, np.shape(self.backward_source_names)[0])]
+        else:
+            adjoint_results = parallel_adjoint_partial_foms(self.fdtd_engine, self.session_pool, self.sim_name,
+                                                            self.__adjoint_partial_fom,
+                                                            np.shape(self.backward_source_names)[0], omega)
+        ## the workers only return their results, the state is kept on the main thread (the last backward source)
+        partial_foms = [result[0] for result in adjoint_results]
+        self.adjoint_field = adjoint_results[-1][1]
         for i in range(0, np.shape(self.backward_source_names)[0]):
-            self.fdtd_engine.set_enable(self.backward_source_names[i])
-            self.fdtd_engine.run()
-            adjoint_source_power = self.fdtd_engine.get_source_power(self.backward_source_names[i])
-            scaling_factor = np.conj(self.phase_prefactors[i]) * omega * 1j / np.sqrt(adjoint_source_power)
-            if type(self.design_region) == TopologyOptRegion3D:
-                self.adjoint_field, x_list, y_list, z_list = self.design_region.get_E_distribution(if_get_spatial=1)
-                cell = self.design_region.x_mesh * 1e-6 * self.design_region.y_mesh * 1e-6 * self.design_region.z_mesh * 1e-6
-                gradient_field = np.sum(
-                    np.sum(2.0 * cell * scipy.constants.epsilon_0 * self.forward_field * self.adjoint_field, axis=4),
-                    axis=2)
-                dF_dEps = gradient_field
-            elif type(self.design_region) == TopologyOptRegion2D:
-                self.adjoint_field = self.design_region.get_E_distribution()
-                gradient_field = 2.0 * self.design_region.x_mesh * 1e-6 * self.design_region.y_mesh * 1e-6 * scipy.constants.epsilon_0 * self.forward_field * self.adjoint_field
-                dF_dEps = np.squeeze(np.sum(gradient_field, axis=-1), axis=2)
-            elif type(self.design_region) == ScalableToOptRegion3D:
-                self.adjoint_field, x_list, y_list, z_list = self.design_region.get_E_distribution(if_get_spatial=1)
-                cell = self.design_region.x_mesh * 1e-6 * self.design_region.y_mesh * 1e-6 * self.design_region.z_mesh * 1e-6
-                gradient_field = np.sum(
-                    np.sum(2.0 * cell * scipy.constants.epsilon_0 * self.forward_field * self.adjoint_field, axis=4),
-                    axis=2)
-                dF_dEps = np.zeros((self.design_region.get_x_size(), self.design_region.get_y_size(), gradient_field.shape[2]), dtype=gradient_field.dtype)
-                for k in range(0, gradient_field.shape[2]):
-                    dF_dEps[:, :, k] = self.design_region.scaling(gradient_field[:, :, k])
-            else:
-                raise Exception("Unacceptable design region provided.")
-
-
-            for wl in range(0, len(omega)):
-                dF_dEps[:,:, wl] = dF_dEps[:,:, wl]*scaling_factor[wl]
-
-            if (self.y_antisymmetric):
-                dF_dEps = np.real(dF_dEps)[:, int(dF_dEps.shape[1]/2):, :]
-            else:
-                dF_dEps = np.real(dF_dEps)
-
-            topo_grad = dF_dEps * (self.design_region.higher_epsilon - self.design_region.lower_epsilon)
-            partial_fom = topo_grad.reshape(-1, topo_grad.shape[-1])
-            self.fdtd_engine.switch_to_layout()
-            self.fdtd_engine.set_disable(self.backward_source_names[i])
+            partial_fom = partial_foms[i]
 
             if (self.if_default_fom == 1):
                 if (wavelength.size > 1):
@@ -218,8 +221,43 @@ class AdjointForTO:
         else:
             T_fwd_partial_derivs = np.array(T_fwd_partial_derivs).transpose((1, 0, 2))
 
+        forward_solution["grad"] = T_fwd_partial_derivs.copy()
         return T_fwd_partial_derivs
 
+    def __adjoint_partial_fom(self, fdtd_engine, i, omega, filename = "temp"):
+        scaling_factor = run_adjoint_simulation(fdtd_engine, self.backward_source_names[i], self.phase_prefactors[i],
+                                                omega, filename)
+        partial_fom, adjoint_field = region_partial_fom(fdtd_engine, self.design_region, self.forward_field,
+                                                        scaling_factor, omega, self.y_antisymmetric,
+                                                        get_chunk_size(self.field_spill))
+        fdtd_engine.switch_to_layout()
+        fdtd_engine.set_disable(self.backward_source_names[i])
+        return partial_fom, adjoint_field
+
+    def value_and_grad(self, params):
+        """
+        Calculate FoM(Figure of Merit) and Gradient with a single forward simulation.
+
+        Parameters
+        ----------
+        params : Array
+            Parameters for the structure.
+
+        Returns
+        -------
+        out : Float or Array, Array
+            FoM (as call_fom), Gradients (as call_grad).
+        """
+        fom = self.call_fom(params)
+        return fom, self.call_grad(params)
+
+    def clear_forward_cache(self):
+        """
+        Drop the cached forward solutions, e.g. after the design regions are modified outside call_fom/call_grad.
+        """
+        self.forward_cache.clear()
+        self.__design_key = None
+
     def reset_T_monitor_names(self, T_monitor_names):
         """
         Rest fom monitor for deriving FoM.
@@ -230,6 +268,7 @@ class AdjointForTO:
             Monitor names for deriving FoM.
         """
         self.T_monitor_names = np.array([T_monitor_names]).flatten()
+        self.clear_forward_cache()
 
     def reset_forward_source_names(self, forward_source_names):
         """
@@ -241,6 +280,7 @@ class AdjointForTO:
             Source names for Forward simulation.
         """
         self.forward_source_names = np.array([forward_source_names]).flatten()
+        self.clear_forward_cache()
 
     def reset_backward_source_names(self, backward_source_names):
         """
@@ -253,6 +293,7 @@ class AdjointForTO:
 
         """
         self.backward_source_names = np.array([backward_source_names]).flatten()
+        self.clear_forward_cache()
 
     def reset_target_T(self, target_T):
         """
@@ -263,4 +304,5 @@ class AdjointForTO:
         target_T : Array or List of Array
             Target FoMs at different frequencies.
         """
-        self.target_T = np.reshape(np.array([target_T]), (np.shape(self.T_monitor_names)[0], -1))
\ No newline at end of file
+        self.target_T = np.reshape(np.array([target_T]), (np.shape(self.T_monitor_names)[0], -1))
+        self.clear_forward_cache()
@@ -0,0 +1,96 @@
+import numpy as np
+import tempfile
+
+
+class FieldSpill:
+    """
+    Spill policy that moves the forward fields of the adjoint method out of RAM into memory-mapped scratch files, the
+    fields are streamed back chunk by chunk (along x) during the gradient assembly.
+
+    Parameters
+    ----------
+    directory : String
+        Directory for the scratch files (default: None, the temporary directory of the system).
+    chunk_size : Int
+        Number of x mesh points read from the scratch files at once (default: 16).
+
+    Notes
+    -----
+    The scratch files are anonymous temporary files, the disk space is released as soon as the spilled arrays are
+    garbage collected (e.g. when the forward solution is dropped from the ForwardSolutionCache).
+    """
+    def __init__(self, directory = None, chunk_size = 16):
+        if (chunk_size < 1):
+            raise Exception("The chunk_size should be at least 1.")
+        self.directory = directory
+        self.chunk_size = int(chunk_size)
+        self.__spilled_bytes = 0
+
+    def spill(self, field):
+        """
+        Write a field into a scratch file.
+
+        Parameters
+        ----------
+        field : Array
+            Field to be spilled.
+
+        Returns
+        -------
+        out : numpy.memmap
+            Read-only memory-mapped copy of the field.
+        """
+        field = np.asarray(field)
+        with tempfile.TemporaryFile(dir=self.directory) as scratch_file:
+            spilled_field = np.memmap(scratch_file, dtype=field.dtype, mode="w+", shape=field.shape)
+        if (field.ndim > 0):
+            for start in range(0, field.shape[0], self.chunk_size):
+                spilled_field[start:start + self.chunk_size] = field[start:start + self.chunk_size]
+        else:
+            spilled_field[()] = field
+        spilled_field.flush()
+        spilled_field.flags.writeable = False
+        self.__spilled_bytes += field.nbytes
+        return spilled_field
+
+    def get_spilled_bytes(self):
+        """
+        Return the total size of the spilled fields.
+
+        Returns
+        -------
+        out : Int
+            Size (unit: byte).
+        """
+        return self.__spilled_bytes
+
+
+def field_product(forward_field, adjoint_field, chunk_size = None):
+    """
+    Sum of forward_field * adjoint_field over z and the field components, calculated chunk by chunk along x so that
+    spilled fields are never fully loaded.
+
+    Parameters
+    ----------
+    forward_field : Array
+        Electric field of the forward simulation, size: (x mesh, y mesh, z mesh, frequency points, 3).
+    adjoint_field : Array
+        Electric field of the adjoint simulation, size: (x mesh, y mesh, z mesh, frequency points, 3).
+    chunk_size : Int
+        Number of x mesh points in a chunk (default: None, all at once).
+
+    Returns
+    -------
+    out : Array
+        Size: (x mesh, y mesh, frequency points).
+    """
+    x_size = np.shape(forward_field)[0]
+    if (type(chunk_size) == type(None)):
+        chunk_size = max(x_size, 1)
+    product = np.zeros(np.shape(forward_field)[0:2] + np.shape(forward_field)[3:4],
+                       dtype=np.result_type(forward_field, adjoint_field))
+    for start in range(0, x_size, int(chunk_size)):
+        end = min(start + int(chunk_size), x_size)
+        product[start:end] = np.einsum("xyzwc,xyzwc->xyw", np.asarray(forward_field[start:end]),
+                                       np.asarray(adjoint_field[start:end]))
+    return product
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+import numpy as np
+import hashlib
+
+
+class ForwardSolutionCache:
+    """
+    Params-keyed cache for the forward solutions of the adjoint method, so that call_fom and call_grad with the same
+    parameters share a single forward simulation.
+
+    Parameters
+    ----------
+    max_size : Int
+        Maximum number of cached forward solutions, the least recently used one is dropped (default: 1).
+    """
+    def __init__(self, max_size = 1):
+        if (max_size < 1):
+            raise Exception("The size of the forward solution cache should be at least 1.")
+        self.max_size = int(max_size)
+        self.__solutions = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    @staticmethod
+    def key(params):
+        """
+        Key of the parameters.
+
+        Parameters
+        ----------
+        params : Array
+            Parameters for the structure.
+
+        Returns
+        -------
+        out : Bytes
+            Digest of the parameters (converted to float64, regardless of their shape).
+        """
+        params = np.ascontiguousarray(params, dtype=np.float64).flatten()
+        return hashlib.blake2b(params.tobytes(), digest_size=16).digest()
+
+    def get(self, key):
+        """
+        Get the forward solution of a key.
+
+        Parameters
+        ----------
+        key : Bytes
+            Key from ForwardSolutionCache.key.
+
+        Returns
+        -------
+        out : Dict or None
+            The cached forward solution, None if the parameters have not been solved.
+        """
+        if key in self.__solutions:
+            self.__solutions.move_to_end(key)
+            self.__hits += 1
+            return self.__solutions[key]
+        self.__misses += 1
+        return None
+
+    def put(self, key, solution):
+        """
+        Save a forward solution.
+
+        Parameters
+        ----------
+        key : Bytes
+            Key from ForwardSolutionCache.key.
+        solution : Dict
+            Forward solution.
+        """
+        self.__solutions[key] = solution
+        self.__solutions.move_to_end(key)
+        while (len(self.__solutions) > self.max_size):
+            self.__solutions.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop all the cached forward solutions.
+        """
+        self.__solutions.clear()
+
+    def get_statistics(self):
+        """
+        Get the number of cache hits and misses.
+
+        Returns
+        -------
+        out : Int, Int
+            Hits, misses.
+        """
+        return self.__hits, self.__misses
@@ -0,0 +1,207 @@
+from ..utils.utils import *
+from ..components.pixelsregion import RectanglePixelsRegion, CirclePixelsRegion
+from .fieldspill import field_product
+import numpy as np
+import scipy.constants
+
+
+class PixelsRegionSensitivity:
+    """
+    Adjoint sensitivity of a pixels region: one forward and one adjoint simulation (per backward source) give dFoM/dε
+    over the region (field products as AdjointForTO), which is integrated over the footprint of every pixel to predict
+    the change of the FoM when the pixel is flipped. It is called as sensitivity_function of DirectBinarySearchAlgorithm.
+
+    Parameters
+    ----------
+    fdtd_engine : FDTDSimulation or FDFDSimulation
+        The simulation object.
+    pixels_region : RectanglePixelsRegion or CirclePixelsRegion
+        The pixels region.
+    T_monitor_names : String or List of String
+        Monitor names of the transmissions in the FoM.
+    forward_source_names : String or List of String
+        Source names for the forward simulation.
+    backward_source_names : String or List of String
+        Source names for the adjoint simulations (one per monitor, at the monitor position).
+    pixel_index : Float
+        Refractive index of the pixels.
+    background_index : Float
+        Refractive index around the pixels (e.g. the core of an etched region).
+    weights : List of Float
+        Weights of the transmissions, FoM = Σ weights[i] * mean(T_i) over the wavelengths (default: None, all 1).
+    matrix_shape : Tuple
+        Shape of the matrix of pixels_region.update, a solution is solution.reshape(matrix_shape) (default: None, the
+        solution is given as it is, e.g. with matrix_mask).
+    backward_T_monitor_names : String or List of String
+        Monitor names of the transmissions in the backward direction (default: None).
+    sim_name : String
+        Name of the temporary simulation (default: "Sensitivity").
+    field_monitor_name : String
+        Name of the field monitor over the region (default: None, group_name of the region + "_sensitivity").
+    """
+    def __init__(self, fdtd_engine, pixels_region, T_monitor_names, forward_source_names, backward_source_names,
+                 pixel_index, background_index, weights = None, matrix_shape = None, backward_T_monitor_names = None,
+                 sim_name = "Sensitivity", field_monitor_name = None):
+        if (type(pixels_region) != RectanglePixelsRegion) and (type(pixels_region) != CirclePixelsRegion):
+            raise Exception("The sensitivity is only available for RectanglePixelsRegion and CirclePixelsRegion.")
+        self.fdtd_engine = fdtd_engine
+        self.pixels_region = pixels_region
+        self.T_monitor_names = np.array([T_monitor_names]).flatten()
+        self.forward_source_names = np.array([forward_source_names]).flatten()
+        self.backward_source_names = np.array([backward_source_names]).flatten()
+        if (self.backward_source_names.size != self.T_monitor_names.size):
+            raise Exception("Each monitor of the FoM should have a backward source.")
+        self.weights = np.ones(self.T_monitor_names.size) if type(weights) == type(None) else np.array(weights).flatten()
+        self.delta_epsilon = pixel_index ** 2 - background_index ** 2
+        self.matrix_shape = matrix_shape
+        if backward_T_monitor_names is None:
+            self.backward_T_monitor_names = []
+        else:
+            self.backward_T_monitor_names = np.array([backward_T_monitor_names]).flatten()
+        self.sim_name = sim_name
+        if (type(field_monitor_name) == type(None)):
+            field_monitor_name = pixels_region.group_name + "_sensitivity"
+        self.field_monitor_name = field_monitor_name
+        self.__monitor_flag = 0
+        self.__footprints = None
+        self.sensitivity = None
+        self.x_positions = None
+        self.y_positions = None
+
+    def __add_monitor(self):
+        self.fdtd_engine.switch_to_layout()
+        self.fdtd_engine.add_field_region(self.pixels_region.left_down_point, self.pixels_region.right_up_point,
+                                          z_min=self.pixels_region.z_start, z_max=self.pixels_region.z_end,
+                                          field_monitor_name=self.field_monitor_name)
+        self.__monitor_flag = 1
+
+    def __to_matrix(self, solution):
+        solution = np.asarray(solution)
+        if (type(self.matrix_shape) != type(None)):
+            return solution.reshape(self.matrix_shape)
+        return solution
+
+    def __pixel_positions(self, matrix):
+        """
+        (col, row) of the entries of a solution in the matrix of the region and the shape of that matrix.
+        """
+        mask = self.pixels_region.matrix_mask
+        if (type(mask) != type(None)):
+            enable_positions = np.transpose(np.where(np.transpose(mask) == 1))
+            return enable_positions[:, 1], enable_positions[:, 0], mask.shape
+        cols, rows = np.meshgrid(np.arange(matrix.shape[0]), np.arange(matrix.shape[1]), indexing="ij")
+        return cols.flatten(), rows.flatten(), matrix.shape
+
+    def __build_footprints(self, cols, rows, shape):
+        ## area of every monitor cell covered by every pixel, size: (pixels, x mesh, y mesh)
+        region = self.pixels_region
+        block_x_length = np.abs(region.left_down_point.x - region.right_up_point.x) / shape[0]
+        block_y_length = np.abs(region.left_down_point.y - region.right_up_point.y) / shape[1]
+        center_x = region.left_down_point.x + block_x_length / 2 + cols * block_x_length
+        center_y = region.right_up_point.y - block_y_length / 2 - rows * block_y_length
+        x_edges = self.__cell_edges(self.x_positions)
+        y_edges = self.__cell_edges(self.y_positions)
+        if (type(region) == RectanglePixelsRegion):
+            overlap_x = np.clip(np.minimum(x_edges[None, 1:], (center_x + region.pixel_x_length / 2)[:, None]) -
+                                np.maximum(x_edges[None, :-1], (center_x - region.pixel_x_length / 2)[:, None]), 0, None)
+            overlap_y = np.clip(np.minimum(y_edges[None, 1:], (center_y + region.pixel_y_length / 2)[:, None]) -
+                                np.maximum(y_edges[None, :-1], (center_y - region.pixel_y_length / 2)[:, None]), 0, None)
+            return overlap_x[:, :, None] * overlap_y[:, None, :]
+        area = np.diff(x_edges)[:, None] * np.diff(y_edges)[None, :]
+        inside = ((self.x_positions[None, :, None] - center_x[:, None, None]) ** 2 +
+                  (self.y_positions[None, None, :] - center_y[:, None, None]) ** 2) <= region.pixel_radius ** 2
+        return inside * area[None]
+
+    @staticmethod
+    def __cell_edges(positions):
+        if (positions.size == 1):
+            return np.array([positions[0] - 0.5, positions[0] + 0.5])
+        middle = (positions[1:] + positions[:-1]) / 2
+        return np.concatenate([[2 * positions[0] - middle[0]], middle, [2 * positions[-1] - middle[-1]]])
+
+    def __get_total_source_power(self, source_names):
+        total_source_power = self.fdtd_engine.get_source_power(source_names[0])
+        for i in range(1, np.shape(source_names)[0]):
+            total_source_power += self.fdtd_engine.get_source_power(source_names[i])
+        return total_source_power
+
+    def get_sensitivity(self, solution):
+        """
+        Run the forward and adjoint simulations and calculate dFoM/dε over the region.
+
+        Parameters
+        ----------
+        solution : Array
+            Solution (0/1 for each pixel).
+
+        Returns
+        -------
+        out : Array
+            dFoM/dε (per unit area, unit: 1/μm^2), size: (x mesh, y mesh).
+        """
+        if (self.__monitor_flag == 0):
+            self.__add_monitor()
+        self.fdtd_engine.switch_to_layout()
+        self.fdtd_engine.set_enable(self.forward_source_names.tolist())
+        self.fdtd_engine.set_disable(self.backward_source_names.tolist())
+        self.pixels_region.update(self.__to_matrix(solution))
+        self.fdtd_engine.run(self.sim_name)
+        forward_field, x_list, y_list, z_list = self.fdtd_engine.get_E_distribution(
+            field_monitor_name=self.field_monitor_name, if_get_spatial=1)
+        self.x_positions = np.array(x_list).flatten() * 1e6
+        self.y_positions = np.array(y_list).flatten() * 1e6
+        forward_source_power = self.__get_total_source_power(self.forward_source_names)
+        phase_prefactors = []
+        for name in self.T_monitor_names:
+            direction = BACKWARD if name in self.backward_T_monitor_names else FORWARD
+            coefficient = self.fdtd_engine.get_mode_coefficient(expansion_name=str(name), direction=direction)
+            phase_prefactors.append(np.array(coefficient).flatten() / 4.0 / forward_source_power)
+        omega = np.array(self.fdtd_engine.get_omega()).flatten()
+
+        sensitivity = np.zeros((self.x_positions.size, self.y_positions.size))
+        for i in range(0, self.backward_source_names.size):
+            self.fdtd_engine.switch_to_layout()
+            self.fdtd_engine.set_disable(self.forward_source_names.tolist())
+            self.fdtd_engine.set_disable(self.backward_source_names.tolist())
+            self.fdtd_engine.set_enable(self.backward_source_names[i])
+            self.fdtd_engine.run(self.sim_name)
+            adjoint_field = self.fdtd_engine.get_E_distribution(field_monitor_name=self.field_monitor_name)
+            adjoint_source_power = self.fdtd_engine.get_source_power(self.backward_source_names[i])
+            scaling_factor = np.conj(phase_prefactors[i]) * omega * 1j / np.sqrt(adjoint_source_power)
+            ## dT/dε per unit area (m^2 -> μm^2), averaged over the wavelengths
+            dT_dEps = 2.0 * 1e-12 * scipy.constants.epsilon_0 * \
+                      np.real(field_product(forward_field, adjoint_field) * scaling_factor[None, None, :])
+            sensitivity += self.weights[i] * np.mean(dT_dEps, axis=2)
+
+        ## leave the sources as the forward simulation (for the cost function)
+        self.fdtd_engine.switch_to_layout()
+        self.fdtd_engine.set_disable(self.backward_source_names.tolist())
+        self.fdtd_engine.set_enable(self.forward_source_names.tolist())
+        self.sensitivity = sensitivity
+        return sensitivity
+
+    def get_flip_cost_change(self, solution):
+        """
+        Predict the change of the cost (-FoM) when each pixel of the solution is flipped, first order in Δε.
+
+        Parameters
+        ----------
+        solution : Array
+            Solution (0/1 for each pixel).
+
+        Returns
+        -------
+        out : Array
+            Predicted cost change of flipping each entry of the solution (negative means better), size: (loS,).
+        """
+        sensitivity = self.get_sensitivity(solution)
+        matrix = self.__to_matrix(solution)
+        cols, rows, shape = self.__pixel_positions(matrix)
+        if (type(self.__footprints) == type(None)) or (self.__footprints.shape[1:] != sensitivity.shape):
+            self.__footprints = self.__build_footprints(cols, rows, shape)
+        ## a pixel that is on is removed by the flip
+        flip_epsilon = np.where(np.asarray(solution).flatten() > 0.5, -self.delta_epsilon, self.delta_epsilon)
+        return -flip_epsilon * np.einsum("pxy,xy->p", self.__footprints, sensitivity)
+
+    def __call__(self, solution):
+        return self.get_flip_cost_change(solution)
@@ -1,4 +1,5 @@
 from ..utils.utils import *
+from ..utils.rasterizer import rasterize_polygon_function, polygon_function_epsilon_derivatives
 import numpy as np
 import os
 
@@ -29,14 +30,38 @@ class ShapeOptRegion2D:
         The end point for the structure in z axis (unit: μm, default: 0.11).
     rename : String
         New name for the components in Lumerical.
+    polygon_function : func
+        function that returns the polygons (list of vertices, unit: μm) of the structure according to parameters, the
+        epsilon distribution and its derivatives can then be calculated in Python (default: None).
+    lower_index : Float
+        Refractive index outside the polygons of polygon_function (default: 1.444).
+    higher_index : Float
+        Refractive index inside the polygons of polygon_function (default: 3.478).
+    supersampling : Int
+        Number of sampling points in each axis of a grid cell for rasterizing the polygons (default: 8).
+    frequency_indices : List of Int
+        Indices of the global frequency points recorded by the field region for the gradient (default: None, all the
+        frequency points), the gradient is interpolated back to all the frequency points.
+    down_sample : Int
+        Spatial down sampling factor of the field region (default: 1), only with polygon_function (the epsilon
+        derivatives are rasterized on the down sampled grid).
     """
-    def __init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, transfer_function, x_mesh = 0.02, y_mesh = 0.02, z_mesh = 0.0071, z_start = -0.11, z_end = 0.11, rename = "ShapeOptRegion" ):
+    def __init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, transfer_function, x_mesh = 0.02, y_mesh = 0.02, z_mesh = 0.0071, z_start = -0.11, z_end = 0.11, rename = "ShapeOptRegion",
+                 polygon_function = None, lower_index = 1.444, higher_index = 3.478, supersampling = 8, frequency_indices = None, down_sample = 1):
         self.left_down_point = tuple_to_point(bottom_left_corner_point)
         self.right_up_point= tuple_to_point(top_right_corner_point)
         self.__last_params = None
         self.__lastest_params = None
         self.fdtd_engine = fdtd_engine
+        self.frequency_indices = None if type(frequency_indices) == type(None) else np.unique(np.array([frequency_indices]).flatten().astype(int))
+        self.down_sample = int(down_sample)
+        if (self.down_sample > 1 and type(polygon_function) == type(None)):
+            raise Exception("The down_sample of the field region requires the polygon_function.")
         self.transfer_function = transfer_function
+        self.polygon_function = polygon_function
+        self.lower_epsilon = lower_index**2
+        self.higher_epsilon = higher_index**2
+        self.supersampling = supersampling
         self.x_mesh = x_mesh
         self.y_mesh = y_mesh
         self.z_mesh = z_mesh
@@ -66,7 +91,8 @@ class ShapeOptRegion2D:
         self.fdtd_engine.add_index_region(self.left_down_point, self.right_up_point, z_min=self.z_min, z_max=self.z_max,
                                           dimension=2, index_monitor_name=self.index_region_name)
         self.fdtd_engine.add_field_region(self.left_down_point, self.right_up_point, z_min=self.z_min, z_max=self.z_max,
-                                          dimension=2, field_monitor_name=self.field_region_name)
+                                          dimension=2, field_monitor_name=self.field_region_name,
+                                          frequency_indices=self.frequency_indices, down_sample=self.down_sample)
         self.fdtd_engine.add_mesh_region(self.left_down_point, self.right_up_point, x_mesh=self.x_mesh,
                                          y_mesh=self.y_mesh,
                                          z_mesh=self.z_mesh, z_min=self.z_min, z_max=self.z_max)
@@ -88,9 +114,65 @@ class ShapeOptRegion2D:
                                    'delete;')
         self.transfer_function(params)
 
+    def rasterize_epsilon(self, params, x_positions = None, y_positions = None):
+        """
+        Calculate the epsilon distribution of the polygons from polygon_function in Python.
+
+        Parameters
+        ----------
+        params : numpy.array
+            A one-dimensional array in [0,1].
+        x_positions : Array
+            x positions of the grid (unit: μm, default: None, the grid of the region).
+        y_positions : Array
+            y positions of the grid (unit: μm, default: None, the grid of the region).
+
+        Returns
+        -------
+        out : Array
+            Epsilon for the x, y and z field components, size: (x mesh, y mesh, 3).
+        """
+        if (type(x_positions) == type(None)):
+            x_positions = self.x_positions
+        if (type(y_positions) == type(None)):
+            y_positions = self.y_positions
+        return rasterize_polygon_function(self.polygon_function, params, x_positions, y_positions, self.higher_epsilon,
+                                          self.lower_epsilon, supersampling=self.supersampling)
+
+    def get_epsilon_derivatives(self, params, dx, x_positions = None, y_positions = None, workers = None):
+        """
+        Calculate the derivatives of the epsilon distribution to the parameters by finite difference in Python, the
+        parameters are perturbed in parallel.
+
+        Parameters
+        ----------
+        params : numpy.array
+            A one-dimensional array in [0,1].
+        dx : Float
+            Micro element unit for the finite difference (unit: μm).
+        x_positions : Array
+            x positions of the grid (unit: μm, default: None, the grid of the region).
+        y_positions : Array
+            y positions of the grid (unit: μm, default: None, the grid of the region).
+        workers : Int
+            Number of threads (default: None, decided by ThreadPoolExecutor).
+
+        Returns
+        -------
+        out : Array
+            Derivatives (unit: 1/μm), size: (number of parameters, x mesh, y mesh, 3).
+        """
+        if (type(x_positions) == type(None)):
+            x_positions = self.x_positions
+        if (type(y_positions) == type(None)):
+            y_positions = self.y_positions
+        return polygon_function_epsilon_derivatives(self.polygon_function, params, dx, x_positions, y_positions,
+                                                    self.higher_epsilon, self.lower_epsilon,
+                                                    supersampling=self.supersampling, workers=workers)
+
     def get_E_distribution(self, if_get_spatial = 0):
         """
-        Get electric field distribution from the region.
+        Get electric field distribution from the region (only the slice for plot_field_figure is kept in the region).
 
         Parameters
         ----------
@@ -106,8 +188,9 @@ class ShapeOptRegion2D:
                 size: (x mesh, y mesh, 1, frequency points, 3), (x mesh,), (y mesh,), (1,)
         """
         if (if_get_spatial == 0):
-            self.field_figure = self.fdtd_engine.get_E_distribution(field_monitor_name = self.field_region_name, if_get_spatial = if_get_spatial)
-            return self.field_figure
+            field = self.fdtd_engine.get_E_distribution(field_monitor_name = self.field_region_name, if_get_spatial = if_get_spatial)
+            self.field_figure = field[:, :, 0, 0, :].copy()
+            return field
         else:
             return self.fdtd_engine.get_E_distribution(field_monitor_name = self.field_region_name, if_get_spatial = if_get_spatial)
 
@@ -228,7 +311,7 @@ class ShapeOptRegion2D:
             import matplotlib.pyplot as plt
 
         if type(self.field_figure) != type(None):
-            field = np.abs(self.field_figure[:, :,0, 0, 1])
+            field = np.abs(self.field_figure[:, :, 1])
         else:
             raise Exception("No field stored in the reiogn.")
         xx, yy = np.meshgrid(np.linspace(self.x_positions[0], self.x_positions[-1], field.shape[0]),
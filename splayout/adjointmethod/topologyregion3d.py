@@ -37,14 +37,32 @@ class TopologyOptRegion3D:
         Eta for the smoothing filter (default: 0.5)
     beta : Float
         Beta fort hte smoothing filter (default: 1)
+    inplace_update : Bool
+        Whether to keep the import object and only replace its nk data on update, only the changed block of the
+        permittivity is sent when the change is localized (default: False).
+    patch_ratio : Float
+        With inplace_update, the changed block is sent alone when its size is no more than patch_ratio of the region
+        (default: 0.25).
+    frequency_indices : List of Int
+        Indices of the global frequency points recorded by the field region for the gradient (default: None, all the
+        frequency points), the gradient is interpolated back to all the frequency points.
+    down_sample : Int
+        Spatial down sampling factor of the field region (default: 1), the gradient is interpolated back to the grid of
+        the parameters.
     """
     def __init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, x_mesh = 0.02,y_mesh = 0.02,z_mesh = 0.02,
-                 lower_index = 1.444, higher_index = 3.478, z_start=-0.11, z_end=0.11, rename = "ToOptRegion"):
+                 lower_index = 1.444, higher_index = 3.478, z_start=-0.11, z_end=0.11, rename = "ToOptRegion",
+                 inplace_update = 0, patch_ratio = 0.25, frequency_indices = None, down_sample = 1):
         self.left_down_point = tuple_to_point(bottom_left_corner_point)
         self.right_up_point = tuple_to_point(top_right_corner_point)
         self.__last_params = None
         self.__lastest_params = None
+        self.__last_epsilon = None
         self.fdtd_engine = fdtd_engine
+        self.frequency_indices = None if type(frequency_indices) == type(None) else np.unique(np.array([frequency_indices]).flatten().astype(int))
+        self.down_sample = int(down_sample)
+        self.inplace_update = inplace_update
+        self.patch_ratio = patch_ratio
         self.x_mesh = x_mesh
         self.y_mesh = y_mesh
         self.z_mesh = z_mesh
@@ -75,7 +93,8 @@ class TopologyOptRegion3D:
     def __initialize(self):
         self.fdtd_engine.add_index_region(self.left_down_point, self.right_up_point, z_min=self.z_min, z_max=self.z_max, dimension=3, index_monitor_name= self.index_region_name)
         self.fdtd_engine.fdtd.eval( 'select("{}");set("spatial interpolation","specified position");'.format(self.index_region_name))
-        self.fdtd_engine.add_field_region(self.left_down_point, self.right_up_point, z_min=self.z_min, z_max=self.z_max, dimension=3, field_monitor_name= self.field_region_name)
+        self.fdtd_engine.add_field_region(self.left_down_point, self.right_up_point, z_min=self.z_min, z_max=self.z_max, dimension=3, field_monitor_name= self.field_region_name,
+                                          frequency_indices=self.frequency_indices, down_sample=self.down_sample)
         self.fdtd_engine.fdtd.eval(
             'select("{}");set("spatial interpolation","specified position");'.format(self.field_region_name))
         self.fdtd_engine.add_mesh_region(self.left_down_point, self.right_up_point, x_mesh=self.x_mesh, y_mesh=self.y_mesh,
@@ -118,26 +137,50 @@ class TopologyOptRegion3D:
         '''
 
         epsilon = params_matrix * (self.higher_epsilon - self.lower_epsilon) + self.lower_epsilon
+        if (self.inplace_update):
+            self.__inplace_update(epsilon)
+            return
         full_epsilon = np.broadcast_to(epsilon[:, :, None], (self.x_size, self.y_size, self.z_size))
-        self.fdtd_engine.fdtd.putv('eps_geo', full_epsilon)
-        self.fdtd_engine.fdtd.putv('x_geo', self.x_positions*1e-6)
-        self.fdtd_engine.fdtd.putv('y_geo', self.y_positions*1e-6)
-        self.fdtd_engine.fdtd.putv('z_geo', self.z_positions*1e-6)
+        self.fdtd_engine.putv('eps_geo', full_epsilon)
+        x_name, y_name, z_name = self.__put_grids()
 
         self.fdtd_engine.fdtd.eval('select("{}");'.format(self.rename) +
                   'delete;' +
                   'addimport;' +
                   'set("name","{}");'.format(self.rename) +
-                  'importnk2(sqrt(eps_geo),x_geo,y_geo,z_geo);')
+                  'importnk2(sqrt(eps_geo),' + x_name + ',' + y_name + ',' + z_name + ');')
 
     def reset_index(self, lower_index, higher_index):
 
         self.lower_epsilon = lower_index ** 2
         self.higher_epsilon = higher_index ** 2
 
+    def __inplace_update(self, epsilon):
+        eps_name = self.rename + "_eps_geo"
+        if (type(self.__last_epsilon) == type(None)):
+            self.fdtd_engine.putv(eps_name, epsilon, cache=1)
+        else:
+            self.fdtd_engine.putv_patch(eps_name, epsilon, self.__last_epsilon, patch_ratio=self.patch_ratio, cache=1)
+        self.__last_epsilon = np.array(epsilon)
+        x_name, y_name, z_name = self.__put_grids()
+
+        self.fdtd_engine.fdtd.eval('select("{}");'.format(self.rename) +
+                                   'temp=zeros(length(' + x_name + '),length(' + y_name + '),length(' + z_name + '));' +
+                                   'for(k=1:length(' + z_name + ')){temp(:,:,k)=' + eps_name + ';}' +
+                                   'importnk2(sqrt(temp),' + x_name + ',' + y_name + ',' + z_name + ');' +
+                                   'clear(temp);')
+
+    def __put_grids(self):
+        ## the grids are kept in the workspace under per-region names, the cache of putv skips them once sent
+        names = (self.rename + "_x_geo", self.rename + "_y_geo", self.rename + "_z_geo")
+        self.fdtd_engine.putv(names[0], self.x_positions * 1e-6, cache=1)
+        self.fdtd_engine.putv(names[1], self.y_positions * 1e-6, cache=1)
+        self.fdtd_engine.putv(names[2], self.z_positions * 1e-6, cache=1)
+        return names
+
     def get_E_distribution(self, if_get_spatial = 0):
         """
-        Get electric field distribution from the region.
+        Get electric field distribution from the region (only the slice for plot_field_figure is kept in the region).
 
         Parameters
         ----------
@@ -153,9 +196,10 @@ class TopologyOptRegion3D:
                 size: (x mesh, y mesh, z mesh, frequency points, 3), (x mesh,), (y mesh,), (z mesh,)
         """
         if (if_get_spatial == 0):
-            self.field_figure = self.fdtd_engine.get_E_distribution(field_monitor_name=self.field_region_name,
-                                                                    if_get_spatial=if_get_spatial)
-            return self.field_figure
+            field = self.fdtd_engine.get_E_distribution(field_monitor_name=self.field_region_name, if_get_spatial=if_get_spatial)
+            ## the field may be down sampled in z, take its own middle plane
+            self.field_figure = field[:, :, field.shape[2]//2, 0, :].copy()
+            return field
         else:
             return self.fdtd_engine.get_E_distribution(field_monitor_name=self.field_region_name,
                                                        if_get_spatial=if_get_spatial)
@@ -192,7 +236,8 @@ class TopologyOptRegion3D:
             matplotlib.use('AGG')
             import matplotlib.pyplot as plt
 
-        epsilon = np.real(np.mean(self.epsilon_figure[:,:,int(self.z_size/2),:] if type(self.epsilon_figure)!=type(None) else self.get_epsilon_distribution()[:,:,int(self.z_size/2),:], axis=-1))
+        epsilon_distribution = self.epsilon_figure if type(self.epsilon_figure)!=type(None) else self.get_epsilon_distribution()
+        epsilon = np.real(np.mean(epsilon_distribution[:,:,epsilon_distribution.shape[2]//2,:], axis=-1))
         xx, yy = np.meshgrid(np.linspace(self.x_positions[0], self.x_positions[-1], epsilon.shape[0]),
                                          np.linspace(self.y_positions[0], self.y_positions[-1], epsilon.shape[1]))
         bar = plt.pcolormesh(xx, yy, epsilon.T , cmap="gray", vmin=self.lower_epsilon, vmax=self.higher_epsilon)
@@ -241,8 +286,9 @@ class TopologyOptRegion3D:
             matplotlib.use('AGG')
             import matplotlib.pyplot as plt
 
-        field = np.abs(np.mean(self.field_figure[:, :, int(self.z_size/2), 0, :], axis=-1) if type(self.field_figure) != type(
-            None) else np.mean(self.get_E_distribution()[:, :, int(self.z_size/2), 0, :], axis=-1))
+        if type(self.field_figure) == type(None):
+            self.get_E_distribution()
+        field = np.abs(np.mean(self.field_figure, axis=-1))
         xx, yy = np.meshgrid(np.linspace(self.x_positions[0], self.x_positions[-1], field.shape[0]),
                              np.linspace(self.y_positions[0], self.y_positions[-1], field.shape[1]))
         bar = plt.pcolormesh(xx, yy, field.T, cmap="jet")
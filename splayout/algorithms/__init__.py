@@ -2,4 +2,7 @@ from .binarybatalgorithm import BinaryBatAlgorithm
 from .directbinarysearchalgorithm import DirectBinarySearchAlgorithm
 from .particleswarmalgorithm import ParticleSwarmAlgorithm
 from .binaryparticleswarmalgorithm import BinaryParticleSwarmAlgorithm
-from .binarygeneticalgorithm import BinaryGeneticAlgorithm
\ No newline at end of file
+from .binarygeneticalgorithm import BinaryGeneticAlgorithm
+from .binarysolutions import pack_solutions, unpack_solutions, packed_crossover, packed_mutation, hamming_distance
+from .costsurrogate import CostSurrogate
+from .multifidelity import MultiFidelityCostFunction
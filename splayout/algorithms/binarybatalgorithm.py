@@ -4,6 +4,7 @@
 #####################################################################################################
 import numpy as np
 import math
+from .binarysolutions import pack_solutions, unpack_solutions
 
 class BinaryBatAlgorithm:
     """
@@ -40,7 +41,7 @@ class BinaryBatAlgorithm:
         ## initial arrays
         self.__Q = np.zeros((noS,1)) # Frequency
         self.__v = np.zeros((noS,loS)) # Velocities
-        self.__Sol = np.random.randint(0,2,size=(noS,loS)) # Initialize the solutions
+        self.__Sol = pack_solutions(np.random.randint(0,2,size=(noS,loS))) # Initialize the solutions (bit-packed)
         self.cg_curve = np.zeros((max_iteration))
         self.__cost = np.zeros((noS,1)) ## the cost of the population, the lower , the better (1 - FoM)
         self.__engine_flag = 0
@@ -61,10 +62,10 @@ class BinaryBatAlgorithm:
         Initialize the Binary Bat Algorithm, evaluate the first iteration.
         """
         for i in range(0, self.noS):
-            self.__cost[i] = self.cost_function(self.__Sol[i, :])
+            self.__cost[i] = self.cost_function(unpack_solutions(self.__Sol[i, :], self.loS))
         self.min_cost = np.min(self.__cost, axis=0)[0]
         self.__min_position = np.argmin(self.__cost, axis=0)[0]
-        self.best_solution = self.__Sol[self.__min_position, :].copy()
+        self.best_solution = unpack_solutions(self.__Sol[self.__min_position, :], self.loS)
 
         ## Initialize the iteration
         self.__iter = 0
@@ -80,24 +81,24 @@ class BinaryBatAlgorithm:
             self.cg_curve[self.__iter] = self.min_cost
             self.__iter += 1
             for i in range(0,self.noS):
-                ## create a temporal solution
-                temp_solution = self.__Sol[i,:]
-                for j in range(0,self.loS):
-                    self.__Q[i] = self.__Qmin + (self.__Qmin - self.__Qmax)*np.random.rand() # Equation 3
-                    self.__v[i,j] = self.__v[i,j] + (temp_solution[j] - self.best_solution[j]) * self.__Q[i] # Equation 1
+                ## create a temporal solution (all the bits are updated at once)
+                temp_solution = unpack_solutions(self.__Sol[i,:], self.loS)
+                Q = self.__Qmin + (self.__Qmin - self.__Qmax)*np.random.rand(self.loS) # Equation 3
+                self.__Q[i] = Q[-1]
+                self.__v[i,:] = self.__v[i,:] + (temp_solution - self.best_solution) * Q # Equation 1
 
-                    V_shaped_transfer_function = abs((2/math.pi)*math.atan((math.pi/2)*self.__v[i,j]))
+                V_shaped_transfer_function = np.abs((2/math.pi)*np.arctan((math.pi/2)*self.__v[i,:]))
 
-                    if np.random.rand() < V_shaped_transfer_function :
-                        temp_solution[j] = (temp_solution[j] + 1 ) %2
+                flip_flags = np.random.rand(self.loS) < V_shaped_transfer_function
+                temp_solution[flip_flags] = 1 - temp_solution[flip_flags]
 
-                    if np.random.rand() > self.pulse_rate:
-                        temp_solution[j] = self.best_solution[j].copy()
+                best_flags = np.random.rand(self.loS) > self.pulse_rate
+                temp_solution[best_flags] = self.best_solution[best_flags]
+                self.__Sol[i,:] = pack_solutions(temp_solution)
 
                 ## Calculate the cost
                 new_cost =  self.cost_function(temp_solution)
                 if (new_cost <= self.__cost[i]) and (np.random.rand() < self.loudness):
-                    self.__Sol[i,:] = temp_solution
                     self.__cost[i] = new_cost
 
                 # Ppdate the current best
@@ -152,6 +153,17 @@ class BinaryBatAlgorithm:
         out : Array
             All the solutions, size: (noS,loS).
         """
+        return unpack_solutions(self.__Sol, self.loS)
+
+    def get_packed_solutions(self):
+        """
+        Get the temporal total solutions in bit-packed form (see splayout.algorithms.binarysolutions).
+
+        Returns
+        -------
+        out : Array
+            All the solutions, size: (noS,nbytes), dtype: uint8.
+        """
         return self.__Sol
 
     def get_total_cost(self):
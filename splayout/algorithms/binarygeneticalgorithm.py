@@ -6,6 +6,7 @@
 ##########################################################################
 import numpy as np
 import math
+from .binarysolutions import pack_solutions, unpack_solutions, packed_crossover, packed_mutation
 
 class BinaryGeneticAlgorithm:
     """
@@ -26,14 +27,18 @@ class BinaryGeneticAlgorithm:
         Probability of crossover (default: 0.8).
     p_mutation : Float
         Probability of mutation (default: 0.2).
+    surrogate : CostSurrogate
+        Surrogate trained on the evaluations, the children predicted to be clearly worse than their parent are not
+        simulated and take the predicted cost in the selection (default: None).
     """
-    def __init__(self, noS , loS, cost_function , max_iteration = 500,callback_function=None ,p_crossover = 0.9, p_mutation = 0.005):
+    def __init__(self, noS , loS, cost_function , max_iteration = 500,callback_function=None ,p_crossover = 0.9, p_mutation = 0.005, surrogate = None):
         self.max_iteration = max_iteration
+        self.surrogate = surrogate
         self.loS = loS
         self.p_crossover = p_crossover
         self.p_mutation = p_mutation
         self.cost_function = cost_function
-        self.__Sol = np.random.randint(0,2,size=(noS,loS)) # Initialize the solutions
+        self.__Sol = pack_solutions(np.random.randint(0,2,size=(noS,loS))) # Initialize the solutions (bit-packed)
         self.cg_curve = np.zeros((max_iteration))
         self.__cost = np.zeros(noS) ## the cost of the population, the lower , the better (1 - FoM)
         self.__engine_flag = 0
@@ -54,47 +59,43 @@ class BinaryGeneticAlgorithm:
         Initialize the Binary Genetic Algorithm, evaluate the first iteration.
         """
         for i in range(0, self.__Sol.shape[0]):
-            self.__cost[i] = self.cost_function(self.__Sol[i, :])
+            self.__cost[i] = self.cost_function(unpack_solutions(self.__Sol[i, :], self.loS))
+        if (type(self.surrogate) != type(None)):
+            self.surrogate.add(unpack_solutions(self.__Sol, self.loS), self.__cost)
         self.min_cost = np.min(self.__cost, axis=0)
         self.__min_position = np.argmin(self.__cost, axis=0)
-        self.best_solution = self.__Sol[self.__min_position, :].copy()
+        self.best_solution = unpack_solutions(self.__Sol[self.__min_position, :], self.loS)
 
         ## Initialize the iteration
         self.__iter = 0
         self.__engine_flag = 1
 
-    def rws(self):
+    def rws(self, number_of_pairs = None):
         '''
         reference: https://github.com/bigzhao/Binary-Genetic-Algorithm/
         '''
         temp_cost = - self.__cost - (-self.__cost).min()
-        sid = np.random.choice(np.arange(len(temp_cost)), size=2, replace=True,
+        size = 2 if number_of_pairs is None else (number_of_pairs, 2)
+        sid = np.random.choice(np.arange(len(temp_cost)), size=size, replace=True,
                p=temp_cost/temp_cost.sum())
         return sid
 
-    @staticmethod
-    def crossover(sol_0, sol_1):
-        assert (len(sol_0) == len(sol_1))
-        point = np.random.randint(len(sol_0))
-        new_sol_0 = np.hstack((sol_0[:point], sol_1[point:]))
-        new_sol_1 = np.hstack((sol_1[:point], sol_0[point:]))
-
-        return new_sol_0, new_sol_1
-
-    @staticmethod
-    def mutation(sol):
-        point = np.random.randint(len(sol))
-        sol[point] = 1 - sol[point]
-        return sol
-
-    def evaluate(self):
+    def evaluate(self, predicted_cost = None):
+        simulated = np.ones(self.__Sol.shape[0], dtype=bool)
         for i in range(0, self.__Sol.shape[0]):
-            self.__cost[i] = self.cost_function(self.__Sol[i, :])
-
-        if np.min(self.__cost, axis=0) <= self.min_cost:
-            self.min_cost = np.min(self.__cost, axis=0)
-            self.__min_position = np.argmin(self.__cost, axis=0)
-            self.best_solution = self.__Sol[self.__min_position, :].copy()
+            if (type(predicted_cost) != type(None)) and (not np.isnan(predicted_cost[i])):
+                self.__cost[i] = predicted_cost[i]
+                simulated[i] = False
+                continue
+            self.__cost[i] = self.cost_function(unpack_solutions(self.__Sol[i, :], self.loS))
+            if (type(self.surrogate) != type(None)):
+                self.surrogate.add(unpack_solutions(self.__Sol[i, :], self.loS), self.__cost[i])
+
+        ## only the simulated solutions can be the best one
+        if np.any(simulated) and np.min(self.__cost[simulated]) <= self.min_cost:
+            self.min_cost = np.min(self.__cost[simulated])
+            self.__min_position = np.arange(self.__Sol.shape[0])[simulated][np.argmin(self.__cost[simulated])]
+            self.best_solution = unpack_solutions(self.__Sol[self.__min_position, :], self.loS)
 
     def run(self):
         """
@@ -106,28 +107,40 @@ class BinaryGeneticAlgorithm:
             self.cg_curve[self.__iter] = self.min_cost
             self.__iter += 1
 
-            ## get a new iteration
-            temp_Sol = self.__Sol.copy()
-            self.__Sol = []
-
-            for i in range(0,int(temp_Sol.shape[0]/2)):
-                id_0, id_1 = self.rws()
-                sol_0, sol_1 = temp_Sol[id_0,:].copy(), temp_Sol[id_1,:].copy()
-                if np.random.rand() < self.p_crossover:
-                    sol_0, sol_1 = self.crossover(sol_0, sol_1)
-
-                if np.random.rand() < self.p_mutation:
-                    sol_0 = self.mutation(sol_0)
-                    sol_1 = self.mutation(sol_1)
-
-                self.__Sol.append(sol_0)
-                self.__Sol.append(sol_1)
-
-            self.__Sol = np.array(self.__Sol)
-            self.evaluate()
+            ## get a new iteration (selection, crossover and mutation for all the pairs at once)
+            number_of_pairs = int(self.__Sol.shape[0]/2)
+            sid = self.rws(number_of_pairs)
+            sol_0, sol_1 = self.__Sol[sid[:, 0], :], self.__Sol[sid[:, 1], :]
+
+            crossover_points = np.random.randint(self.loS, size=number_of_pairs)
+            crossover_points[np.random.rand(number_of_pairs) >= self.p_crossover] = self.loS
+            sol_0, sol_1 = packed_crossover(sol_0, sol_1, crossover_points, self.loS)
+
+            mutation_flags = np.random.rand(number_of_pairs) < self.p_mutation
+            mutation_number = np.sum(mutation_flags)
+            if (mutation_number > 0):
+                sol_0[mutation_flags] = packed_mutation(sol_0[mutation_flags], np.random.randint(self.loS, size=mutation_number))
+                sol_1[mutation_flags] = packed_mutation(sol_1[mutation_flags], np.random.randint(self.loS, size=mutation_number))
+
+            parent_cost = np.empty(2 * number_of_pairs)
+            parent_cost[0::2] = self.__cost[sid[:, 0]]
+            parent_cost[1::2] = self.__cost[sid[:, 1]]
+            self.__Sol = np.empty((2 * number_of_pairs, sol_0.shape[1]), dtype=np.uint8)
+            self.__Sol[0::2] = sol_0
+            self.__Sol[1::2] = sol_1
+            predicted_cost = None
+            if (type(self.surrogate) != type(None)):
+                ## the children predicted to be clearly worse than their parent keep the predicted cost (less likely
+                ## to be selected) instead of being simulated
+                children = unpack_solutions(self.__Sol, self.loS)
+                skipped = ~self.surrogate.screen(children, parent_cost)
+                predicted_cost = np.full(2 * number_of_pairs, np.nan)
+                if np.any(skipped):
+                    predicted_cost[skipped] = self.surrogate.predict(children[skipped, :])
+            self.evaluate(predicted_cost)
 
             worst_index = np.argsort(self.__cost)[-1]
-            self.__Sol[worst_index, :] = self.best_solution
+            self.__Sol[worst_index, :] = pack_solutions(self.best_solution)
             self.__cost[worst_index] = self.__min_position
 
             ## Call back function
@@ -173,6 +186,16 @@ class BinaryGeneticAlgorithm:
         out : Array
             All the solutions, size: (noS,loS).
         """
+        return unpack_solutions(self.__Sol, self.loS)
+
+    def get_packed_solutions(self):
+        """
+        Get the temporal total solutions in bit-packed form (see splayout.algorithms.binarysolutions).
+        Returns
+        -------
+        out : Array
+            All the solutions, size: (noS,nbytes), dtype: uint8.
+        """
         return self.__Sol
 
     def get_total_cost(self):
@@ -6,6 +6,7 @@
 ################################################################################################
 import numpy as np
 import math
+from .binarysolutions import pack_solutions, unpack_solutions
 
 class BinaryParticleSwarmAlgorithm:
     """
@@ -34,8 +35,18 @@ class BinaryParticleSwarmAlgorithm:
         Ratio for self-cognition (default: 0.2).
     ratio_global : Float
         Ratio for social-cognition (default: 0.8).
+    synchronous : Bool
+        Whether to update the whole swarm at once and evaluate the new generation together (default: False).
+    batch_cost_function : func
+        Cost function for evaluating all the solutions of a generation, input: Array, size (noS,loS), output: Array, size (noS,),
+        lower means better (default: None, cost_function is called for every solution). It is only used when synchronous is True
+        and in the first evaluation, and it can dispatch the simulations in parallel.
+    surrogate : CostSurrogate
+        Surrogate trained on the evaluations, the new positions predicted to be clearly worse than the personal best are
+        not simulated (default: None).
     """
-    def __init__(self, noS , loS, cost_function , max_iteration = 500,callback_function=None , v_max = 6, inertia_weight = 0.99, c_1 = 2, c_2 = 2, ratio_personal = 0.2, ratio_global = 0.8):
+    def __init__(self, noS , loS, cost_function , max_iteration = 500,callback_function=None , v_max = 6, inertia_weight = 0.99, c_1 = 2, c_2 = 2, ratio_personal = 0.2, ratio_global = 0.8,
+                 synchronous = False, batch_cost_function = None, surrogate = None):
         self.max_iteration = max_iteration
         self.noS = noS
         self.loS = loS
@@ -46,7 +57,10 @@ class BinaryParticleSwarmAlgorithm:
         self.ratio_personal = ratio_personal
         self.ratio_global = ratio_global
         self.cost_function = cost_function
-        self.__Sol = np.random.randint(0,2,size=(noS,loS)) # Initialize the solutions
+        self.synchronous = synchronous
+        self.batch_cost_function = batch_cost_function
+        self.surrogate = surrogate
+        self.__Sol = pack_solutions(np.random.randint(0,2,size=(noS,loS))) # Initialize the solutions (bit-packed)
         self.__Best_Sol = self.__Sol.copy()
         self.__v = np.zeros((noS,loS))
         self.cg_curve = np.zeros((max_iteration))
@@ -67,17 +81,52 @@ class BinaryParticleSwarmAlgorithm:
         """
         Initialize the Binary Particle Swarm Optimization, evaluate the first iteration.
         """
-        for i in range(0, self.__Sol.shape[0]):
-            self.__cost[i] = self.cost_function(self.__Sol[i, :])
+        self.__cost = self.__evaluate_all(unpack_solutions(self.__Sol, self.loS))
         self.min_cost = np.min(self.__cost, axis=0)
         __min_position = np.argmin(self.__cost, axis=0)
-        self.best_solution = self.__Sol[__min_position, :].copy()
+        self.best_solution = unpack_solutions(self.__Sol[__min_position, :], self.loS)
 
         ## Initialize the iteration
         self.__iter = 0
         self.__engine_flag = 1
 
 
+    def __evaluate_all(self, solutions):
+        if (type(self.batch_cost_function) != type(None)):
+            cost = np.asarray(self.batch_cost_function(solutions), dtype=np.double).reshape(-1)
+            if (len(cost) != solutions.shape[0]):
+                raise Exception("The batch_cost_function should return a cost for every solution!")
+        else:
+            cost = np.array([self.cost_function(solutions[i, :]) for i in range(0, solutions.shape[0])], dtype=np.double)
+        if (type(self.surrogate) != type(None)) and (solutions.shape[0] > 0):
+            self.surrogate.add(solutions, cost)
+        return cost
+
+    def __synchronous_update(self):
+        solutions = unpack_solutions(self.__Sol, self.loS)
+        self.__v = self.inertia_weight*self.__v + self.c_1*self.ratio_personal*(unpack_solutions(self.__Best_Sol, self.loS) - solutions) + \
+            self.c_2*self.ratio_global*(self.best_solution - solutions)
+        self.__v = np.clip(self.__v, -self.v_max, self.v_max)
+        mapped_v = 1/(1+(np.exp((-self.__v))))
+        solutions = (np.random.rand(self.noS, self.loS) <= mapped_v).astype(np.int64)
+        self.__Sol = pack_solutions(solutions)
+
+        ## Calculate the cost of the whole generation (the positions skipped by the surrogate are not simulated)
+        new_cost = np.full(self.noS, np.inf)
+        simulated = np.ones(self.noS, dtype=bool)
+        if (type(self.surrogate) != type(None)):
+            simulated = self.surrogate.screen(solutions, self.__cost)
+        if np.any(simulated):
+            new_cost[simulated] = self.__evaluate_all(solutions[simulated, :])
+        improved = new_cost <= self.__cost
+        self.__Best_Sol[improved, :] = self.__Sol[improved, :]
+        self.__cost[improved] = new_cost[improved]
+
+        min_position = np.argmin(new_cost)
+        if new_cost[min_position] <= self.min_cost:
+            self.best_solution = solutions[min_position, :].copy()
+            self.min_cost = new_cost[min_position]
+
     def run(self):
         """
         Run the engine.
@@ -88,24 +137,33 @@ class BinaryParticleSwarmAlgorithm:
             self.cg_curve[self.__iter] = self.min_cost
             self.__iter += 1
 
-            for i in range(0, self.noS):
-                self.__v[i,:] = self.inertia_weight*self.__v[i,:] + self.c_1*self.ratio_personal*(self.__Best_Sol[i,:] - self.__Sol[i,:]) + \
-                    self.c_2*self.ratio_global*(self.best_solution - self.__Sol[i,:])
-
-                self.__v[i,:] = np.clip(self.__v[i,:], -self.v_max, self.v_max)
-                mapped_v =  1/(1+(np.exp((-self.__v[i,:]))))
-
-                self.__Sol[i,:] = np.random.rand(self.loS) <= mapped_v
-
-                ## Calculate the cost
-                new_cost = self.cost_function(self.__Sol[i,:])
-                if (new_cost <= self.__cost[i]) :
-                    self.__Best_Sol[i, :] = self.__Sol[i,:].copy()
-                    self.__cost[i] = new_cost
-
-                if new_cost <= self.min_cost:
-                    self.best_solution = self.__Sol[i,:].copy()
-                    self.min_cost = new_cost
+            if (self.synchronous):
+                self.__synchronous_update()
+            else:
+                for i in range(0, self.noS):
+                    solution = unpack_solutions(self.__Sol[i,:], self.loS)
+                    self.__v[i,:] = self.inertia_weight*self.__v[i,:] + self.c_1*self.ratio_personal*(unpack_solutions(self.__Best_Sol[i,:], self.loS) - solution) + \
+                        self.c_2*self.ratio_global*(self.best_solution - solution)
+
+                    self.__v[i,:] = np.clip(self.__v[i,:], -self.v_max, self.v_max)
+                    mapped_v =  1/(1+(np.exp((-self.__v[i,:]))))
+
+                    solution = (np.random.rand(self.loS) <= mapped_v).astype(np.int64)
+                    self.__Sol[i,:] = pack_solutions(solution)
+
+                    ## Calculate the cost (the positions skipped by the surrogate are not simulated)
+                    if (type(self.surrogate) != type(None)) and (not self.surrogate.screen(solution, self.__cost[i])[0]):
+                        continue
+                    new_cost = self.cost_function(solution)
+                    if (type(self.surrogate) != type(None)):
+                        self.surrogate.add(solution, new_cost)
+                    if (new_cost <= self.__cost[i]) :
+                        self.__Best_Sol[i, :] = self.__Sol[i,:]
+                        self.__cost[i] = new_cost
+
+                    if new_cost <= self.min_cost:
+                        self.best_solution = solution.copy()
+                        self.min_cost = new_cost
 
             ## Call back function
             self.call_back()
@@ -150,6 +208,16 @@ class BinaryParticleSwarmAlgorithm:
         out : Array
             All the solutions, size: (noS,loS).
         """
+        return unpack_solutions(self.__Sol, self.loS)
+
+    def get_packed_solutions(self):
+        """
+        Get the temporal total solutions in bit-packed form (see splayout.algorithms.binarysolutions).
+        Returns
+        -------
+        out : Array
+            All the solutions, size: (noS,nbytes), dtype: uint8.
+        """
         return self.__Sol
 
     def get_total_cost(self):
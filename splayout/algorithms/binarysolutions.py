@@ -0,0 +1,132 @@
+import numpy as np
+
+def pack_solutions(solutions):
+    """
+    Pack binary solutions into bits, each row is padded to a multiple of 64 bits so that it can also be viewed as uint64 words.
+
+    Parameters
+    ----------
+    solutions : Array
+        Binary solutions, size: (loS,) or (noS,loS).
+
+    Returns
+    -------
+    out : Array
+        Packed solutions (dtype: uint8), size: (nbytes,) or (noS,nbytes).
+    """
+    solutions = np.asarray(solutions)
+    loS = solutions.shape[-1]
+    padding = (-loS) % 64
+    if padding:
+        pad_width = [(0, 0)] * (solutions.ndim - 1) + [(0, padding)]
+        solutions = np.pad(solutions, pad_width)
+    return np.packbits(solutions.astype(bool), axis=-1)
+
+def unpack_solutions(packed_solutions, loS, dtype=np.int64):
+    """
+    Unpack bit-packed solutions, e.g. for the inputs of cost functions.
+
+    Parameters
+    ----------
+    packed_solutions : Array
+        Packed solutions, size: (nbytes,) or (noS,nbytes).
+    loS : Int
+        Length of a single solution.
+    dtype : numpy.dtype
+        Data type of the unpacked solutions (default: np.int64).
+
+    Returns
+    -------
+    out : Array
+        Binary solutions, size: (loS,) or (noS,loS).
+    """
+    return np.unpackbits(packed_solutions, axis=-1, count=loS).astype(dtype)
+
+def prefix_masks(points, loS):
+    """
+    Packed masks whose first points[i] bits are 1.
+
+    Parameters
+    ----------
+    points : Array
+        Number of leading 1 bits for each mask, size: (n,).
+    loS : Int
+        Length of a single solution.
+
+    Returns
+    -------
+    out : Array
+        Packed masks, size: (n,nbytes).
+    """
+    points = np.asarray(points).reshape(-1, 1)
+    return pack_solutions(np.arange(loS).reshape(1, -1) < points)
+
+def packed_crossover(packed_solutions_0, packed_solutions_1, points, loS):
+    """
+    Vectorized single point crossover of bit-packed solutions.
+
+    Parameters
+    ----------
+    packed_solutions_0 : Array
+        Packed parents, size: (n,nbytes).
+    packed_solutions_1 : Array
+        Packed parents, size: (n,nbytes).
+    points : Array
+        Crossover points of the pairs, size: (n,). The bits before the point are kept and the others are exchanged.
+    loS : Int
+        Length of a single solution.
+
+    Returns
+    -------
+    out : Array, Array
+        Two packed children, size: (n,nbytes).
+    """
+    masks = prefix_masks(points, loS)
+    new_solutions_0 = (packed_solutions_0 & masks) | (packed_solutions_1 & ~masks)
+    new_solutions_1 = (packed_solutions_1 & masks) | (packed_solutions_0 & ~masks)
+    return new_solutions_0, new_solutions_1
+
+def packed_mutation(packed_solutions, points):
+    """
+    Vectorized single bit mutation of bit-packed solutions (in place).
+
+    Parameters
+    ----------
+    packed_solutions : Array
+        Packed solutions, size: (n,nbytes).
+    points : Array
+        Bit to flip for each solution, size: (n,).
+
+    Returns
+    -------
+    out : Array
+        Mutated solutions, size: (n,nbytes).
+    """
+    points = np.asarray(points)
+    rows = np.arange(len(points))
+    packed_solutions[rows, points // 8] ^= (np.uint8(0x80) >> (points % 8).astype(np.uint8))
+    return packed_solutions
+
+def hamming_distance(packed_solutions_0, packed_solutions_1):
+    """
+    Hamming distance between bit-packed solutions (broadcasting is supported, e.g. a[:, None] and b[None] for pairwise
+    distances).
+
+    Parameters
+    ----------
+    packed_solutions_0 : Array
+        Packed solutions, size: (..., nbytes).
+    packed_solutions_1 : Array
+        Packed solutions, size: (..., nbytes).
+
+    Returns
+    -------
+    out : Array
+        Number of different bits.
+    """
+    different_bits = np.bitwise_xor(packed_solutions_0, packed_solutions_1)
+    if different_bits.shape[-1] % 8 == 0:
+        different_bits = np.ascontiguousarray(different_bits).view(np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(different_bits).sum(axis=-1, dtype=np.int64)
+    return np.unpackbits(different_bits.view(np.uint8), axis=-1).sum(axis=-1, dtype=np.int64)
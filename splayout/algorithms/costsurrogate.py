@@ -0,0 +1,193 @@
+import numpy as np
+
+
+class CostSurrogate:
+    """
+    Online surrogate of a binary cost function (ridge regression), trained on every evaluation of an optimizer, to skip
+    the candidates (DBS flips, GA children, BPSO particles) that are predicted to be clearly worse than their reference
+    cost instead of simulating them.
+
+    Parameters
+    ----------
+    loS : Int
+        Length of a single solution.
+    shape : Tuple
+        Shape of the pixels, solution.reshape(shape) (default: None, a 1D chain). The products of the neighbouring
+        pixels are used as features of the "ridge" model.
+    model : String
+        "ridge" (pixel bits and neighbour pairs) or "random_features" (pixel bits and random Fourier features)
+        (default: "ridge").
+    number_of_features : Int
+        Number of random Fourier features of the "random_features" model (default: 256).
+    regularization : Float
+        Ridge regularization (default: 1e-2).
+    exploration_rate : Float
+        Probability of evaluating a candidate that is predicted to be worse (default: 0.1).
+    confidence : Float
+        A candidate is clearly worse when its predicted cost is larger than the reference cost plus confidence times the
+        RMS prediction error (default: 1).
+    min_samples : Int
+        Number of evaluations before any candidate is skipped (default: 20).
+    """
+    def __init__(self, loS, shape = None, model = "ridge", number_of_features = 256, regularization = 1e-2,
+                 exploration_rate = 0.1, confidence = 1, min_samples = 20):
+        if (model != "ridge") and (model != "random_features"):
+            raise Exception("The model of the surrogate should be \"ridge\" or \"random_features\".")
+        self.loS = loS
+        self.model = model
+        self.regularization = regularization
+        self.exploration_rate = exploration_rate
+        self.confidence = confidence
+        self.min_samples = min_samples
+        if (model == "ridge"):
+            index = np.arange(loS).reshape(shape if type(shape) != type(None) else (loS,))
+            if (index.ndim == 1):
+                self.__pairs = np.stack([index[:-1], index[1:]], axis=1)
+            else:
+                self.__pairs = np.concatenate([np.stack([index[:, :-1].flatten(), index[:, 1:].flatten()], axis=1),
+                                               np.stack([index[:-1, :].flatten(), index[1:, :].flatten()], axis=1)])
+            self.__dimension = loS + self.__pairs.shape[0]
+        else:
+            ## kernel exp(-2 H / loS) of the Hamming distance H between the solutions in +1/-1 form
+            self.__frequencies = np.random.normal(0, 1 / np.sqrt(loS), size=(loS, number_of_features))
+            self.__phases = np.random.uniform(0, 2 * np.pi, size=number_of_features)
+            self.__dimension = loS + number_of_features
+        self.__gram = np.zeros((self.__dimension, self.__dimension))
+        self.__feature_sum = np.zeros(self.__dimension)
+        self.__projection = np.zeros(self.__dimension)
+        self.__cost_sum = 0.0
+        self.__samples = 0
+        self.__weights = None
+        self.__squared_error = 0.0
+        self.__checked = 0
+        self.__evaluations = 0
+        self.__skipped = 0
+        self.__explored = 0
+
+    def features(self, solutions):
+        """
+        Features of solutions.
+
+        Parameters
+        ----------
+        solutions : Array
+            Solutions, size: (loS,) or (number of solutions, loS).
+
+        Returns
+        -------
+        out : Array
+            Features, size: (number of solutions, number of features).
+        """
+        solutions = np.asarray(solutions, dtype=np.float64).reshape(-1, self.loS)
+        if (self.model == "ridge"):
+            pairs = solutions[:, self.__pairs[:, 0]] * solutions[:, self.__pairs[:, 1]]
+        else:
+            pairs = np.sqrt(2 / self.__phases.size) * np.cos((2 * solutions - 1) @ self.__frequencies + self.__phases)
+        return np.concatenate([solutions, pairs], axis=1)
+
+    def add(self, solutions, cost):
+        """
+        Add evaluated solutions to the training data.
+
+        Parameters
+        ----------
+        solutions : Array
+            Solutions, size: (loS,) or (number of solutions, loS).
+        cost : Float or Array
+            Cost of the solutions.
+        """
+        features = self.features(solutions)
+        cost = np.asarray(cost, dtype=np.float64).reshape(-1)
+        if (self.__samples >= self.min_samples):
+            ## out-of-sample error, before the solutions are learned
+            self.__squared_error += np.sum((self.predict(solutions) - cost) ** 2)
+            self.__checked += cost.size
+        self.__gram += features.T @ features
+        self.__feature_sum += np.sum(features, axis=0)
+        self.__projection += features.T @ cost
+        self.__cost_sum += np.sum(cost)
+        self.__samples += cost.size
+        self.__evaluations += cost.size
+        self.__weights = None
+
+    def __fit(self):
+        ## ridge regression with an unregularized intercept (centered normal equations)
+        feature_mean = self.__feature_sum / self.__samples
+        cost_mean = self.__cost_sum / self.__samples
+        gram = self.__gram - self.__samples * np.outer(feature_mean, feature_mean)
+        projection = self.__projection - self.__samples * feature_mean * cost_mean
+        gram[np.diag_indices_from(gram)] += self.regularization * max(self.__samples, 1)
+        weights = np.linalg.solve(gram, projection)
+        self.__weights = (weights, cost_mean - feature_mean @ weights)
+
+    def predict(self, solutions):
+        """
+        Predict the cost of solutions.
+
+        Parameters
+        ----------
+        solutions : Array
+            Solutions, size: (loS,) or (number of solutions, loS).
+
+        Returns
+        -------
+        out : Array
+            Predicted cost, size: (number of solutions,).
+        """
+        if (self.__samples == 0):
+            raise Exception("The surrogate has no training data, use add first.")
+        if (type(self.__weights) == type(None)):
+            self.__fit()
+        weights, intercept = self.__weights
+        return self.features(solutions) @ weights + intercept
+
+    def get_prediction_error(self):
+        """
+        Get the RMS error of the predictions of the solutions before they were learned.
+
+        Returns
+        -------
+        out : Float
+            RMS prediction error (inf before min_samples evaluations).
+        """
+        if (self.__checked == 0):
+            return np.inf
+        return np.sqrt(self.__squared_error / self.__checked)
+
+    def screen(self, solutions, reference_cost):
+        """
+        Decide which candidates are simulated: the candidates predicted to be clearly worse than their reference cost are
+        skipped, except with the probability exploration_rate.
+
+        Parameters
+        ----------
+        solutions : Array
+            Candidates, size: (loS,) or (number of solutions, loS).
+        reference_cost : Float or Array
+            Reference cost of the candidates (e.g. the current cost of DBS, the cost of the parent).
+
+        Returns
+        -------
+        out : Array
+            Whether each candidate should be simulated, size: (number of solutions,), dtype: bool.
+        """
+        solutions = np.asarray(solutions).reshape(-1, self.loS)
+        if (self.__samples < self.min_samples) or (self.__checked == 0):
+            return np.ones(solutions.shape[0], dtype=bool)
+        worse = self.predict(solutions) > np.asarray(reference_cost) + self.confidence * self.get_prediction_error()
+        explored = worse & (np.random.rand(solutions.shape[0]) < self.exploration_rate)
+        self.__explored += int(np.sum(explored))
+        self.__skipped += int(np.sum(worse & ~explored))
+        return ~worse | explored
+
+    def get_statistics(self):
+        """
+        Get the number of simulated candidates, skipped candidates (simulations saved) and explored candidates (predicted
+        to be worse but simulated).
+
+        Returns
+        -------
+        out : Int, Int, Int
+            Evaluations, skipped, explored.
+        """
+        return self.__evaluations, self.__skipped, self.__explored
@@ -21,11 +21,31 @@ class DirectBinarySearchAlgorithm:
         Self-defined callback function that will be called after every solution evaluated (default: None).
     initial_solution : Array
         Initialize the solution, size: (noS,) (default: None, means random).
+    surrogate : CostSurrogate
+        Surrogate trained on the evaluations, the flips predicted to be clearly worse are skipped without simulation
+        (default: None).
+    sensitivity_function : func
+        Predicted cost change of flipping each position (e.g. PixelsRegionSensitivity), input: Array, size (loS,),
+        output: Array, size (loS,), negative means better. The positions of a sweep are visited from the best predicted
+        change instead of in random order (default: None).
+    sensitivity_period : Int
+        Number of sweeps between two calls of sensitivity_function, the prediction of a flipped position changes its
+        sign in between (default: 1).
+    gain_threshold : Float
+        A sweep stops once the predicted gain (minus the predicted cost change) of the next position is below the
+        threshold (default: None, every position is visited).
     """
-    def __init__(self,loS,cost_function,max_iteration = 4,callback_function = None,initial_solution = None):
+    def __init__(self,loS,cost_function,max_iteration = 4,callback_function = None,initial_solution = None,surrogate = None,
+                 sensitivity_function = None, sensitivity_period = 1, gain_threshold = None):
         self.loS = loS
         self.cost_function = cost_function
         self.max_iteration = max_iteration
+        self.surrogate = surrogate
+        self.sensitivity_function = sensitivity_function
+        self.sensitivity_period = max(int(sensitivity_period), 1)
+        self.gain_threshold = gain_threshold
+        self.predicted_change = None
+        self.__sensitivity_solution = None
 
         if (type(initial_solution) != type(None)):
             self.__Sol = initial_solution
@@ -49,6 +69,8 @@ class DirectBinarySearchAlgorithm:
 
     def __engine_init(self):
         self.cost = self.cost_function(self.__Sol)
+        if (type(self.surrogate) != type(None)):
+            self.surrogate.add(self.__Sol, self.cost)
         self.best_solution = self.__Sol.copy()
         self.__iter = 0
 
@@ -58,14 +80,30 @@ class DirectBinarySearchAlgorithm:
         """
         while (self.__iter < self.max_iteration):
             self.__undisturbed = np.array(range(0, self.loS))
+            if (type(self.sensitivity_function) != type(None)):
+                predicted_change = self.__get_predicted_change()
+                self.__undisturbed = np.argsort(predicted_change, kind="stable")
             for i in range(0,self.loS):
                 temp_solution = self.__Sol.copy()
-                perturbate_shuffle = np.random.randint(0,self.__undisturbed.size)
+                if (type(self.sensitivity_function) != type(None)):
+                    ## the queue is ordered by the predicted change
+                    perturbate_shuffle = 0
+                    if (type(self.gain_threshold) != type(None)) and \
+                            (-predicted_change[self.__undisturbed[0]] < self.gain_threshold):
+                        self.cg_curve[self.__iter * self.loS + i:(self.__iter + 1) * self.loS] = self.cost
+                        break
+                else:
+                    perturbate_shuffle = np.random.randint(0,self.__undisturbed.size)
                 perturbate_position = self.__undisturbed[perturbate_shuffle]
                 if (i != self.loS -1):
                     self.__undisturbed = np.delete(self.__undisturbed,perturbate_shuffle)
                 temp_solution[perturbate_position] = (temp_solution[perturbate_position] + 1)%2
+                if (type(self.surrogate) != type(None)) and (not self.surrogate.screen(temp_solution, self.cost)[0]):
+                    self.cg_curve[self.__iter * self.loS + i] = self.cost
+                    continue
                 new_cost = self.cost_function(temp_solution)
+                if (type(self.surrogate) != type(None)):
+                    self.surrogate.add(temp_solution, new_cost)
                 if (new_cost <= self.cost):
                     self.__Sol = temp_solution
                     self.cost = new_cost
@@ -75,6 +113,17 @@ class DirectBinarySearchAlgorithm:
                 self.call_back()
             self.__iter += 1
 
+    def __get_predicted_change(self):
+        if (self.__iter % self.sensitivity_period == 0) or (type(self.__sensitivity_solution) == type(None)):
+            self.predicted_change = np.asarray(self.sensitivity_function(self.__Sol.copy()), dtype=np.double).flatten()
+            self.__sensitivity_solution = self.__Sol.copy()
+            if (self.predicted_change.size != self.loS):
+                raise Exception("The sensitivity_function should return a predicted change for every position!")
+            return self.predicted_change
+        ## the flips accepted since the sensitivity was calculated reverse their prediction
+        flipped = np.asarray(self.__Sol).flatten() != np.asarray(self.__sensitivity_solution).flatten()
+        return np.where(flipped, -self.predicted_change, self.predicted_change)
+
     def get_remained_size(self):
         """
         Get the size of undisturbed positions.
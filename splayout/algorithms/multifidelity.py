@@ -0,0 +1,150 @@
+import numpy as np
+import math
+
+
+class MultiFidelityCostFunction:
+    """
+    Multi-fidelity cost function for the binary optimizers: every candidate is first evaluated by a cheap low fidelity
+    cost function (e.g. a 2.5D varFDTD session of MODESimulation), and only the candidates whose calibrated cost is
+    within a tolerance of the incumbent (the best high fidelity cost) are promoted to the high fidelity cost function
+    (e.g. a 3D FDTDSimulation). The calibration between the fidelities is learned online from the promoted candidates.
+    The cost of a candidate that is not promoted is its calibrated low fidelity cost, which is always worse than the
+    incumbent, so the best solution of an optimizer is always verified in high fidelity.
+
+    Parameters
+    ----------
+    low_fidelity_function : func
+        Low fidelity cost function, input: Array, size (loS,), output: Float, lower means better.
+    high_fidelity_function : func
+        High fidelity cost function, input: Array, size (loS,), output: Float, lower means better.
+    tolerance : Float
+        A candidate is promoted when its calibrated cost is lower than the incumbent plus the tolerance plus confidence
+        times the RMS calibration error (default: 0.02).
+    calibration : String
+        "offset" (high = low + offset) or "linear" (high = slope * low + offset) (default: "offset").
+    memory : Int
+        Number of the latest promoted candidates used for the calibration, the offset drifts while the design evolves
+        (default: 20).
+    confidence : Float
+        Weight of the RMS calibration error in the promotion (default: 1).
+    """
+    def __init__(self, low_fidelity_function, high_fidelity_function, tolerance = 0.02, calibration = "offset",
+                 memory = 20, confidence = 1):
+        if (calibration != "offset") and (calibration != "linear"):
+            raise Exception("The calibration should be \"offset\" or \"linear\".")
+        if (tolerance < 0):
+            raise Exception("The tolerance should not be negative.")
+        self.low_fidelity_function = low_fidelity_function
+        self.high_fidelity_function = high_fidelity_function
+        self.tolerance = tolerance
+        self.calibration = calibration
+        self.memory = max(int(memory), 1)
+        self.confidence = confidence
+        self.incumbent = math.inf
+        self.__low_costs = []
+        self.__high_costs = []
+        self.__coefficients = None
+        self.__squared_error = 0.0
+        self.__checked = 0
+        self.__low_evaluations = 0
+        self.__high_evaluations = 0
+
+    def __fit(self):
+        low_costs = np.array(self.__low_costs[-self.memory:])
+        high_costs = np.array(self.__high_costs[-self.memory:])
+        if (self.calibration == "linear") and (low_costs.size >= 3) and (np.ptp(low_costs) > 0):
+            slope, offset = np.polyfit(low_costs, high_costs, 1)
+        else:
+            slope, offset = 1.0, np.mean(high_costs - low_costs)
+        self.__coefficients = (slope, offset)
+
+    def calibrate(self, low_fidelity_cost):
+        """
+        Estimate the high fidelity cost from the low fidelity cost.
+
+        Parameters
+        ----------
+        low_fidelity_cost : Float or Array
+            Low fidelity cost.
+
+        Returns
+        -------
+        out : Float or Array
+            Calibrated cost (the low fidelity cost before any candidate is promoted).
+        """
+        if (len(self.__low_costs) == 0):
+            return low_fidelity_cost
+        if (type(self.__coefficients) == type(None)):
+            self.__fit()
+        slope, offset = self.__coefficients
+        return slope * np.asarray(low_fidelity_cost) + offset
+
+    def get_calibration_error(self):
+        """
+        Get the RMS error of the calibrated costs of the promoted candidates before they were learned.
+
+        Returns
+        -------
+        out : Float
+            RMS calibration error (inf before two candidates are promoted).
+        """
+        if (self.__checked == 0):
+            return np.inf
+        return np.sqrt(self.__squared_error / self.__checked)
+
+    def evaluate(self, solution):
+        """
+        Evaluate a solution, in high fidelity only if it is promoted.
+
+        Parameters
+        ----------
+        solution : Array
+            Solution, size: (loS,).
+
+        Returns
+        -------
+        out : Float
+            High fidelity cost if promoted, otherwise the calibrated low fidelity cost.
+        """
+        low_fidelity_cost = self.low_fidelity_function(solution)
+        self.__low_evaluations += 1
+        predicted_cost = self.calibrate(low_fidelity_cost)
+        if (predicted_cost > self.incumbent + self.tolerance + self.confidence * self.get_calibration_error()):
+            return predicted_cost
+
+        high_fidelity_cost = self.high_fidelity_function(solution)
+        self.__high_evaluations += 1
+        if (len(self.__low_costs) > 0):
+            ## out-of-sample error, before the candidate is learned
+            self.__squared_error += (predicted_cost - high_fidelity_cost) ** 2
+            self.__checked += 1
+        self.__low_costs.append(low_fidelity_cost)
+        self.__high_costs.append(high_fidelity_cost)
+        self.__coefficients = None
+        self.incumbent = min(self.incumbent, high_fidelity_cost)
+        return high_fidelity_cost
+
+    def __call__(self, solution):
+        return self.evaluate(solution)
+
+    def get_pairs(self):
+        """
+        Get the low and high fidelity costs of the promoted candidates.
+
+        Returns
+        -------
+        out : Array, Array
+            Low fidelity costs, high fidelity costs, size: (number of promoted candidates,).
+        """
+        return np.array(self.__low_costs), np.array(self.__high_costs)
+
+    def get_statistics(self):
+        """
+        Get the number of low fidelity evaluations and high fidelity evaluations (promoted candidates).
+
+        Returns
+        -------
+        out : Int, Int
+            Low fidelity evaluations, high fidelity evaluations.
+        """
+        return self.__low_evaluations, self.__high_evaluations
@@ -34,9 +34,17 @@ class ParticleSwarmAlgorithm:
         Ratio for self-cognition (default: 0.2).
     ratio_global : Float
         Ratio for social-cognition (default: 0.8).
+    ratio_random : Bool
+        Whether the ratios for self-cognition and social-cognition are random for every update (default: True).
+    synchronous : Bool
+        Whether to update the whole swarm at once and evaluate the new generation together (default: False).
+    batch_cost_function : func
+        Cost function for evaluating all the solutions of a generation, input: Array, size (noS,loS), output: Array, size (noS,),
+        lower means better (default: None, cost_function is called for every solution). It is only used when synchronous is True
+        and in the first evaluation, and it can dispatch the simulations in parallel.
     """
     def __init__(self, param_constrains , noS, cost_function,  max_iteration = 50,callback_function=None , v_max = 0.5, inertia_weight = 1.0, c_1 = 2, c_2 = 2,
-                 ratio_personal = 0.2, ratio_global = 0.8, ratio_random = True):
+                 ratio_personal = 0.2, ratio_global = 0.8, ratio_random = True, synchronous = False, batch_cost_function = None):
         self.param_constrains = param_constrains
         try:
             self.loS = len(self.param_constrains)
@@ -57,6 +65,10 @@ class ParticleSwarmAlgorithm:
         self.ratio_personal = ratio_personal
         self.ratio_global = ratio_global
         self.ratio_random = ratio_random
+        self.synchronous = synchronous
+        self.batch_cost_function = batch_cost_function
+        self.__lower_bounds = np.array([citem[0] for citem in self.param_constrains], dtype=np.double)
+        self.__upper_bounds = np.array([citem[1] for citem in self.param_constrains], dtype=np.double)
         self.__Sol = np.random.uniform(0,1,size=(self.noS,self.loS)) # Initialize the solutions
         self.__Best_Sol = self.__Sol.copy()
         self.__v = np.zeros((self.noS,self.loS))
@@ -75,17 +87,23 @@ class ParticleSwarmAlgorithm:
             self.call_back = callback_function
 
     def __solutions_to_params(self, solution):
-        params = np.copy(solution)
-        for i, citem in enumerate(self.param_constrains):
-            params[i] = params[i]*(citem[1] - citem[0]) + citem[0]
-        return params
+        return solution*(self.__upper_bounds - self.__lower_bounds) + self.__lower_bounds
+
+    def __evaluate_all(self, solutions):
+        params = self.__solutions_to_params(solutions)
+        if (type(self.batch_cost_function) != type(None)):
+            cost = np.asarray(self.batch_cost_function(params), dtype=np.double).reshape(-1)
+            if (len(cost) != solutions.shape[0]):
+                raise Exception("The batch_cost_function should return a cost for every solution!")
+        else:
+            cost = np.array([self.cost_function(params[i, :]) for i in range(0, solutions.shape[0])], dtype=np.double)
+        return cost
 
     def engine_init(self):
         """
         Initialize the Binary Particle Swarm Optimization, evaluate the first iteration.
         """
-        for i in range(0, self.__Sol.shape[0]):
-            self.__cost[i] = self.cost_function(self.__solutions_to_params(self.__Sol[i, :]))
+        self.__cost = self.__evaluate_all(self.__Sol)
         self.min_cost = np.min(self.__cost, axis=0)
         __min_position = np.argmin(self.__cost, axis=0)
         self.best_solution = self.__Sol[__min_position, :].copy()
@@ -105,36 +123,62 @@ class ParticleSwarmAlgorithm:
             self.cg_curve[self.__iter] = self.min_cost
             self.__iter += 1
 
-            for i in range(0, self.noS):
-                if (self.ratio_random):
-                    self.__v[i, :] = self.inertia_weight * self.__v[i, :] + self.c_1 * np.random.random() * (
-                                self.__Best_Sol[i, :] - self.__Sol[i, :]) + \
-                                     self.c_2 * np.random.random() * (self.best_solution - self.__Sol[i, :])
-                else:
-                    self.__v[i, :] = self.inertia_weight * self.__v[i, :] + self.c_1 * self.ratio_personal * (
-                                self.__Best_Sol[i, :] - self.__Sol[i, :]) + \
-                                     self.c_2 * self.ratio_global * (self.best_solution - self.__Sol[i, :])
-
-                self.__v[i,:] = np.clip(self.__v[i,:], -self.v_max, self.v_max)
-
-                self.__Sol[i,:] = self.__Sol[i,:] + self.__v[i,:]
-                self.__Sol[i, :] = np.clip(self.__Sol[i,:], 0, 1)
-
-                ## Calculate the cost
-                new_cost = self.cost_function(self.__solutions_to_params(self.__Sol[i,:]))
-                if (new_cost <= self.__cost[i]) :
-                    self.__Best_Sol[i, :] = self.__Sol[i,:].copy()
-                    self.__cost[i] = new_cost
-
-                if new_cost <= self.min_cost:
-                    self.best_solution = self.__Sol[i,:].copy()
-                    self.min_cost = new_cost
+            if (self.synchronous):
+                self.__synchronous_update()
+            else:
+                for i in range(0, self.noS):
+                    if (self.ratio_random):
+                        self.__v[i, :] = self.inertia_weight * self.__v[i, :] + self.c_1 * np.random.random() * (
+                                    self.__Best_Sol[i, :] - self.__Sol[i, :]) + \
+                                         self.c_2 * np.random.random() * (self.best_solution - self.__Sol[i, :])
+                    else:
+                        self.__v[i, :] = self.inertia_weight * self.__v[i, :] + self.c_1 * self.ratio_personal * (
+                                    self.__Best_Sol[i, :] - self.__Sol[i, :]) + \
+                                         self.c_2 * self.ratio_global * (self.best_solution - self.__Sol[i, :])
+
+                    self.__v[i,:] = np.clip(self.__v[i,:], -self.v_max, self.v_max)
+
+                    self.__Sol[i,:] = self.__Sol[i,:] + self.__v[i,:]
+                    self.__Sol[i, :] = np.clip(self.__Sol[i,:], 0, 1)
+
+                    ## Calculate the cost
+                    new_cost = self.cost_function(self.__solutions_to_params(self.__Sol[i,:]))
+                    if (new_cost <= self.__cost[i]) :
+                        self.__Best_Sol[i, :] = self.__Sol[i,:].copy()
+                        self.__cost[i] = new_cost
+
+                    if new_cost <= self.min_cost:
+                        self.best_solution = self.__Sol[i,:].copy()
+                        self.min_cost = new_cost
 
             ## Call back function
             self.call_back()
 
         self.__engine_flag = 0
 
+    def __synchronous_update(self):
+        if (self.ratio_random):
+            ratio_personal = np.random.random((self.noS, 1))
+            ratio_global = np.random.random((self.noS, 1))
+        else:
+            ratio_personal = self.ratio_personal
+            ratio_global = self.ratio_global
+        self.__v = self.inertia_weight * self.__v + self.c_1 * ratio_personal * (self.__Best_Sol - self.__Sol) + \
+                   self.c_2 * ratio_global * (self.best_solution - self.__Sol)
+        self.__v = np.clip(self.__v, -self.v_max, self.v_max)
+        self.__Sol = np.clip(self.__Sol + self.__v, 0, 1)
+
+        ## Calculate the cost of the whole generation
+        new_cost = self.__evaluate_all(self.__Sol)
+        improved = new_cost <= self.__cost
+        self.__Best_Sol[improved, :] = self.__Sol[improved, :]
+        self.__cost[improved] = new_cost[improved]
+
+        min_position = np.argmin(new_cost)
+        if new_cost[min_position] <= self.min_cost:
+            self.best_solution = self.__Sol[min_position, :].copy()
+            self.min_cost = new_cost[min_position]
+
     def get_iteration_number(self):
         """
         Get the temporal iteration number.
@@ -0,0 +1,4 @@
+from .compactmodels import CompactModel, WaveguideModel, DirectionalCouplerModel, AddDropRingModel, SMatrixModel, \
+    effective_index, model_from_component
+from .circuit import Circuit
+from .modeltable import CompactModelTable
@@ -0,0 +1,243 @@
+from .compactmodels import CompactModel
+from collections import OrderedDict
+import numpy as np
+
+
+class Circuit(CompactModel):
+    """
+    Netlist of compact models solved with batched S-matrix algebra over the wavelengths and the parameter sets. A
+    circuit is a compact model itself (its ports are the external ports), so circuits can be nested.
+
+    Parameters
+    ----------
+    max_elements : Int
+        Maximum number of values (parameter sets × frequency points) evaluated at once, the parameter sets are split
+        into chunks accordingly (default: 2**16).
+
+    Examples
+    --------
+    >>> circuit = Circuit()
+    >>> circuit.add_instance("ring", AddDropRingModel(5, input_coupling=np.linspace(0.01, 0.1, 1000)))
+    >>> circuit.add_instance("wg", WaveguideModel(100))
+    >>> circuit.connect("ring", "through", "wg", "input")
+    >>> circuit.add_port("in", "ring", "input")
+    >>> circuit.add_port("out", "wg", "output")
+    >>> T = circuit.get_transmission(np.linspace(1.5, 1.6, 1001), "out", "in")  # size: (1000, 1001)
+    """
+    def __init__(self, max_elements = 2 ** 16):
+        CompactModel.__init__(self, [], {})
+        self.max_elements = int(max_elements)
+        self.__instances = OrderedDict()
+        self.__connections = {}
+        self.__external_ports = OrderedDict()
+
+    def add_instance(self, name, model):
+        """
+        Add an instance of a compact model.
+
+        Parameters
+        ----------
+        name : String
+            Name of the instance.
+        model : CompactModel
+            Compact model of the instance.
+        """
+        if name in self.__instances:
+            raise Exception("The instance " + name + " already exists.")
+        self.__instances[name] = model
+
+    def get_instance(self, name):
+        """
+        Get the compact model of an instance (e.g. to change its parameters).
+
+        Parameters
+        ----------
+        name : String
+            Name of the instance.
+
+        Returns
+        -------
+        out : CompactModel
+            Compact model of the instance.
+        """
+        return self.__instances[name]
+
+    def __check_port(self, instance, port):
+        if instance not in self.__instances:
+            raise Exception("No instance named " + instance + ".")
+        if port not in self.__instances[instance].ports:
+            raise Exception("The instance " + instance + " has no port named " + port + ".")
+        if ((instance, port) in self.__connections) or ((instance, port) in self.__external_ports.values()):
+            raise Exception("The port " + port + " of " + instance + " is already used.")
+
+    def connect(self, instance_a, port_a, instance_b, port_b):
+        """
+        Connect two ports.
+
+        Parameters
+        ----------
+        instance_a : String
+            Name of the first instance.
+        port_a : String
+            Port of the first instance.
+        instance_b : String
+            Name of the second instance.
+        port_b : String
+            Port of the second instance.
+        """
+        self.__check_port(instance_a, port_a)
+        self.__check_port(instance_b, port_b)
+        if (instance_a, port_a) == (instance_b, port_b):
+            raise Exception("A port can not be connected to itself.")
+        self.__connections[(instance_a, port_a)] = (instance_b, port_b)
+        self.__connections[(instance_b, port_b)] = (instance_a, port_a)
+
+    def add_port(self, name, instance, port):
+        """
+        Expose a port of an instance as an external port of the circuit.
+
+        Parameters
+        ----------
+        name : String
+            Name of the external port.
+        instance : String
+            Name of the instance.
+        port : String
+            Port of the instance.
+        """
+        if name in self.__external_ports:
+            raise Exception("The external port " + name + " already exists.")
+        self.__check_port(instance, port)
+        self.__external_ports[name] = (instance, port)
+        self.ports = list(self.__external_ports.keys())
+
+    def get_number_of_sets(self):
+        sizes = set([model.get_number_of_sets() for model in self.__instances.values()])
+        sizes.discard(1)
+        if (len(sizes) > 1):
+            raise Exception("The parameter arrays of the instances should have the same length.")
+        return sizes.pop() if len(sizes) else 1
+
+    def s_matrix(self, wavelengths, indices = None):
+        """
+        S-matrix between the external ports, S[..., i, j] is the transmission from port j to port i.
+
+        Parameters
+        ----------
+        wavelengths : Array
+            Wavelengths (unit: μm), size: (frequency points,).
+        indices : Array
+            Indices of the parameter sets (default: None, all the parameter sets).
+
+        Returns
+        -------
+        out : Array
+            S-matrix, size: (parameter sets, frequency points, external ports, external ports).
+        """
+        return self.__evaluate(wavelengths, indices, self.ports, self.ports)
+
+    def __evaluate(self, wavelengths, indices, output_ports, input_ports):
+        if (len(self.__external_ports) == 0):
+            raise Exception("The circuit has no external port, use add_port first.")
+        for port in list(output_ports) + list(input_ports):
+            if port not in self.__external_ports:
+                raise Exception("No external port named " + port + ".")
+        wavelengths = np.asarray(wavelengths, dtype=np.float64).flatten()
+        number_of_sets = self.get_number_of_sets() if type(indices) == type(None) else np.size(indices)
+        set_indices = np.arange(number_of_sets) if type(indices) == type(None) else np.asarray(indices).flatten()
+        chunk = max(self.max_elements // max(wavelengths.size, 1), 1)
+        result = np.zeros((number_of_sets, wavelengths.size, len(output_ports), len(input_ports)), dtype=np.complex128)
+        for start in range(0, number_of_sets, chunk):
+            result[start:start + chunk] = self.__solve(wavelengths, set_indices[start:start + chunk],
+                                                       [self.__external_ports[port] for port in output_ports],
+                                                       [self.__external_ports[port] for port in input_ports])
+        return result
+
+    def __solve(self, wavelengths, indices, output_ports, input_ports):
+        """
+        Sub-network growth: the instances are merged connection by connection, each connection eliminates its two
+        ports in closed form. A sub-network only stores its non-zero S-parameters as {(output, input): array}, the
+        arrays broadcast over (parameter sets, frequency points), so every step is elementwise.
+        """
+        ## an entry whose output (input) port is neither requested nor connected never contributes to the result
+        rows = set(output_ports) | set(self.__connections)
+        columns = set(input_ports) | set(self.__connections)
+        group_of = {}
+        for name, model in self.__instances.items():
+            model_indices = indices if model.get_number_of_sets() > 1 else None
+            s = model.s_matrix(wavelengths, model_indices)
+            group = {}
+            for i, port_i in enumerate(model.ports):
+                for j, port_j in enumerate(model.ports):
+                    if ((name, port_i) in rows) and ((name, port_j) in columns) and s[..., i, j].any():
+                        group[((name, port_i), (name, port_j))] = np.ascontiguousarray(s[..., i, j])
+            group_of[name] = group
+        done = set()
+        for port_a, port_b in self.__connections.items():
+            if (port_b, port_a) in done:
+                continue
+            done.add((port_a, port_b))
+            group = group_of[port_a[0]]
+            group_b = group_of[port_b[0]]
+            if not (group is group_b):
+                group.update(group_b)
+                for instance in group_of:
+                    if (group_of[instance] is group_b):
+                        group_of[instance] = group
+            self.__eliminate(group, port_a, port_b)
+        ## the remaining sub-networks are independent of each other
+        s_external = np.zeros((indices.size, wavelengths.size, len(output_ports), len(input_ports)), dtype=np.complex128)
+        for i, port_i in enumerate(output_ports):
+            for j, port_j in enumerate(input_ports):
+                if (port_i, port_j) in group_of[port_i[0]]:
+                    s_external[..., i, j] = group_of[port_i[0]][(port_i, port_j)]
+        return s_external
+
+    @staticmethod
+    def __eliminate(group, k, l):
+        ## incoming waves of the connected ports (a_k = b_l, a_l = b_k) for a unit wave at the other ports
+        s_kk = group.get((k, k), 0)
+        s_ll = group.get((l, l), 0)
+        s_kl = group.get((k, l), 0)
+        s_lk = group.get((l, k), 0)
+        denominator = (1 - s_kl) * (1 - s_lk) - s_kk * s_ll
+        columns = set([j for (i, j) in group if (i == k or i == l) and j != k and j != l])
+        rows_k = [i for (i, j) in group if j == k and i != k and i != l]
+        rows_l = [i for (i, j) in group if j == l and i != k and i != l]
+        incoming_k = {}
+        incoming_l = {}
+        for j in columns:
+            s_kj = group.get((k, j), 0)
+            s_lj = group.get((l, j), 0)
+            incoming_k[j] = (s_ll * s_kj + (1 - s_kl) * s_lj) / denominator
+            incoming_l[j] = ((1 - s_lk) * s_kj + s_kk * s_lj) / denominator
+        update = {}
+        for j in columns:
+            for i in rows_k:
+                update[(i, j)] = update.get((i, j), group.get((i, j), 0)) + group[(i, k)] * incoming_k[j]
+            for i in rows_l:
+                update[(i, j)] = update.get((i, j), group.get((i, j), 0)) + group[(i, l)] * incoming_l[j]
+        for key in [key for key in group if key[0] in (k, l) or key[1] in (k, l)]:
+            del group[key]
+        group.update(update)
+
+    def get_transmission(self, wavelengths, output_port, input_port):
+        """
+        Power transmission between two external ports.
+
+        Parameters
+        ----------
+        wavelengths : Array
+            Wavelengths (unit: μm), size: (frequency points,).
+        output_port : String
+            Name of the output port.
+        input_port : String
+            Name of the input port.
+
+        Returns
+        -------
+        out : Array
+            Transmission, size: (parameter sets, frequency points).
+        """
+        s = self.__evaluate(wavelengths, None, [output_port], [input_port])
+        return np.abs(s[..., 0, 0]) ** 2
@@ -0,0 +1,313 @@
+from ..utils.utils import *
+import numpy as np
+
+
+class CompactModel:
+    """
+    Base of the compact models of the circuit simulation. The parameters are scalars or 1D arrays (one value per
+    parameter set), all the arrays of a circuit have the same length (the number of parameter sets).
+
+    Parameters
+    ----------
+    ports : List of String
+        Names of the ports, in the order of the S-matrix.
+    parameters : Dict
+        Parameters of the model.
+    """
+    def __init__(self, ports, parameters):
+        self.ports = list(ports)
+        self.parameters = {}
+        for name in parameters:
+            self.set_parameter(name, parameters[name])
+
+    def set_parameter(self, name, value):
+        """
+        Set a parameter (a scalar, or one value per parameter set).
+
+        Parameters
+        ----------
+        name : String
+            Name of the parameter.
+        value : Float or Array
+            Value of the parameter.
+        """
+        value = np.asarray(value)
+        if (value.ndim > 1):
+            raise Exception("The parameter " + name + " should be a scalar or a 1D array.")
+        self.parameters[name] = value
+
+    def get_number_of_sets(self):
+        """
+        Return the number of parameter sets of the model (1 if all the parameters are scalars).
+
+        Returns
+        -------
+        out : Int
+            Number of parameter sets.
+        """
+        sizes = set([value.size for value in self.parameters.values() if value.ndim == 1])
+        if (len(sizes) > 1):
+            raise Exception("The array parameters of a compact model should have the same length.")
+        return sizes.pop() if len(sizes) else 1
+
+    def parameter(self, name, indices = None):
+        """
+        Parameter broadcastable with the wavelengths (size: (parameter sets or 1, 1)).
+
+        Parameters
+        ----------
+        name : String
+            Name of the parameter.
+        indices : Array
+            Indices of the parameter sets (default: None, all the parameter sets).
+        """
+        value = self.parameters[name]
+        if (value.ndim == 0):
+            return value.reshape(1, 1)
+        if (type(indices) != type(None)):
+            value = value[indices]
+        return value.reshape(-1, 1)
+
+    def s_matrix(self, wavelengths, indices = None):
+        """
+        S-matrix of the model, S[..., i, j] is the transmission from port j to port i.
+
+        Parameters
+        ----------
+        wavelengths : Array
+            Wavelengths (unit: μm), size: (frequency points,).
+        indices : Array
+            Indices of the parameter sets (default: None, all the parameter sets).
+
+        Returns
+        -------
+        out : Array
+            S-matrix, size: (parameter sets or 1, frequency points, ports, ports).
+        """
+        raise Exception("The s_matrix of the compact model should be implemented by the subclass.")
+
+
+def effective_index(wavelengths, neff, ng, center_wavelength):
+    """
+    First-order effective index dispersion neff(λ) = neff - (ng - neff) (λ - λ0) / λ0.
+
+    Parameters
+    ----------
+    wavelengths : Array
+        Wavelengths (unit: μm).
+    neff : Float or Array
+        Effective index at the center wavelength.
+    ng : Float or Array
+        Group index.
+    center_wavelength : Float or Array
+        Center wavelength (unit: μm).
+
+    Returns
+    -------
+    out : Array
+        Effective index at the wavelengths (broadcasted).
+    """
+    return neff - (ng - neff) * (wavelengths - center_wavelength) / center_wavelength
+
+
+def _propagation(wavelengths, length, neff, ng, center_wavelength, loss):
+    """
+    Complex transmission exp(i 2π neff L / λ) with the loss (unit: dB/cm) of a waveguide of length L (unit: μm).
+    """
+    amplitude = 10 ** (-loss * length * 1e-4 / 20)
+    return amplitude * np.exp(2j * np.pi * effective_index(wavelengths, neff, ng, center_wavelength) * length / wavelengths)
+
+
+class WaveguideModel(CompactModel):
+    """
+    Compact model of a waveguide, ports: "input", "output".
+
+    Parameters
+    ----------
+    length : Float or Array
+        Length of the waveguide (unit: μm).
+    neff : Float or Array
+        Effective index at the center wavelength (default: 2.44).
+    ng : Float or Array
+        Group index (default: 4.2).
+    loss : Float or Array
+        Propagation loss (unit: dB/cm, default: 2).
+    center_wavelength : Float or Array
+        Center wavelength (unit: μm, default: 1.55).
+    """
+    def __init__(self, length, neff = 2.44, ng = 4.2, loss = 2, center_wavelength = 1.55):
+        CompactModel.__init__(self, ["input", "output"],
+                              {"length": length, "neff": neff, "ng": ng, "loss": loss,
+                               "center_wavelength": center_wavelength})
+
+    def s_matrix(self, wavelengths, indices = None):
+        wavelengths = np.asarray(wavelengths, dtype=np.float64).reshape(1, -1)
+        transmission = _propagation(wavelengths, self.parameter("length", indices), self.parameter("neff", indices),
+                                    self.parameter("ng", indices), self.parameter("center_wavelength", indices),
+                                    self.parameter("loss", indices))
+        s = np.zeros(transmission.shape + (2, 2), dtype=np.complex128)
+        s[..., 1, 0] = transmission
+        s[..., 0, 1] = transmission
+        return s
+
+
+class DirectionalCouplerModel(CompactModel):
+    """
+    Compact model of a directional coupler, ports: "input1", "input2", "output1", "output2" (input1 -> output1 and
+    input2 -> output2 are the straight paths).
+
+    Parameters
+    ----------
+    coupling : Float or Array
+        Power coupling ratio at the center wavelength (0~1, default: 0.5).
+    coupling_slope : Float or Array
+        Wavelength slope of the power coupling ratio (unit: 1/μm, default: 0).
+    insertion_loss : Float or Array
+        Excess loss (unit: dB, default: 0).
+    center_wavelength : Float or Array
+        Center wavelength (unit: μm, default: 1.55).
+    """
+    def __init__(self, coupling = 0.5, coupling_slope = 0, insertion_loss = 0, center_wavelength = 1.55):
+        CompactModel.__init__(self, ["input1", "input2", "output1", "output2"],
+                              {"coupling": coupling, "coupling_slope": coupling_slope,
+                               "insertion_loss": insertion_loss, "center_wavelength": center_wavelength})
+
+    def s_matrix(self, wavelengths, indices = None):
+        wavelengths = np.asarray(wavelengths, dtype=np.float64).reshape(1, -1)
+        coupling = np.clip(self.parameter("coupling", indices) + self.parameter("coupling_slope", indices) *
+                           (wavelengths - self.parameter("center_wavelength", indices)), 0, 1)
+        amplitude = 10 ** (-self.parameter("insertion_loss", indices) / 20)
+        straight = amplitude * np.sqrt(1 - coupling)
+        cross = 1j * amplitude * np.sqrt(coupling)
+        s = np.zeros(np.broadcast(straight, cross).shape + (4, 4), dtype=np.complex128)
+        s[..., 2, 0] = s[..., 0, 2] = straight
+        s[..., 3, 1] = s[..., 1, 3] = straight
+        s[..., 3, 0] = s[..., 0, 3] = cross
+        s[..., 2, 1] = s[..., 1, 2] = cross
+        return s
+
+
+class AddDropRingModel(CompactModel):
+    """
+    Compact model of an add-drop micro-ring, ports: "input", "through", "add", "drop".
+
+    Parameters
+    ----------
+    radius : Float or Array
+        Radius of the ring (unit: μm), the round-trip length is 2πR.
+    input_coupling : Float or Array
+        Power coupling ratio between the input bus and the ring (0~1, default: 0.05).
+    drop_coupling : Float or Array
+        Power coupling ratio between the drop bus and the ring (0~1, default: None, the same as input_coupling).
+    neff : Float or Array
+        Effective index of the ring at the center wavelength (default: 2.44).
+    ng : Float or Array
+        Group index of the ring (default: 4.2).
+    loss : Float or Array
+        Propagation loss of the ring (unit: dB/cm, default: 2).
+    center_wavelength : Float or Array
+        Center wavelength (unit: μm, default: 1.55).
+    """
+    def __init__(self, radius, input_coupling = 0.05, drop_coupling = None, neff = 2.44, ng = 4.2, loss = 2,
+                 center_wavelength = 1.55):
+        if (type(drop_coupling) == type(None)):
+            drop_coupling = input_coupling
+        CompactModel.__init__(self, ["input", "through", "add", "drop"],
+                              {"radius": radius, "input_coupling": input_coupling, "drop_coupling": drop_coupling,
+                               "neff": neff, "ng": ng, "loss": loss, "center_wavelength": center_wavelength})
+
+    def s_matrix(self, wavelengths, indices = None):
+        wavelengths = np.asarray(wavelengths, dtype=np.float64).reshape(1, -1)
+        round_trip = _propagation(wavelengths, 2 * np.pi * self.parameter("radius", indices),
+                                  self.parameter("neff", indices), self.parameter("ng", indices),
+                                  self.parameter("center_wavelength", indices), self.parameter("loss", indices))
+        input_coupling = self.parameter("input_coupling", indices)
+        drop_coupling = self.parameter("drop_coupling", indices)
+        t1 = np.sqrt(1 - input_coupling)
+        t2 = np.sqrt(1 - drop_coupling)
+        inverse = 1 / (1 - t1 * t2 * round_trip)
+        dropped = -np.sqrt(input_coupling * drop_coupling) * np.sqrt(round_trip) * inverse
+        s = np.zeros(np.broadcast(round_trip, t1, t2).shape + (4, 4), dtype=np.complex128)
+        s[..., 1, 0] = s[..., 0, 1] = (t1 - t2 * round_trip) * inverse
+        s[..., 3, 2] = s[..., 2, 3] = (t2 - t1 * round_trip) * inverse
+        s[..., 3, 0] = s[..., 0, 3] = dropped
+        s[..., 1, 2] = s[..., 2, 1] = dropped
+        return s
+
+
+class SMatrixModel(CompactModel):
+    """
+    Compact model from tabulated S-parameters (e.g. from FDTD sweeps), linearly interpolated in wavelength.
+
+    Parameters
+    ----------
+    ports : List of String
+        Names of the ports.
+    wavelengths : Array
+        Wavelengths of the data (unit: μm), size: (data points,).
+    s_parameters : Array
+        S-matrix at the wavelengths, size: (data points, ports, ports) or (parameter sets, data points, ports, ports).
+    """
+    def __init__(self, ports, wavelengths, s_parameters):
+        CompactModel.__init__(self, ports, {})
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float64).flatten()
+        s_parameters = np.asarray(s_parameters, dtype=np.complex128)
+        if (s_parameters.ndim == 3):
+            s_parameters = s_parameters[None, ...]
+        if (s_parameters.shape[1:] != (self.wavelengths.size, len(self.ports), len(self.ports))):
+            raise Exception("The size of s_parameters should be ([parameter sets,] data points, ports, ports).")
+        order = np.argsort(self.wavelengths)
+        self.wavelengths = self.wavelengths[order]
+        self.s_parameters = s_parameters[:, order]
+
+    def get_number_of_sets(self):
+        return self.s_parameters.shape[0]
+
+    def s_matrix(self, wavelengths, indices = None):
+        wavelengths = np.asarray(wavelengths, dtype=np.float64).flatten()
+        s_parameters = self.s_parameters
+        if (type(indices) != type(None)) and (s_parameters.shape[0] > 1):
+            s_parameters = s_parameters[indices]
+        if (self.wavelengths.size == 1):
+            return np.repeat(s_parameters, wavelengths.size, axis=1)
+        upper = np.clip(np.searchsorted(self.wavelengths, wavelengths), 1, self.wavelengths.size - 1)
+        lower = upper - 1
+        fraction = np.clip((wavelengths - self.wavelengths[lower]) / (self.wavelengths[upper] - self.wavelengths[lower]), 0, 1)
+        fraction = fraction[None, :, None, None]
+        return s_parameters[:, lower] * (1 - fraction) + s_parameters[:, upper] * fraction
+
+
+def model_from_component(component, **model_parameters):
+    """
+    Create the compact model of a component from its geometry, the other parameters of the model are given as keyword
+    arguments (e.g. neff, ng, loss, input_coupling).
+
+    Parameters
+    ----------
+    component : Waveguide, ArbitraryAngleWaveguide, Bend, AddDropMicroring, AddDropMicroringFlat or
+                SimpleAsymmetricDirectionalCoupler
+        The component.
+
+    Returns
+    -------
+    out : CompactModel
+        WaveguideModel (length from the component), AddDropRingModel (radius from the component) or
+        DirectionalCouplerModel (coupling = sin^2(coupling_coefficient * coupling_length) when coupling_coefficient
+        (unit: 1/μm) is given instead of coupling).
+    """
+    name = type(component).__name__
+    if (name == "Waveguide" or name == "ArbitraryAngleWaveguide"):
+        start_point = tuple_to_point(component.start_point)
+        end_point = tuple_to_point(component.end_point)
+        length = np.hypot(end_point.x - start_point.x, end_point.y - start_point.y)
+        return WaveguideModel(length, **model_parameters)
+    if (name == "Bend"):
+        return WaveguideModel(component.radius * abs(component.end_radian - component.start_radian), **model_parameters)
+    if (name == "AddDropMicroring" or name == "AddDropMicroringFlat"):
+        return AddDropRingModel(component.radius, **model_parameters)
+    if (name == "SimpleAsymmetricDirectionalCoupler"):
+        if ("coupling_coefficient" in model_parameters):
+            coupling_coefficient = model_parameters.pop("coupling_coefficient")
+            model_parameters["coupling"] = np.sin(np.asarray(coupling_coefficient) * component.coupling_length) ** 2
+        return DirectionalCouplerModel(**model_parameters)
+    raise Exception("No compact model for " + name + ".")
@@ -0,0 +1,349 @@
+import numpy as np
+import itertools
+
+
+class CompactModelTable:
+    """
+    Store of simulated spectra over a parameter grid (e.g. gap × coupling length of a coupler), filled from the spectra
+    of get_mode_transmission/get_port_transmission (or any real/complex data) and served by vectorized multilinear
+    interpolation in the parameters, optionally with rational fits in wavelength.
+
+    Parameters
+    ----------
+    parameter_names : List of String
+        Names of the swept parameters.
+    parameter_grids : List of Array
+        Grid values of each parameter (the table is the Cartesian product of the grids).
+    wavelengths : Array
+        Wavelengths of the table (unit: μm, default: None, the wavelengths of the first spectrum).
+
+    Examples
+    --------
+    >>> table = CompactModelTable(["gap", "length"], [np.linspace(0.1, 0.3, 5), np.linspace(5, 20, 16)])
+    >>> for parameters in table.get_parameter_points():
+    ...     run_simulation(**parameters)
+    ...     table.add_spectrum("cross", parameters, fdtd.get_mode_transmission("cross_monitor"))
+    >>> table.save("coupler_table.npz")
+    >>> T = table.interpolate("cross", {"gap": 0.17, "length": np.linspace(5, 20, 1000)}, np.linspace(1.5, 1.6, 101))
+    """
+    def __init__(self, parameter_names, parameter_grids, wavelengths = None):
+        if (len(parameter_names) != len(parameter_grids)):
+            raise Exception("Each parameter should have a grid.")
+        self.parameter_names = list(parameter_names)
+        self.parameter_grids = []
+        for grid in parameter_grids:
+            grid = np.unique(np.asarray(grid, dtype=np.float64).flatten())
+            if (grid.size == 0):
+                raise Exception("The parameter grids should not be empty.")
+            self.parameter_grids.append(grid)
+        self.shape = tuple([grid.size for grid in self.parameter_grids])
+        self.wavelengths = None if type(wavelengths) == type(None) else np.asarray(wavelengths, dtype=np.float64).flatten()
+        self.__data = {}
+        self.__fits = {}
+        self.__strides = np.array([int(np.prod(self.shape[d + 1:])) for d in range(len(self.shape))], dtype=int)
+        self.__corner_bits = np.array(list(itertools.product((0, 1), repeat=len(self.shape))), dtype=int)
+        self.__corner_bits = self.__corner_bits * (np.array(self.shape)[None, :] > 1)
+        self.__corner_bits = np.unique(self.__corner_bits, axis=0)
+
+    def get_names(self):
+        """
+        Return the names of the stored quantities.
+
+        Returns
+        -------
+        out : List of String
+            Names of the stored quantities.
+        """
+        return list(self.__data.keys())
+
+    def get_parameter_points(self):
+        """
+        Return all the points of the parameter grid.
+
+        Returns
+        -------
+        out : List of Dict
+            Parameters of each grid point, {parameter name: value}.
+        """
+        return [dict(zip(self.parameter_names, values)) for values in itertools.product(*self.parameter_grids)]
+
+    def get_missing_points(self, name):
+        """
+        Return the points of the parameter grid without data (e.g. to resume an interrupted sweep).
+
+        Parameters
+        ----------
+        name : String
+            Name of the stored quantity.
+
+        Returns
+        -------
+        out : List of Dict
+            Parameters of each missing grid point, {parameter name: value}.
+        """
+        if name not in self.__data:
+            return self.get_parameter_points()
+        missing = np.argwhere(np.isnan(self.__data[name][..., 0]))
+        return [dict([(self.parameter_names[d], self.parameter_grids[d][index[d]]) for d in range(len(self.shape))])
+                for index in missing]
+
+    def __grid_index(self, parameters):
+        index = []
+        for name, grid in zip(self.parameter_names, self.parameter_grids):
+            if name not in parameters:
+                raise Exception("The parameter " + name + " is missing.")
+            position = np.argmin(np.abs(grid - parameters[name]))
+            if not np.isclose(grid[position], parameters[name], rtol=1e-9, atol=1e-12):
+                raise Exception("The parameter " + name + " = " + str(parameters[name]) + " is not on the grid.")
+            index.append(position)
+        return tuple(index)
+
+    def add_data(self, name, parameters, values, wavelengths = None):
+        """
+        Add the data of a grid point.
+
+        Parameters
+        ----------
+        name : String
+            Name of the stored quantity (e.g. "through", "cross").
+        parameters : Dict
+            Parameters of the grid point, {parameter name: value}.
+        values : Array
+            Real or complex data (e.g. transmission or mode coefficients), size: (frequency points,).
+        wavelengths : Array
+            Wavelengths of the data (unit: μm, default: None, the wavelengths of the table).
+        """
+        values = np.asarray(values).flatten()
+        if (type(wavelengths) != type(None)):
+            wavelengths = np.asarray(wavelengths, dtype=np.float64).flatten()
+            if (wavelengths.size != values.size):
+                raise Exception("The data and the wavelengths should have the same size.")
+            order = np.argsort(wavelengths)
+            wavelengths = wavelengths[order]
+            values = values[order]
+            if (type(self.wavelengths) == type(None)):
+                self.wavelengths = wavelengths
+            elif (wavelengths.size != self.wavelengths.size) or not np.allclose(wavelengths, self.wavelengths):
+                if np.iscomplexobj(values):
+                    values = np.interp(self.wavelengths, wavelengths, values.real) + \
+                             1j * np.interp(self.wavelengths, wavelengths, values.imag)
+                else:
+                    values = np.interp(self.wavelengths, wavelengths, values)
+        if (type(self.wavelengths) == type(None)):
+            raise Exception("The wavelengths of the table are not defined.")
+        if (values.size != self.wavelengths.size):
+            raise Exception("The data should have one value per wavelength of the table.")
+        if name not in self.__data:
+            dtype = np.complex128 if np.iscomplexobj(values) else np.float64
+            self.__data[name] = np.full(self.shape + (self.wavelengths.size,), np.nan, dtype=dtype)
+        elif np.iscomplexobj(values) and not np.iscomplexobj(self.__data[name]):
+            self.__data[name] = self.__data[name].astype(np.complex128)
+        self.__data[name][self.__grid_index(parameters)] = values
+        self.__fits.pop(name, None)
+
+    def add_spectrum(self, name, parameters, spectrum, mode_number = 1):
+        """
+        Add a spectrum from get_mode_transmission/get_port_transmission (size: (number of modes,2,frequency points)) or
+        get_transmission (size: (2,frequency points)), the wavelengths of the spectrum are in m.
+
+        Parameters
+        ----------
+        name : String
+            Name of the stored quantity (e.g. "through", "cross").
+        parameters : Dict
+            Parameters of the grid point, {parameter name: value}.
+        spectrum : Array
+            Spectrum [[wavelength,transmission],...].
+        mode_number : Int
+            Mode of the spectrum, starting from 1 (default: 1).
+        """
+        spectrum = np.asarray(spectrum)
+        if (spectrum.ndim == 3):
+            if (mode_number < 1) or (mode_number > spectrum.shape[0]):
+                raise Exception("The spectrum has no mode " + str(mode_number) + ".")
+            spectrum = spectrum[mode_number - 1]
+        if (spectrum.ndim != 2) or (spectrum.shape[0] != 2):
+            raise Exception("The size of the spectrum should be (number of modes,2,frequency points) or (2,frequency points).")
+        self.add_data(name, parameters, spectrum[1], np.real(spectrum[0]) * 1e6)
+
+    def fit_rational(self, name, numerator_order = 4, denominator_order = 4, iterations = 3):
+        """
+        Fit the spectrum of each grid point with a rational function of the wavelength P(λ)/Q(λ) (Sanathanan-Koerner
+        iterations), the fits are used by interpolate afterwards.
+
+        Parameters
+        ----------
+        name : String
+            Name of the stored quantity.
+        numerator_order : Int
+            Order of P (default: 4).
+        denominator_order : Int
+            Order of Q (default: 4).
+        iterations : Int
+            Number of reweighting iterations (default: 3).
+
+        Returns
+        -------
+        out : Float
+            Maximum absolute error of the fits at the wavelengths of the table.
+        """
+        if name not in self.__data:
+            raise Exception("No data named " + name + ".")
+        data = self.__data[name].reshape(-1, self.wavelengths.size)
+        if np.any(np.isnan(data)):
+            raise Exception("The table of " + name + " is not complete, see get_missing_points.")
+        if (numerator_order + denominator_order + 1 > self.wavelengths.size):
+            raise Exception("The fit has more coefficients than the wavelength points.")
+        x = self.__normalized_wavelengths(self.wavelengths)
+        numerator_basis = x[:, None] ** np.arange(numerator_order + 1)[None, :]
+        denominator_basis = x[:, None] ** np.arange(1, denominator_order + 1)[None, :]
+        ## linearized residual P(x) - y (Q(x) - 1) = y, weighted by 1/|Q| of the previous iteration
+        matrix = np.concatenate([np.broadcast_to(numerator_basis, (data.shape[0],) + numerator_basis.shape),
+                                 -data[:, :, None] * denominator_basis[None]], axis=2)
+        weight = np.ones(data.shape)
+        for iteration in range(max(int(iterations), 1)):
+            q, r = np.linalg.qr(weight[:, :, None] * matrix)
+            coefficients = np.linalg.solve(r, np.einsum("gwk,gw->gk", q.conj(), weight * data)[..., None])[..., 0]
+            denominator = 1 + coefficients[:, numerator_order + 1:] @ denominator_basis.T
+            weight = 1 / np.abs(denominator)
+        numerator = coefficients[:, :numerator_order + 1]
+        denominator = np.concatenate([np.ones((data.shape[0], 1)), coefficients[:, numerator_order + 1:]], axis=1)
+        self.__fits[name] = (numerator.reshape(self.shape + (-1,)), denominator.reshape(self.shape + (-1,)))
+        fitted = (numerator @ numerator_basis.T) / (1 + coefficients[:, numerator_order + 1:] @ denominator_basis.T)
+        return float(np.max(np.abs(fitted - data)))
+
+    def __normalized_wavelengths(self, wavelengths):
+        center = (self.wavelengths[0] + self.wavelengths[-1]) / 2
+        span = max((self.wavelengths[-1] - self.wavelengths[0]) / 2, 1e-12)
+        return (wavelengths - center) / span
+
+    def __corners(self, parameters):
+        """
+        Flat indices and weights of the 2^D grid corners around each point, size: (2^D, points).
+        """
+        values = []
+        for name in self.parameter_names:
+            if name not in parameters:
+                raise Exception("The parameter " + name + " is missing.")
+            values.append(np.asarray(parameters[name], dtype=np.float64))
+        values = np.array(np.broadcast_arrays(*values)).reshape(len(self.shape), -1)
+        lowers = np.zeros(values.shape, dtype=int)
+        fractions = np.zeros(values.shape)
+        for d, grid in enumerate(self.parameter_grids):
+            tolerance = 1e-9 * max(abs(grid[-1] - grid[0]), abs(grid[0]), 1e-12)
+            if (values[d].min() < grid[0] - tolerance) or (values[d].max() > grid[-1] + tolerance):
+                raise Exception("The parameter " + self.parameter_names[d] + " is out of the table range [" +
+                                str(grid[0]) + ", " + str(grid[-1]) + "].")
+            if (grid.size > 1):
+                lowers[d] = np.minimum(np.maximum(np.searchsorted(grid, values[d], side="right"), 1), grid.size - 1) - 1
+                fractions[d] = np.minimum(np.maximum((values[d] - grid[lowers[d]]) /
+                                                     (grid[lowers[d] + 1] - grid[lowers[d]]), 0), 1)
+        ## corner c takes the upper grid point along d when its bit d is set (never for a single-point grid)
+        bits = self.__corner_bits[:, :, None]
+        indices = np.sum(self.__strides[None, :, None] * (lowers[None] + bits), axis=1)
+        weights = np.prod(np.where(bits, fractions[None], 1 - fractions[None]), axis=1)
+        return indices, weights
+
+    def interpolate(self, name, parameters, wavelengths = None, use_fit = True):
+        """
+        Interpolate the stored quantity at arbitrary parameters (multilinear in the parameters, rational fit or linear
+        in wavelength), the points without data give NaN.
+
+        Parameters
+        ----------
+        name : String
+            Name of the stored quantity.
+        parameters : Dict
+            {parameter name: Float or Array}, the arrays are broadcasted together (one value per point).
+        wavelengths : Array
+            Wavelengths (unit: μm, default: None, the wavelengths of the table).
+        use_fit : Bool
+            Whether to use the rational fit when fit_rational has been called (default: True).
+
+        Returns
+        -------
+        out : Array
+            Interpolated data, size: (points, frequency points).
+        """
+        if name not in self.__data:
+            raise Exception("No data named " + name + ".")
+        indices, weights = self.__corners(parameters)
+        table_wavelengths = type(wavelengths) == type(None)
+        if table_wavelengths:
+            wavelengths = self.wavelengths
+        wavelengths = np.asarray(wavelengths, dtype=np.float64).flatten()
+        if (wavelengths.min() < self.wavelengths[0] - 1e-12) or (wavelengths.max() > self.wavelengths[-1] + 1e-12):
+            raise Exception("The wavelengths are out of the table range [" + str(self.wavelengths[0]) + ", " +
+                            str(self.wavelengths[-1]) + "].")
+        if use_fit and (name in self.__fits):
+            numerator, denominator = self.__fits[name]
+            numerator = numerator.reshape(-1, numerator.shape[-1])
+            denominator = denominator.reshape(-1, denominator.shape[-1])
+            x = self.__normalized_wavelengths(wavelengths)
+            numerator_basis = x[:, None] ** np.arange(numerator.shape[1])[None, :]
+            denominator_basis = x[:, None] ** np.arange(denominator.shape[1])[None, :]
+            values = (numerator[indices] @ numerator_basis.T) / (denominator[indices] @ denominator_basis.T)
+        else:
+            data = self.__data[name].reshape(-1, self.wavelengths.size)
+            if table_wavelengths:
+                values = data[indices]
+            elif (self.wavelengths.size == 1):
+                values = np.repeat(data[indices], wavelengths.size, axis=2)
+            else:
+                upper = np.clip(np.searchsorted(self.wavelengths, wavelengths), 1, self.wavelengths.size - 1)
+                fraction = np.clip((wavelengths - self.wavelengths[upper - 1]) /
+                                   (self.wavelengths[upper] - self.wavelengths[upper - 1]), 0, 1)
+                values = data[indices[..., None], upper - 1] * (1 - fraction) + data[indices[..., None], upper] * fraction
+        return np.einsum("cp,cpw->pw", weights, values)
+
+    def save(self, filename, single_precision = True):
+        """
+        Save the table (data and rational fits) as a compressed .npz file.
+
+        Parameters
+        ----------
+        filename : String
+            Name of the file.
+        single_precision : Bool
+            Whether to store the data in single precision (default: True).
+        """
+        arrays = {"parameter_names": np.array(self.parameter_names), "names": np.array(self.get_names()),
+                  "fit_names": np.array(list(self.__fits.keys())),
+                  "wavelengths": np.array([]) if type(self.wavelengths) == type(None) else self.wavelengths}
+        for d, grid in enumerate(self.parameter_grids):
+            arrays["grid_" + str(d)] = grid
+        for index, name in enumerate(self.get_names()):
+            data = self.__data[name]
+            if single_precision:
+                data = data.astype(np.complex64 if np.iscomplexobj(data) else np.float32)
+            arrays["data_" + str(index)] = data
+        for index, name in enumerate(self.__fits):
+            arrays["numerator_" + str(index)], arrays["denominator_" + str(index)] = self.__fits[name]
+        np.savez_compressed(filename, **arrays)
+
+    @staticmethod
+    def load(filename):
+        """
+        Load a table saved by save.
+
+        Parameters
+        ----------
+        filename : String
+            Name of the file.
+
+        Returns
+        -------
+        out : CompactModelTable
+            The table.
+        """
+        with np.load(filename) as table_file:
+            parameter_names = [str(name) for name in table_file["parameter_names"]]
+            grids = [table_file["grid_" + str(d)] for d in range(len(parameter_names))]
+            wavelengths = table_file["wavelengths"]
+            table = CompactModelTable(parameter_names, grids, wavelengths if wavelengths.size else None)
+            for index, name in enumerate(table_file["names"]):
+                data = table_file["data_" + str(index)]
+                table.__data[str(name)] = data.astype(np.complex128 if np.iscomplexobj(data) else np.float64)
+            for index, name in enumerate(table_file["fit_names"]):
+                table.__fits[str(name)] = (table_file["numerator_" + str(index)], table_file["denominator_" + str(index)])
+        return table
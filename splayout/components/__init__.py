@@ -19,4 +19,5 @@ from .text import Text
 from .waveguide import Waveguide, ArbitraryAngleWaveguide
 from .sbend import SBend,ASBend
 from .filledpattern import Circle, Rectangle
-from .pixelsregion import CirclePixelsRegion, RectanglePixelsRegion, CirclePixelsRegionwithGroup
\ No newline at end of file
+from .pixelsregion import CirclePixelsRegion, RectanglePixelsRegion, PixelsRegionwithGroup, CirclePixelsRegionwithGroup, \
+    RectanglePixelsRegionwithGroup, EllipsePixelsRegionwithGroup, PolygonPixelsRegionwithGroup
\ No newline at end of file
@@ -1,6 +1,7 @@
 from ..utils.utils import *
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 class Bend:
     """
@@ -79,10 +80,10 @@ class Bend:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 engine.put_round(self.center_point, inner_radius = self.radius - self.width/2,
                                  outer_radius = self.radius + self.width/2,
@@ -93,6 +94,17 @@ class Bend:
         else:
             raise Exception("Wrong CAD engine!")
 
+    def get_round_parameters(self):
+        """
+        Derive the ring primitive parameters of the bend.
+
+        Returns
+        -------
+        out : Tuple
+            (center_point, inner_radius, outer_radius, start_radian, end_radian), which can be drawn by put_round or put_rounds.
+        """
+        return (self.center_point, self.radius - self.width/2, self.radius + self.width/2, self.start_radian, self.end_radian)
+
     def get_start_point(self):
         """
         Derive the start point of the bend.
@@ -2,6 +2,7 @@ from ..utils.utils import *
 from ..components.quarbend import AQuarBend,QuarBend
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 class DoubleBendConnector:
     """
@@ -119,10 +120,10 @@ class DoubleBendConnector:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 self.first_bend.draw_on_lumerical_CAD(engine)
                 self.second_bend.draw_on_lumerical_CAD(engine)
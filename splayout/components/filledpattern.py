@@ -3,6 +3,7 @@ from ..components.bend import Bend
 from ..components.waveguide import Waveguide
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 class Circle:
     """
@@ -58,10 +59,10 @@ class Circle:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 self.bend.draw_on_lumerical_CAD(engine)
             else:
@@ -143,10 +144,10 @@ class Rectangle:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 self.waveguide.draw_on_lumerical_CAD(engine)
             else:
@@ -2,6 +2,9 @@ from ..utils.utils import *
 from ..components.waveguide import Waveguide
 from ..components.bend import Bend
 from ..components.quarbend import AQuarBend,QuarBend
+from ..lumericalcommun.fdtdapi import FDTDSimulation
+from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 ## global parameters
 add_drop_microring_number = 0
@@ -499,9 +502,22 @@ class AddDropMicroring:
         The coupling length in coupling region (μm).
     relative_position : RIGHT or UP or LEFT or DOWN
         The relative position of the microring according to the other components.
+    z_start : Float
+        The start point for the structure in z axis (unit: μm, default: None, only useful when draw on CAD).
+    z_end : Float
+        The end point for the structure in z axis (unit: μm, default: None, only useful when draw on CAD).
+    material : str or float
+        Material setting for the structure in Lumerical FDTD (SiO2 = "SiO2 (Glass) - Palik", SiO2 = "SiO2 (Glass) - Palik"). When it is a float, the material in FDTD will be
+        <Object defined dielectric>, and index will be defined. (default: None, only useful when draw on CAD)
+    rename : String
+        New name of the structure in Lumerical.
     """
-    def __init__(self,start_point,radius,gap,wg_width,coupling_length,relative_position = RIGHT):
+    def __init__(self,start_point,radius,gap,wg_width,coupling_length,relative_position = RIGHT, z_start = None, z_end = None, material = None, rename = None):
         self.start_point = tuple_to_point(start_point)
+        self.z_start = z_start
+        self.z_end = z_end
+        self.material = material
+        self.rename = rename
         self.radius = radius
         self.gap = gap
         self.width = wg_width
@@ -652,6 +668,46 @@ class AddDropMicroring:
                                           rotation=self.rotate_radian))
         return self.input_point, self.through_point,self.drop_point,self.add_point
 
+    def get_round_parameters(self):
+        """
+        Derive the ring primitive parameters of all the bends in the micro-ring (rotation and position included).
+
+        Returns
+        -------
+        out : List of Tuple
+            List of (center_point, inner_radius, outer_radius, start_radian, end_radian), which can be drawn by put_rounds.
+        """
+        rotate_radian = self.rotate_radian * math.pi / 180
+        round_list = []
+        for bend in [self.input_bend, self.up_coupling_bend, self.through_bend, self.ring,
+                     self.down_coupling_bend, self.drop_bend, self.add_bend]:
+            center_point, inner_radius, outer_radius, start_radian, end_radian = bend.get_round_parameters()
+            rotated_center_point = Point(center_point.x * math.cos(rotate_radian) - center_point.y * math.sin(rotate_radian),
+                                         center_point.x * math.sin(rotate_radian) + center_point.y * math.cos(rotate_radian))
+            round_list.append((self.start_point + rotated_center_point, inner_radius, outer_radius,
+                               start_radian + rotate_radian, end_radian + rotate_radian))
+        return round_list
+
+    def draw_on_lumerical_CAD(self, engine, as_group = 0):
+        """
+        Draw the Component on the lumerical CAD (FDTD or MODE) with ring primitives.
+
+        Parameters
+        ----------
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
+            CAD to draw the component.
+        as_group : Bool
+            Whether to draw the micro-ring as a structure group parameterized by radius and angle (default: False).
+        """
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
+            if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
+                engine.put_rounds(self.get_round_parameters(), z_start=self.z_start, z_end=self.z_end,
+                                  material=self.material, rename=self.rename, as_group=as_group)
+            else:
+                raise Exception("Z-axis specification or material specification is missing!")
+        else:
+            raise Exception("Wrong CAD engine!")
+
     def add_heater(self,cell,heater_layer,heater_radian = math.pi/2, heater_width = 2, connect_pad_width = 14, bus_width = 4 , contact = 0 , contact_layer =None,contact_width = 150,contact_bus_width = 10,contact_position = UP,open = 0, open_layer =None,open_width = 140,touch = 0,touch_layer = None):
         """
         Add heater and corresponding pads for the micro-ring.
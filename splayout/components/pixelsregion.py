@@ -1,5 +1,6 @@
 from ..utils.utils import *
 from ..components.filledpattern import Circle,Rectangle
+from ..solvers.fdfd2d import FDFDSimulation
 import numpy as np
 import os
 import time
@@ -146,7 +147,7 @@ class CirclePixelsRegion:
                 else:
                     command += 'set("enabled", 1);'
 
-            self.fdtd_engine.fdtd.eval("clear;")
+            self.fdtd_engine.eval("clear;")
             command_list = command.split(";")[:-1]
             block_length = int(len(command_list) / 10000) + 1
             for i in range(0, block_length):
@@ -200,9 +201,10 @@ class CirclePixelsRegion:
                     circle.draw(cell,layer)
 
 
-class CirclePixelsRegionwithGroup:
+class PixelsRegionwithGroup:
     """
-    Rectangle pixels region for FDTD simulation managed by structuregroup. It will create a region with etched blocks that can be updated by a two-dimensional matrix.
+    Base class of the pixels regions managed by structuregroup. The pixels are built by the group script inside Lumerical
+    FDTD, and the region is updated by setting the pixel matrix of the structure group.
 
     Parameters
     ----------
@@ -210,8 +212,6 @@ class CirclePixelsRegionwithGroup:
         Lower left corner of the region.
     top_right_corner_point : Point
         Upper right corner of the region.
-    pixel_radius : float
-        Radius of the pixel(etched block).
     fdtd_engine : FDTDSimulation
         The FDTDSimulation object.
     material : String
@@ -226,13 +226,22 @@ class CirclePixelsRegionwithGroup:
         Mask array for the matrix in update function (default: None).
     relaxing_time : Float
         Relaxing time for eval in Lumerical FDTD (unit: s, default: 0).
+    diff_ratio : Float
+        When the ratio of changed pixels is not larger than diff_ratio, only the changed pixels are transferred to Lumerical FDTD,
+        otherwise the whole matrix is transferred (default: 0.25).
+
+    Notes
+    -----
+    Subclasses define the pixel shape through pixel_script (Lumerical script that creates one pixel at (pixel_x, pixel_y)
+    with the matrix value pixel_value), pixel_properties (the extra user properties of the group) and draw_pixel.
     """
-    def __init__(self, bottom_left_corner_point, top_right_corner_point, pixel_radius, fdtd_engine, material=SiO2, z_start=-0.11, z_end=0.11 , group_name = "pixels", matrix_mask = None, relaxing_time = 0):
+    matrix_name = "pixel_matrix"
+
+    def __init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, material=SiO2, z_start=-0.11, z_end=0.11 , group_name = "pixels", matrix_mask = None, relaxing_time = 0, diff_ratio = 0.25):
         self.bottom_left_corner_point = tuple_to_point(bottom_left_corner_point)
         self.top_right_corner_point = tuple_to_point(top_right_corner_point)
         self.left_down_point = self.bottom_left_corner_point
         self.right_up_point = self.top_right_corner_point
-        self.pixel_radius = pixel_radius
         self.__last_array = None
         self.__lastest_array = None
         self.fdtd_engine = fdtd_engine
@@ -241,11 +250,76 @@ class CirclePixelsRegionwithGroup:
         self.z_end = z_end
         self.group_name = group_name
         self.relaxing_time = relaxing_time
+        self.diff_ratio = diff_ratio
         if (type(matrix_mask) != type(None)):
             self.matrix_mask = np.array(matrix_mask, dtype=np.int32)
         else:
             self.matrix_mask = matrix_mask
 
+    def pixel_properties(self):
+        '''
+        User properties of the structure group that are needed by pixel_script.
+
+        Returns
+        -------
+        out : Dict
+            Names and values (float or array) of the user properties.
+        '''
+        return {}
+
+    def pixel_script(self):
+        '''
+        Lumerical script in the group script loop that creates one pixel.
+
+        Returns
+        -------
+        out : String
+            Script that creates a pixel centered at (pixel_x, pixel_y) (unit: μm) for the matrix value pixel_value.
+        '''
+        raise Exception("pixel_script should be defined for the pixel shape!")
+
+    def draw_pixel(self, cell, layer, center_point, value):
+        '''
+        Draw one pixel on layout.
+
+        Parameters
+        ----------
+        cell : Cell
+            Cell to draw the component.
+        layer : Layer
+            Layer to draw.
+        center_point : Point
+            Center of the pixel.
+        value : Float
+            Matrix value (0~1) of the pixel.
+        '''
+        raise Exception("draw_pixel should be defined for the pixel shape!")
+
+    def get_masked_matrix(self, matrix):
+        '''
+        Derive the two-dimensional pixel matrix of the region according to the matrix_mask.
+
+        Parameters
+        ----------
+        matrix : numpy.array
+            Array (values:0~1) that represent the pixels in the region.
+
+        Returns
+        -------
+        out : numpy.array
+            Two-dimensional array for all the pixels in the region.
+        '''
+        if (type(self.matrix_mask) != type(None)):
+            enable_positions = np.transpose(self.matrix_mask) == 1
+            if (np.sum(enable_positions) != len(matrix)):
+                raise Exception("The input matrix can not match the matrix_mask!")
+            masked_matrix = self.matrix_mask.copy().astype(np.double)
+            masked_matrix.T[enable_positions] = np.asarray(matrix, dtype=np.double).flatten()
+        elif (len(matrix.shape) != 2):
+            raise Exception("The input matrix should be two-dimensional when matrix_mask not specified!")
+        else:
+            masked_matrix = matrix
+        return masked_matrix
 
     def __initialize(self):
         self.block_x_length = np.abs(self.bottom_left_corner_point.x - self.top_right_corner_point.x) / self.__lastest_array.shape[0]
@@ -258,22 +332,20 @@ class CirclePixelsRegionwithGroup:
         self.fdtd_engine.eval("set(\"x\", 0);")
         self.fdtd_engine.eval("set(\"y\", 0);")
         self.fdtd_engine.eval("set(\"z\", 0);")
-        self.fdtd_engine.fdtd.putv("radius_matrix", self.__lastest_array)
-        self.fdtd_engine.fdtd.putv("pixel_radius", self.pixel_radius)
-        self.fdtd_engine.fdtd.putv("z_start", self.z_start)
-        self.fdtd_engine.fdtd.putv("z_end", self.z_end)
-        self.fdtd_engine.eval("adduserprop(\"radius_matrix\", 6, radius_matrix);")
-        self.fdtd_engine.eval("adduserprop(\"pixel_radius\", 2, pixel_radius);")
-        self.fdtd_engine.eval("adduserprop(\"z_start\", 2, z_start);")
-        self.fdtd_engine.eval("adduserprop(\"z_end\", 2, z_end);")
-        self.fdtd_engine.fdtd.putv("block_x_length", self.block_x_length)
-        self.fdtd_engine.fdtd.putv("block_y_length", self.block_y_length)
-        self.fdtd_engine.fdtd.putv("x_start_point", self.x_start_point)
-        self.fdtd_engine.fdtd.putv("y_start_point", self.y_start_point)
-        self.fdtd_engine.eval("adduserprop(\"block_x_length\", 2, block_x_length);")
-        self.fdtd_engine.eval("adduserprop(\"block_y_length\", 2, block_y_length);")
-        self.fdtd_engine.eval("adduserprop(\"x_start_point\", 2, x_start_point);")
-        self.fdtd_engine.eval("adduserprop(\"y_start_point\", 2, y_start_point);")
+        properties = {self.matrix_name: self.__lastest_array,
+                      "z_start": self.z_start,
+                      "z_end": self.z_end,
+                      "block_x_length": self.block_x_length,
+                      "block_y_length": self.block_y_length,
+                      "x_start_point": self.x_start_point,
+                      "y_start_point": self.y_start_point}
+        properties.update(self.pixel_properties())
+        for name in properties:
+            self.fdtd_engine.putv(name, properties[name])
+            if (type(properties[name]) == np.ndarray):
+                self.fdtd_engine.eval("adduserprop(\"" + name + "\", 6, " + name + ");")
+            else:
+                self.fdtd_engine.eval("adduserprop(\"" + name + "\", 2, " + name + ");")
 
         y_size = self.__lastest_array.shape[1]
         x_size = self.__lastest_array.shape[0]
@@ -281,12 +353,13 @@ class CirclePixelsRegionwithGroup:
         groupscript = "deleteall; \n"
         groupscript += "for (y = 0:" + str(y_size - 1) + "){ \n" \
                             "for (x = 0:" + str(x_size - 1) + "){ \n" \
-                                "addcircle; \n" \
-                                "set(\"x\"," + " (x_start_point + x * block_x_length)*1e-6); \n" \
-                                "set(\"y\"," + " (y_start_point - y * block_y_length)*1e-6); \n" \
-                                "set(\"radius\"," + " (pixel_radius*radius_matrix(x+1, y+1))*1e-6); \n" \
-                                "set(\"z min\"," + " z_start*1e-6); \n" \
-                                "set(\"z max\"," + " z_end*1e-6); \n"
+                                "pixel_x = x_start_point + x * block_x_length; \n" \
+                                "pixel_y = y_start_point - y * block_y_length; \n" \
+                                "pixel_value = " + self.matrix_name + "(x+1, y+1); \n" \
+                                "if(pixel_value > 1) {pixel_value = 1;} \n"
+        groupscript += self.pixel_script()
+        groupscript += "set(\"z min\"," + " z_start*1e-6); \n" \
+                       "set(\"z max\"," + " z_end*1e-6); \n"
         if type(self.material) == str:
             groupscript += "set(\"material\",\"" + self.material + "\"); \n"
         elif type(self.material) == float:
@@ -294,34 +367,23 @@ class CirclePixelsRegionwithGroup:
             groupscript += "set(\"index\"," + str(self.material) + "); \n"
         else:
             raise Exception("Wrong material specification!")
-        groupscript += "if(radius_matrix(x+1, y+1) < 0.001) {set(\"enabled\", 0);} \n"
+        groupscript += "if(pixel_value < 0.001) {set(\"enabled\", 0);} \n"
         groupscript += "} \n" \
                        "}"
-        self.fdtd_engine.fdtd.putv("groupscript", groupscript)
-        self.fdtd_engine.fdtd.eval("set(\"script\", groupscript);")
+        self.fdtd_engine.putv("groupscript", groupscript, cache=0)
+        self.fdtd_engine.eval("set(\"script\", groupscript);")
         self.fdtd_engine.eval("clear;")
 
-
     def update(self, matrix):
         '''
-        Update pixel region according to the new matrix. For the first time it is called, the pixels will be created in the FDTD simulation CAD. In the following update process, it will enable/disable correspoinding pixels.
+        Update pixel region according to the new matrix. For the first time it is called, the structure group will be created in the FDTD simulation CAD. In the following update process, the changed pixels are set to the pixel matrix of the group with a single setnamed.
 
         Parameters
         ----------
         matrix : numpy.array
             Array (values:0~1) that represent the pixels in the region.
         '''
-        if (type(self.matrix_mask) != type(None)):
-            enable_positions = np.where(np.transpose(self.matrix_mask) == 1)
-            if (len(np.transpose(enable_positions)) != len(matrix)):
-                raise Exception("The input matrix can not match the matrix_mask!")
-            masked_matrix = self.matrix_mask.copy().astype(np.double)
-            for i,position in enumerate(np.transpose(enable_positions)):
-                masked_matrix[position[1], position[0]] = matrix[i]
-        elif (len(matrix.shape) != 2):
-            raise Exception("The input matrix should be two-dimensional when matrix_mask not specified!")
-        else:
-            masked_matrix = matrix
+        masked_matrix = self.get_masked_matrix(matrix)
 
         self.fdtd_engine.switch_to_layout()
         if (type(self.__lastest_array) == type(None)):
@@ -330,10 +392,25 @@ class CirclePixelsRegionwithGroup:
             self.__initialize()
         else:
             self.__lastest_array = np.array(masked_matrix,dtype=np.double)
-            if not (self.__lastest_array == self.__last_array).all():
-                self.__last_array = np.array(masked_matrix,dtype=np.double)
-                self.fdtd_engine.fdtd.putv("radius_matrix", self.__lastest_array)
-                self.fdtd_engine.eval("setnamed(\"::model::"+self.group_name+"\",\"radius_matrix\",radius_matrix);")
+            diff_mask = self.__lastest_array != self.__last_array
+            diff_number = np.sum(diff_mask)
+            if (diff_number == 0):
+                return
+            self.__last_array = np.array(masked_matrix,dtype=np.double)
+            group = "::model::" + self.group_name
+            if (diff_number <= self.diff_ratio * diff_mask.size):
+                ## Lumerical matrices are column-major
+                diff_index = np.where(diff_mask.flatten(order="F"))[0]
+                self.fdtd_engine.putv("pixel_diff_index", np.array(diff_index + 1, dtype=np.double), cache=0)
+                self.fdtd_engine.putv("pixel_diff_value", self.__lastest_array.flatten(order="F")[diff_index], cache=0)
+                self.fdtd_engine.eval("pixel_matrix = getnamed(\"" + group + "\",\"" + self.matrix_name + "\");"
+                                      "for (i = 1:length(pixel_diff_index)){ pixel_matrix(pixel_diff_index(i)) = pixel_diff_value(i); }"
+                                      "setnamed(\"" + group + "\",\"" + self.matrix_name + "\",pixel_matrix);"
+                                      "clear(pixel_matrix, pixel_diff_index, pixel_diff_value);")
+            else:
+                self.fdtd_engine.putv("pixel_matrix", self.__lastest_array, cache=0)
+                self.fdtd_engine.eval("setnamed(\"" + group + "\",\"" + self.matrix_name + "\",pixel_matrix);"
+                                      "clear(pixel_matrix);")
 
     def draw_layout(self, matrix, cell, layer):
         '''
@@ -348,17 +425,7 @@ class CirclePixelsRegionwithGroup:
         layer : Layer
             Layer to draw.
         '''
-        if (type(self.matrix_mask) != type(None)):
-            enable_positions = np.where(np.transpose(self.matrix_mask) == 1)
-            if (len(np.transpose(enable_positions)) != len(matrix)):
-                raise Exception("The input matrix can not match the matrix_mask!")
-            masked_matrix = self.matrix_mask.copy().astype(np.double)
-            for i,position in enumerate(np.transpose(enable_positions)):
-                masked_matrix[position[1], position[0]] = matrix[i]
-        elif (len(matrix.shape) != 2):
-            raise Exception("The input matrix should be two-dimensional when matrix_mask not specified!")
-        else:
-            masked_matrix = matrix
+        masked_matrix = self.get_masked_matrix(matrix)
 
         self.block_x_length = np.abs(self.bottom_left_corner_point.x - self.top_right_corner_point.x) / masked_matrix.shape[0]
         self.block_y_length = np.abs(self.bottom_left_corner_point.y - self.top_right_corner_point.y) / masked_matrix.shape[1]
@@ -368,19 +435,67 @@ class CirclePixelsRegionwithGroup:
         for row in range(0, masked_matrix.shape[1]):
             for col in range(0, masked_matrix.shape[0]):
                 center_point = Point(self.x_start_point+col*self.block_x_length,self.y_start_point-row*self.block_y_length)
-                radius = self.pixel_radius * masked_matrix[col,row]
-                if (radius <= 0.001):
-                    radius = 0
-                if (np.isclose(radius, self.pixel_radius) or radius > self.pixel_radius):
-                    radius = self.pixel_radius
-                if (~np.isclose(radius, 0)):
-                    circle = Circle(center_point=center_point, radius=radius)
-                    circle.draw(cell,layer)
+                value = masked_matrix[col,row]
+                if (value <= 0.001):
+                    continue
+                if (np.isclose(value, 1) or value > 1):
+                    value = 1
+                self.draw_pixel(cell, layer, center_point, value)
 
 
-class RectanglePixelsRegion:
+class CirclePixelsRegionwithGroup(PixelsRegionwithGroup):
     """
-    Rectangle pixels region for FDTD simulation. It will create a region with etched blocks that can be updated by a two-dimensional matrix.
+    Circle pixels region for FDTD simulation managed by structuregroup. It will create a region with etched blocks that can be updated by a two-dimensional matrix.
+
+    Parameters
+    ----------
+    bottom_left_corner_point : Point
+        Lower left corner of the region.
+    top_right_corner_point : Point
+        Upper right corner of the region.
+    pixel_radius : float
+        Radius of the pixel(etched block).
+    fdtd_engine : FDTDSimulation
+        The FDTDSimulation object.
+    material : String
+        Material setting for the pixels in Lumerical FDTD (Si = "Si (Silicon) - Palik", SiO2 = "SiO2 (Glass) - Palik", default: SiO2).
+    z_start : Float
+        The start point for the structure in z axis (unit: μm, default: -0.11).
+    z_end : Float
+        The end point for the structure in z axis (unit: μm, default: 0.11).
+    group_name : String
+        Unique name of the pixels for distinguishing different pixel region(default: "pixels").
+    matrix_mask : Array
+        Mask array for the matrix in update function (default: None).
+    relaxing_time : Float
+        Relaxing time for eval in Lumerical FDTD (unit: s, default: 0).
+    diff_ratio : Float
+        Maximum ratio of changed pixels for transferring only the changed pixels (default: 0.25).
+    """
+    matrix_name = "radius_matrix"
+
+    def __init__(self, bottom_left_corner_point, top_right_corner_point, pixel_radius, fdtd_engine, material=SiO2, z_start=-0.11, z_end=0.11 , group_name = "pixels", matrix_mask = None, relaxing_time = 0, diff_ratio = 0.25):
+        PixelsRegionwithGroup.__init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, material,
+                                       z_start, z_end, group_name, matrix_mask, relaxing_time, diff_ratio)
+        self.pixel_radius = pixel_radius
+
+    def pixel_properties(self):
+        return {"pixel_radius": self.pixel_radius}
+
+    def pixel_script(self):
+        return "addcircle; \n" \
+               "set(\"x\", pixel_x*1e-6); \n" \
+               "set(\"y\", pixel_y*1e-6); \n" \
+               "set(\"radius\", (pixel_radius*pixel_value)*1e-6); \n"
+
+    def draw_pixel(self, cell, layer, center_point, value):
+        circle = Circle(center_point=center_point, radius=self.pixel_radius * value)
+        circle.draw(cell, layer)
+
+
+class RectanglePixelsRegionwithGroup(PixelsRegionwithGroup):
+    """
+    Rectangle pixels region for FDTD simulation managed by structuregroup. It will create a region with etched blocks that can be updated by a two-dimensional matrix.
 
     Parameters
     ----------
@@ -400,6 +515,161 @@ class RectanglePixelsRegion:
         The start point for the structure in z axis (unit: μm, default: -0.11).
     z_end : Float
         The end point for the structure in z axis (unit: μm, default: 0.11).
+    group_name : String
+        Unique name of the pixels for distinguishing different pixel region(default: "pixels").
+    matrix_mask : Array
+        Mask array for the matrix in update function (default: None).
+    relaxing_time : Float
+        Relaxing time for eval in Lumerical FDTD (unit: s, default: 0).
+    diff_ratio : Float
+        Maximum ratio of changed pixels for transferring only the changed pixels (default: 0.25).
+    """
+    def __init__(self, bottom_left_corner_point, top_right_corner_point, pixel_x_length, pixel_y_length, fdtd_engine, material=SiO2, z_start=-0.11, z_end=0.11 , group_name = "pixels", matrix_mask = None, relaxing_time = 0, diff_ratio = 0.25):
+        PixelsRegionwithGroup.__init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, material,
+                                       z_start, z_end, group_name, matrix_mask, relaxing_time, diff_ratio)
+        self.pixel_x_length = pixel_x_length
+        self.pixel_y_length = pixel_y_length
+
+    def pixel_properties(self):
+        return {"pixel_x_length": self.pixel_x_length, "pixel_y_length": self.pixel_y_length}
+
+    def pixel_script(self):
+        return "addrect; \n" \
+               "set(\"x\", pixel_x*1e-6); \n" \
+               "set(\"x span\", (pixel_x_length*pixel_value)*1e-6); \n" \
+               "set(\"y\", pixel_y*1e-6); \n" \
+               "set(\"y span\", (pixel_y_length*pixel_value)*1e-6); \n"
+
+    def draw_pixel(self, cell, layer, center_point, value):
+        rectangle = Rectangle(center_point=center_point, width=self.pixel_x_length * value, height=self.pixel_y_length * value)
+        rectangle.draw(cell, layer)
+
+
+class EllipsePixelsRegionwithGroup(PixelsRegionwithGroup):
+    """
+    Ellipse pixels region for FDTD simulation managed by structuregroup. It will create a region with etched blocks that can be updated by a two-dimensional matrix.
+
+    Parameters
+    ----------
+    bottom_left_corner_point : Point
+        Lower left corner of the region.
+    top_right_corner_point : Point
+        Upper right corner of the region.
+    pixel_x_radius : float
+        Radius of the pixel(etched block) in axis-x.
+    pixel_y_radius : float
+        Radius of the pixel(etched block) in axis-y.
+    fdtd_engine : FDTDSimulation
+        The FDTDSimulation object.
+    material : String
+        Material setting for the pixels in Lumerical FDTD (Si = "Si (Silicon) - Palik", SiO2 = "SiO2 (Glass) - Palik", default: SiO2).
+    z_start : Float
+        The start point for the structure in z axis (unit: μm, default: -0.11).
+    z_end : Float
+        The end point for the structure in z axis (unit: μm, default: 0.11).
+    group_name : String
+        Unique name of the pixels for distinguishing different pixel region(default: "pixels").
+    matrix_mask : Array
+        Mask array for the matrix in update function (default: None).
+    relaxing_time : Float
+        Relaxing time for eval in Lumerical FDTD (unit: s, default: 0).
+    diff_ratio : Float
+        Maximum ratio of changed pixels for transferring only the changed pixels (default: 0.25).
+    """
+    def __init__(self, bottom_left_corner_point, top_right_corner_point, pixel_x_radius, pixel_y_radius, fdtd_engine, material=SiO2, z_start=-0.11, z_end=0.11 , group_name = "pixels", matrix_mask = None, relaxing_time = 0, diff_ratio = 0.25):
+        PixelsRegionwithGroup.__init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, material,
+                                       z_start, z_end, group_name, matrix_mask, relaxing_time, diff_ratio)
+        self.pixel_x_radius = pixel_x_radius
+        self.pixel_y_radius = pixel_y_radius
+
+    def pixel_properties(self):
+        return {"pixel_x_radius": self.pixel_x_radius, "pixel_y_radius": self.pixel_y_radius}
+
+    def pixel_script(self):
+        return "addcircle; \n" \
+               "set(\"make ellipsoid\", 1); \n" \
+               "set(\"x\", pixel_x*1e-6); \n" \
+               "set(\"y\", pixel_y*1e-6); \n" \
+               "set(\"radius\", (pixel_x_radius*pixel_value)*1e-6); \n" \
+               "set(\"radius 2\", (pixel_y_radius*pixel_value)*1e-6); \n"
+
+    def draw_pixel(self, cell, layer, center_point, value):
+        ellipse = gdspy.Round((center_point.x, center_point.y), (self.pixel_x_radius * value, self.pixel_y_radius * value),
+                              tolerance=0.0001, layer=layer.layer, datatype=layer.datatype)
+        cell.cell.add(ellipse)
+
+
+class PolygonPixelsRegionwithGroup(PixelsRegionwithGroup):
+    """
+    Pixels region with arbitrary polygon unit cells for FDTD simulation managed by structuregroup. It will create a region with etched blocks that can be updated by a two-dimensional matrix.
+
+    Parameters
+    ----------
+    bottom_left_corner_point : Point
+        Lower left corner of the region.
+    top_right_corner_point : Point
+        Upper right corner of the region.
+    unit_cell_points : List of Tuple or Point
+        Vertices of the pixel(etched block) relative to the center of the pixel, the polygon is scaled by the matrix value.
+    fdtd_engine : FDTDSimulation
+        The FDTDSimulation object.
+    material : String
+        Material setting for the pixels in Lumerical FDTD (Si = "Si (Silicon) - Palik", SiO2 = "SiO2 (Glass) - Palik", default: SiO2).
+    z_start : Float
+        The start point for the structure in z axis (unit: μm, default: -0.11).
+    z_end : Float
+        The end point for the structure in z axis (unit: μm, default: 0.11).
+    group_name : String
+        Unique name of the pixels for distinguishing different pixel region(default: "pixels").
+    matrix_mask : Array
+        Mask array for the matrix in update function (default: None).
+    relaxing_time : Float
+        Relaxing time for eval in Lumerical FDTD (unit: s, default: 0).
+    diff_ratio : Float
+        Maximum ratio of changed pixels for transferring only the changed pixels (default: 0.25).
+    """
+    def __init__(self, bottom_left_corner_point, top_right_corner_point, unit_cell_points, fdtd_engine, material=SiO2, z_start=-0.11, z_end=0.11 , group_name = "pixels", matrix_mask = None, relaxing_time = 0, diff_ratio = 0.25):
+        PixelsRegionwithGroup.__init__(self, bottom_left_corner_point, top_right_corner_point, fdtd_engine, material,
+                                       z_start, z_end, group_name, matrix_mask, relaxing_time, diff_ratio)
+        self.unit_cell_points = np.array([item.to_tuple() if type(item) == Point else tuple(item) for item in unit_cell_points], dtype=np.double)
+
+    def pixel_properties(self):
+        return {"unit_cell_vertices": self.unit_cell_points}
+
+    def pixel_script(self):
+        return "addpoly; \n" \
+               "set(\"x\", pixel_x*1e-6); \n" \
+               "set(\"y\", pixel_y*1e-6); \n" \
+               "set(\"vertices\", unit_cell_vertices*pixel_value*1e-6); \n"
+
+    def draw_pixel(self, cell, layer, center_point, value):
+        polygon = gdspy.Polygon(self.unit_cell_points * value + np.array([center_point.x, center_point.y]),
+                                layer=layer.layer, datatype=layer.datatype)
+        cell.cell.add(polygon)
+
+
+class RectanglePixelsRegion:
+    """
+    Rectangle pixels region for FDTD simulation. It will create a region with etched blocks that can be updated by a two-dimensional matrix.
+
+    Parameters
+    ----------
+    bottom_left_corner_point : Point
+        Lower left corner of the region.
+    top_right_corner_point : Point
+        Upper right corner of the region.
+    pixel_x_length : float
+        Length of the pixel(etched block) in axis-x.
+    pixel_y_length : float
+        Length of the pixel(etched block) in axis-y.
+    fdtd_engine : FDTDSimulation or FDFDSimulation
+        The FDTDSimulation object (or the FDFDSimulation object).
+    material : String
+        Material setting for the pixels in Lumerical FDTD (Si = "Si (Silicon) - Palik", SiO2 = "SiO2 (Glass) - Palik", default: SiO2).
+    z_start : Float
+        The start point for the structure in z axis (unit: μm, default: -0.11).
+    z_end : Float
+        The end point for the structure in z axis (unit: μm, default: 0.11).
     group_name : String
         Unique name of the pixels for distinguishing different pixel region.
     matrix_mask : Array
@@ -430,6 +700,11 @@ class RectanglePixelsRegion:
         self.block_y_length = np.abs(self.left_down_point.y - self.right_up_point.y) / self.__lastest_array.shape[1]
         self.x_start_point = self.left_down_point.x + self.block_x_length/2
         self.y_start_point = self.right_up_point.y - self.block_y_length/2
+        if (type(self.fdtd_engine) == FDFDSimulation):
+            for row in range(0, self.__lastest_array.shape[1]):
+                for col in range(0, self.__lastest_array.shape[0]):
+                    self.__put_pixel_on_fdfd(col, row)
+            return
         command = ""
         for row in range(0, self.__lastest_array.shape[1]):
             for col in range(0, self.__lastest_array.shape[0]):
@@ -483,6 +758,18 @@ class RectanglePixelsRegion:
 
 
 
+    def __put_pixel_on_fdfd(self, col, row):
+        center_point = Point(self.x_start_point + col * self.block_x_length, self.y_start_point - row * self.block_y_length)
+        x_length = min(self.pixel_x_length * self.__lastest_array[col, row], self.pixel_x_length)
+        y_length = min(self.pixel_y_length * self.__lastest_array[col, row], self.pixel_y_length)
+        name = self.group_name + str(col) + "_" + str(row)
+        self.fdtd_engine.put_rectangle(center_point - (x_length / 2, y_length / 2), center_point + (x_length / 2, y_length / 2),
+                                       self.z_start, self.z_end, self.material, name)
+        if (x_length < 0.001 or y_length < 0.001):
+            self.fdtd_engine.set_disable(name)
+        else:
+            self.fdtd_engine.set_enable(name)
+
     def update(self, matrix):
         '''
         Update pixel region according to the new matrix. For the first time it is called, the pixels will be created in the FDTD simulation CAD. In the following update process, it will enable/disable correspoinding pixels.
@@ -516,6 +803,10 @@ class RectanglePixelsRegion:
             self.__diff = self.__lastest_array - self.__last_array
             self.__last_array = np.array(masked_matrix,dtype=np.double)
             reconfig_positions = np.where(~np.isclose(np.abs(self.__diff), 0))
+            if (type(self.fdtd_engine) == FDFDSimulation):
+                for position in np.transpose(reconfig_positions):
+                    self.__put_pixel_on_fdfd(position[0], position[1])
+                return
             command = ""
             for position in np.transpose(reconfig_positions):
                 x_length = self.pixel_x_length * self.__lastest_array[position[0], position[1]]
@@ -540,7 +831,7 @@ class RectanglePixelsRegion:
                 else:
                     command += 'set("enabled", 1);'
 
-            self.fdtd_engine.fdtd.eval("clear;")
+            self.fdtd_engine.eval("clear;")
             command_list = command.split(";")[:-1]
             block_length = int(len(command_list) / 10000) + 1
             for i in range(0, block_length):
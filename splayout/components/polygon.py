@@ -2,6 +2,7 @@ from ..utils.utils import *
 import numpy as np
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 class Polygon:
     """
@@ -90,10 +91,10 @@ class Polygon:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 engine.put_polygon(tuple_list = self.tuple_list,
                                    z_start = self.z_start,
@@ -3,6 +3,7 @@ from ..components.waveguide import Waveguide
 from ..components.bend import Bend
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 ## anticlockwise
 class AQuarBend:
@@ -98,10 +99,10 @@ class AQuarBend:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 self.first_waveguide.draw_on_lumerical_CAD(engine)
                 self.center_bend.draw_on_lumerical_CAD(engine)
@@ -111,6 +112,17 @@ class AQuarBend:
         else:
             raise Exception("Wrong CAD engine!")
 
+    def get_round_parameters(self):
+        """
+        Derive the ring primitive parameters of the bends in the quarter bend.
+
+        Returns
+        -------
+        out : List of Tuple
+            List of (center_point, inner_radius, outer_radius, start_radian, end_radian), which can be drawn by put_rounds.
+        """
+        return [self.center_bend.get_round_parameters()]
+
     def get_start_point(self):
         """
         Derive the start point of the connector.
@@ -226,10 +238,10 @@ class QuarBend:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 self.first_waveguide.draw_on_lumerical_CAD(engine)
                 self.center_bend.draw_on_lumerical_CAD(engine)
@@ -239,6 +251,17 @@ class QuarBend:
         else:
             raise Exception("Wrong CAD engine!")
 
+    def get_round_parameters(self):
+        """
+        Derive the ring primitive parameters of the bends in the quarter bend.
+
+        Returns
+        -------
+        out : List of Tuple
+            List of (center_point, inner_radius, outer_radius, start_radian, end_radian), which can be drawn by put_rounds.
+        """
+        return [self.center_bend.get_round_parameters()]
+
     def get_start_point(self):
         """
         Derive the start point of the connector.
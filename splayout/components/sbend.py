@@ -2,6 +2,7 @@ from ..utils.utils import *
 from ..components.bend import Bend
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 class SBend:
     """
@@ -141,10 +142,10 @@ class SBend:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 self.first_bend.draw_on_lumerical_CAD(engine)
                 self.second_bend.draw_on_lumerical_CAD(engine)
@@ -153,6 +154,17 @@ class SBend:
         else:
             raise Exception("Wrong CAD engine!")
 
+    def get_round_parameters(self):
+        """
+        Derive the ring primitive parameters of the bends in the S-bend.
+
+        Returns
+        -------
+        out : List of Tuple
+            List of (center_point, inner_radius, outer_radius, start_radian, end_radian), which can be drawn by put_rounds.
+        """
+        return [self.first_bend.get_round_parameters(), self.second_bend.get_round_parameters()]
+
     def get_start_point(self):
         """
         Derive the start point of the S-Bend.
@@ -327,10 +339,10 @@ class ASBend:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
-        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+        if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
             if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                 self.first_bend.draw_on_lumerical_CAD(engine)
                 self.second_bend.draw_on_lumerical_CAD(engine)
@@ -339,6 +351,17 @@ class ASBend:
         else:
             raise Exception("Wrong CAD engine!")
 
+    def get_round_parameters(self):
+        """
+        Derive the ring primitive parameters of the bends in the S-bend.
+
+        Returns
+        -------
+        out : List of Tuple
+            List of (center_point, inner_radius, outer_radius, start_radian, end_radian), which can be drawn by put_rounds.
+        """
+        return [self.first_bend.get_round_parameters(), self.second_bend.get_round_parameters()]
+
     def get_start_point(self):
         """
         Derive the start point of the S-Bend.
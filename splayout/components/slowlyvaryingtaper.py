@@ -1,6 +1,7 @@
 from ..utils.utils import *
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 class SlowlyVaryingTaper:
     """
@@ -119,13 +120,13 @@ class SlowlyVaryingTaper:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
         taper_pts = [(self.lower_left_x, self.lower_left_y), (self.lower_right_x, self.lower_right_y),
                      (self.upper_right_x, self.upper_right_y), (self.upper_left_x, self.upper_left_y)]
         if (self.ifexist):
-            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
                 if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(
                         None)):
                     engine.put_polygon(tuple_list=taper_pts,
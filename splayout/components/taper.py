@@ -1,6 +1,7 @@
 from ..utils.utils import *
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 
 class Taper():
     """
@@ -102,13 +103,13 @@ class Taper():
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
         taper_pts = [(self.down_left_x, self.down_left_y), (self.down_right_x, self.down_right_y),
                      (self.up_right_x, self.up_right_y), (self.up_left_x, self.up_left_y)]
         if (self.ifexist):
-            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
                 if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                     engine.put_polygon(tuple_list = taper_pts,
                                        z_start = self.z_start,
@@ -1,6 +1,7 @@
 from ..utils.utils import *
 from ..lumericalcommun.fdtdapi import FDTDSimulation
 from ..lumericalcommun.modeapi import MODESimulation
+from ..solvers.fdfd2d import FDFDSimulation
 from ..components.polygon import Polygon
 
 class Waveguide:
@@ -87,11 +88,11 @@ class Waveguide:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
         if (self.ifexist):
-            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
                 if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                     engine.put_rectangle((self.down_left_x, self.down_left_y), (self.up_right_x, self.up_right_y), self.z_start, self.z_end, self.material, self.rename)
                 else:
@@ -194,11 +195,11 @@ class ArbitraryAngleWaveguide:
 
         Parameters
         ----------
-        engine : FDTDSimulation or MODESimulation
+        engine : FDTDSimulation or MODESimulation or FDFDSimulation
             CAD to draw the component.
         """
         if (self.ifexist):
-            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation)):
+            if ((type(engine) == FDTDSimulation) or (type(engine) == MODESimulation) or (type(engine) == FDFDSimulation)):
                 if (type(self.z_start) != type(None) and type(self.z_end) != type(None) and type(self.material) != type(None) ):
                     self.waveguide.draw_on_lumerical_CAD(engine)
                 else:
@@ -1,5 +1,10 @@
 from ..utils.utils import *
+from ..solvers.modesolver import mode_profile_to_imported_source
 import sys, os
+import re
+import hashlib
+import shutil
+import threading
 import numpy as np
 import scipy.constants
 
@@ -49,12 +54,29 @@ class FDTDSimulation:
 
         self.lumapi = lumapi
         self.fdtd = self.lumapi.FDTD(hide=hide)
+        self.__fdtd_path = fdtd_path
         if (type(load_file) != type(None)):
             self.fdtd.eval("load(\"" + load_file + "\");")
         self.global_monitor_set_flag = 0
         self.global_source_set_flag = 0
         self.__buffer = ""
         self.__port_group_name = "ports"
+        self.__save_mode = "always"
+        self.__scratch_dir = None
+        self.__checkpoint_filename = None
+        self.__checkpoint_interval = 0
+        self.__background_checkpoint = 1
+        self.__checkpoint_thread = None
+        self.__saved_file = None
+        self.__run_count = 0
+        self.__state_mirror = 0
+        self.__verify_state_mirror = 0
+        self.__state = {}
+        self.__elided_command_count = 0
+        self.invalidate_state_mirror()
+        self.__transfer_cache = 0
+        self.__variable_hashes = {}
+        self.__transfer_statistics = {"sent": 0, "skipped": 0, "patched": 0, "bytes_sent": 0, "bytes_saved": 0}
 
     def add_structure_from_gdsii(self,filename,cellname,layer=1,datatype=0,material=Si, z_start = -0.11, z_end = 0.11,rename = None):
         """
@@ -447,21 +469,21 @@ class FDTDSimulation:
             wavelength = np.flip(self.get_wavelength())
             frequency = np.flip(self.get_frequency())
 
-            self.fdtd.putv("lam", wavelength)
-            self.fdtd.putv("f", frequency)
-            self.fdtd.putv("Ex", E[:, :, :, :, 0])
-            self.fdtd.putv("Ey", E[:, :, :, :, 1])
-            self.fdtd.putv("Ez", E[:, :, :, :, 2])
-            self.fdtd.putv("x", origin_x)
-            self.fdtd.putv("y", origin_y)
-            self.fdtd.putv("z", origin_z)
+            self.putv("lam", wavelength)
+            self.putv("f", frequency)
+            self.putv("Ex", E[:, :, :, :, 0])
+            self.putv("Ey", E[:, :, :, :, 1])
+            self.putv("Ez", E[:, :, :, :, 2])
+            self.putv("x", origin_x)
+            self.putv("y", origin_y)
+            self.putv("z", origin_z)
             self.fdtd.eval("EM = rectilineardataset(\"EM fields\",x,y,z);")
             self.fdtd.eval("EM.addparameter(\"lambda\", lam, \"f\", f);")
             self.fdtd.eval("EM.addattribute(\"E\", Ex, Ey, Ez);")
             if (type(H) != type(None)):
-                self.fdtd.putv("Hx", H[:, :, :, :, 0])
-                self.fdtd.putv("Hy", H[:, :, :, :, 1])
-                self.fdtd.putv("Hz", H[:, :, :, :, 2])
+                self.putv("Hx", H[:, :, :, :, 0])
+                self.putv("Hy", H[:, :, :, :, 1])
+                self.putv("Hz", H[:, :, :, :, 2])
                 self.fdtd.eval("EM.addattribute(\"H\", Hx, Hy, Hz);")
             self.fdtd.eval("importdataset(EM);")
 
@@ -499,8 +521,11 @@ class FDTDSimulation:
         -----
         This function should be called after setting a source.
         """
+        if self.__mirror_unchanged("amplitude", source_name, amplitude):
+            return
         self.fdtd.eval("select(\"" + source_name + "\");")
         self.fdtd.eval("set(\"amplitude\"," + str(amplitude) + ");")
+        self.__mirror_set("amplitude", source_name, amplitude)
 
     def reset_source_phase(self, source_name, phase):
         """
@@ -517,8 +542,11 @@ class FDTDSimulation:
         -----
         This function should be called after setting a source.
         """
+        if self.__mirror_unchanged("phase", source_name, phase):
+            return
         self.fdtd.eval("select(\"" + source_name + "\");")
         self.fdtd.eval("set(\"phase\"," +  "%.6f"%(phase) + ");")
+        self.__mirror_set("phase", source_name, phase)
 
 
     def add_fdtd_region(self,bottom_left_corner_point,top_right_corner_point,simulation_time=5000, background_material = None,
@@ -717,7 +745,8 @@ class FDTDSimulation:
         self.fdtd.eval("set(\"spatial interpolation\",\"none\");")
 
 
-    def add_field_region(self, bottom_left_corner_point, top_right_corner_point, height = 1, z_min = None, z_max = None, field_monitor_name="field",dimension = 2):
+    def add_field_region(self, bottom_left_corner_point, top_right_corner_point, height = 1, z_min = None, z_max = None, field_monitor_name="field",dimension = 2,
+                         frequency_indices = None, down_sample = 1):
         """
         Add field monitor in Lumerical FDTD (DFT Frequency monitor).
 
@@ -737,11 +766,20 @@ class FDTDSimulation:
             Name of the monitor in Lumerical FDTD (default: "field").
         dimension : Int
             Dimension of monitor (default: 2).
+        frequency_indices : List of Int
+            Indices of the global frequency points (as get_wavelength) recorded by the monitor (default: None, all the
+            frequency points).
+        down_sample : Int
+            Spatial down sampling factor of the monitor in each axis (default: 1).
 
         Notes
         -----
         If z_min and z_max are specified, the height property will be invalid.
+        The frequency_indices requires the global source and monitor settings (e.g. add_mode_expansion and a source)
+        to be set before the field region.
         """
+        if (down_sample < 1):
+            raise Exception("The down_sample should be at least 1.")
         self.fdtd.eval("addpower;")
         self.fdtd.eval("set(\"name\",\"" + field_monitor_name + "\");")
 
@@ -768,7 +806,24 @@ class FDTDSimulation:
         self.fdtd.eval("set(\"x span\"," +  "%.6f"%(x_span) + "e-6);")
         self.fdtd.eval("set(\"y\"," +  "%.6f"%(position.y) + "e-6);")
         self.fdtd.eval("set(\"y span\"," +  "%.6f"%(y_span) + "e-6);")
-        self.fdtd.eval("set(\"override global monitor settings\",0);")
+        if (type(frequency_indices) == type(None) and down_sample == 1):
+            self.fdtd.eval("set(\"override global monitor settings\",0);")
+        else:
+            self.fdtd.eval("set(\"override global monitor settings\",1);")
+            if (type(frequency_indices) == type(None)):
+                self.fdtd.eval("set(\"use source limits\",1);" +
+                               "set(\"use wavelength spacing\",1);" +
+                               "set(\"frequency points\",getglobalmonitor(\"frequency points\"));")
+            else:
+                frequency = self.get_frequency()[np.unique(np.array([frequency_indices]).flatten().astype(int))]
+                self.putv("splayout_frequency_samples", frequency, cache = 0)
+                self.fdtd.eval("set(\"sample spacing\",\"custom\");" +
+                               "set(\"custom frequency samples\",splayout_frequency_samples);" +
+                               "clear(splayout_frequency_samples);")
+            self.fdtd.eval("set(\"down sample X\"," + str(int(down_sample)) + ");")
+            self.fdtd.eval("set(\"down sample Y\"," + str(int(down_sample)) + ");")
+            if (dimension == 3):
+                self.fdtd.eval("set(\"down sample Z\"," + str(int(down_sample)) + ");")
         self.fdtd.eval("set(\"spatial interpolation\",\"none\");")
 
     def add_field_monitor(self, position, width=2, height=0.8, z_min=None, z_max=None, monitor_name="field_monitor",
@@ -878,7 +933,8 @@ class FDTDSimulation:
 
     def save(self,filename="temp"):
         """
-        Save the simulation as a ".fsp" file.
+        Save the simulation as a ".fsp" file, the open project becomes this file (run with save_mode "once" saves again
+        before running under another filename).
 
         Parameters
         ----------
@@ -899,7 +955,47 @@ class FDTDSimulation:
             self.fdtd.save(filepath)
         else:
             self.fdtd.save(filename)
+        self.__saved_file = filename
+
+
+    def load(self, filename):
+        """
+        Load a ".fsp" file into the simulation, the mirrored session states and the putv cache are dropped.
 
+        Parameters
+        ----------
+        filename : String
+            File path of the project.
+        """
+        self.wait_for_checkpoint()
+        self.fdtd.eval("load(\"" + filename + "\");")
+        self.invalidate_state_mirror()
+        self.invalidate_transfer_cache()
+        self.__saved_file = None
+
+    def clone(self, hide = 1):
+        """
+        Open another Lumerical FDTD session with the same Lumerical installation, e.g. for running independent
+        simulations in parallel. The new session is empty, use load to copy a saved project into it.
+
+        Parameters
+        ----------
+        hide : Bool
+            Whether the Lumerical window of the new session is hidden (default: True).
+
+        Returns
+        -------
+        out : FDTDSimulation
+            The new simulation.
+        """
+        return FDTDSimulation(hide=hide, fdtd_path=self.__fdtd_path)
+
+    def close(self):
+        """
+        Close the Lumerical FDTD session.
+        """
+        self.wait_for_checkpoint()
+        self.fdtd.close()
 
     def run(self,filename="temp"):
         """
@@ -909,11 +1005,97 @@ class FDTDSimulation:
         ----------
         filename : String
             File name or File path (default: "temp").
-        """
-        self.save(filename)
+
+        Notes
+        -----
+        The saving behavior can be changed by set_run_save_mode, e.g. keeping the project file in a RAM-backed scratch
+        directory and saving checkpoints only every few runs.
+        """
+        self.wait_for_checkpoint()
+        if (type(self.__scratch_dir) != type(None)):
+            if not os.path.isdir(self.__scratch_dir):
+                os.makedirs(self.__scratch_dir)
+            filename = os.path.join(self.__scratch_dir, os.path.basename(filename))
+        if (self.__save_mode == "always" or self.__saved_file != filename):
+            self.save(filename)
         self.fdtd.eval("switchtolayout;")
         while(self.fdtd.layoutmode()):
             self.fdtd.eval("run;")
+        self.__mirror_set("mode", "layout", 0)
+        self.__run_count += 1
+        if (self.__checkpoint_interval > 0 and self.__run_count % self.__checkpoint_interval == 0):
+            self.checkpoint()
+
+    def set_run_save_mode(self, save_mode = "always", scratch_dir = None, checkpoint_filename = None, checkpoint_interval = 0, background_checkpoint = 1):
+        """
+        Set how the project file is saved in run.
+
+        Parameters
+        ----------
+        save_mode : String
+            "always": save the project before every run (default); "once": only save the project when the file name
+            changes, the following runs reuse the project file (Lumerical still writes the file it runs).
+        scratch_dir : String
+            Directory for the project files of run, e.g. a RAM-backed directory like "/dev/shm/splayout" (default: None,
+            the file name of run is used as it is).
+        checkpoint_filename : String
+            File path for persisting the project file (default: None, no checkpoint).
+        checkpoint_interval : Int
+            Persist the project file to checkpoint_filename every checkpoint_interval runs (default: 0, only when
+            checkpoint is called).
+        background_checkpoint : Bool
+            Whether the project file is copied to checkpoint_filename in a background thread (default: True).
+        """
+        if (save_mode != "always" and save_mode != "once"):
+            raise Exception("Wrong save_mode, it should be \"always\" or \"once\"!")
+        self.wait_for_checkpoint()
+        self.__save_mode = save_mode
+        self.__scratch_dir = scratch_dir
+        self.__checkpoint_filename = checkpoint_filename
+        self.__checkpoint_interval = checkpoint_interval
+        self.__background_checkpoint = background_checkpoint
+        self.__saved_file = None
+
+    def checkpoint(self, checkpoint_filename = None):
+        """
+        Persist the last saved project file (including the results of the last run) to the checkpoint file.
+
+        Parameters
+        ----------
+        checkpoint_filename : String
+            File path for the checkpoint (default: None, the checkpoint_filename of set_run_save_mode is used).
+        """
+        if (type(checkpoint_filename) == type(None)):
+            checkpoint_filename = self.__checkpoint_filename
+        if (type(checkpoint_filename) == type(None)):
+            raise Exception("The checkpoint_filename is not specified!")
+        if (type(self.__saved_file) == type(None)):
+            raise Exception("The simulation has not been saved!")
+        source_file = os.path.abspath(self.__saved_file)
+        if not source_file.endswith(".fsp"):
+            source_file += ".fsp"
+        checkpoint_filename = os.path.abspath(checkpoint_filename)
+        if not checkpoint_filename.endswith(".fsp"):
+            checkpoint_filename += ".fsp"
+        if (source_file == checkpoint_filename):
+            return
+        checkpoint_dir = os.path.split(checkpoint_filename)[0]
+        if not os.path.isdir(checkpoint_dir):
+            os.makedirs(checkpoint_dir)
+        self.wait_for_checkpoint()
+        if (self.__background_checkpoint):
+            self.__checkpoint_thread = threading.Thread(target=shutil.copyfile, args=(source_file, checkpoint_filename))
+            self.__checkpoint_thread.start()
+        else:
+            shutil.copyfile(source_file, checkpoint_filename)
+
+    def wait_for_checkpoint(self):
+        """
+        Wait until the background checkpoint is finished.
+        """
+        if (type(self.__checkpoint_thread) != type(None)):
+            self.__checkpoint_thread.join()
+            self.__checkpoint_thread = None
 
     def get_transmission(self,monitor_name,datafile = None):
         """
@@ -1359,6 +1541,7 @@ class FDTDSimulation:
         Clear the pre-saved data in CAD.
         """
         self.fdtd.eval("clear;")
+        self.invalidate_transfer_cache()
 
 
 
@@ -1366,7 +1549,10 @@ class FDTDSimulation:
         """
         Switch the Lumerical FDTD simulation to "Layout" mode.
         """
+        if self.__mirror_unchanged("mode", "layout", 1):
+            return
         self.fdtd.eval("switchtolayout;")
+        self.__mirror_set("mode", "layout", 1)
 
     def set_disable(self,item_name):
         """
@@ -1384,12 +1570,19 @@ class FDTDSimulation:
         if (type(item_name) == list or type(item_name) == np.ndarray):
             scripts = ""
             for name in item_name:
+                if self.__mirror_unchanged("enabled", name, 0):
+                    continue
                 scripts += "select(\"" + name + "\");"
                 scripts += "set(\"enabled\",0);"
-            self.fdtd.eval(scripts)
+                self.__mirror_set("enabled", name, 0)
+            if (scripts != ""):
+                self.fdtd.eval(scripts)
         else:
-            self.fdtd.eval("select(\""+item_name+"\");")
+            if self.__mirror_unchanged("enabled", item_name, 0):
+                return
+            self.fdtd.eval("select(\"" + item_name + "\");")
             self.fdtd.eval("set(\"enabled\",0);")
+            self.__mirror_set("enabled", item_name, 0)
 
     def set_enable(self,item_name):
         """
@@ -1407,12 +1600,19 @@ class FDTDSimulation:
         if (type(item_name) == list or type(item_name) == np.ndarray):
             scripts = ""
             for name in item_name:
+                if self.__mirror_unchanged("enabled", name, 1):
+                    continue
                 scripts += "select(\"" + name + "\");"
                 scripts += "set(\"enabled\",1);"
-            self.fdtd.eval(scripts)
+                self.__mirror_set("enabled", name, 1)
+            if (scripts != ""):
+                self.fdtd.eval(scripts)
         else:
+            if self.__mirror_unchanged("enabled", item_name, 1):
+                return
             self.fdtd.eval("select(\"" + item_name + "\");")
             self.fdtd.eval("set(\"enabled\",1);")
+            self.__mirror_set("enabled", item_name, 1)
 
     def reset_wavelengths_of_sources(self, wavelength_start, wavelength_end):
         """
@@ -1490,9 +1690,11 @@ class FDTDSimulation:
             for name in item_name:
                 self.fdtd.eval("select(\"" + name + "\");")
                 self.fdtd.eval("delete;")
+                self.__mirror_remove(name)
         else:
             self.fdtd.eval("select(\"" + item_name + "\");")
             self.fdtd.eval("delete;")
+            self.__mirror_remove(item_name)
 
     @staticmethod
     def str_list(list):
@@ -1542,6 +1744,44 @@ class FDTDSimulation:
             string +=  "%.6f"%(tuple_list[-1][0])+"e-6,"+  "%.6f"%(tuple_list[-1][1]) + "e-6]"
         return string
 
+    @staticmethod
+    def lumerical_matrix(tuple_list):
+        """
+        Convert a tuple list to a vertices matrix that can be transferred to Lumerical in binary form.
+
+        Parameters
+        ----------
+        tuple_list : List
+            The List for conversion (unit: μm).
+
+        Returns
+        -------
+        out : Array
+            A (N, 2) float64 array of the vertices (unit: m).
+
+        Notes
+        -----
+        Compared with lumerical_list, the vertices are not formatted into a script String, so no precision is lost
+        and Lumerical does not need to parse a huge script for polygons with plenty of vertices.
+        """
+        tuple_list = [item.to_tuple() if type(item) == Point else item for item in tuple_list]
+        return np.asarray(tuple_list, dtype=np.float64).reshape(-1, 2) * 1e-6
+
+    def set_vertices(self, vertices):
+        """
+        Set the vertices of the selected polygon through a binary transfer.
+
+        Parameters
+        ----------
+        vertices : List of Tuple or Point
+            Points for the polygon (unit: μm).
+        """
+        if len(vertices) == 0:
+            self.fdtd.eval("set(\"vertices\",[]);")
+        else:
+            self.putv("splayout_polygon_vertices", self.lumerical_matrix(vertices), cache=0)
+            self.fdtd.eval("set(\"vertices\",splayout_polygon_vertices);clear(splayout_polygon_vertices);")
+
     def put_rectangle(self, bottom_left_corner_point, top_right_corner_point, z_start, z_end, material, rename):
         '''
         Draw a rectangle on the fdtd simulation CAD.
@@ -1599,9 +1839,8 @@ class FDTDSimulation:
         rename : String
             New name of the structure in Lumerical.
         '''
-        lumerical_list = self.lumerical_list(tuple_list)
         self.fdtd.eval("addpoly;")
-        self.fdtd.eval("set(\"vertices\","+lumerical_list+");")
+        self.set_vertices(tuple_list)
         self.fdtd.eval("set(\"x\",0);")
         self.fdtd.eval("set(\"y\",0);")
         self.fdtd.eval("set(\"z min\"," +  "%.6f"%(z_start) + "e-6);")
@@ -1643,8 +1882,7 @@ class FDTDSimulation:
             else:
                 raise Exception("Polygon Wrong Type Input!")
         self.fdtd.eval("select(\"{0}\");".format(polygon_name))
-        lumerical_list = self.lumerical_list(tuple_list)
-        self.fdtd.eval("set(\"vertices\"," + lumerical_list + ");")
+        self.set_vertices(tuple_list)
 
 
     def put_round(self, center_point, inner_radius, outer_radius, start_radian, end_radian, z_start, z_end, material, rename):
@@ -1694,6 +1932,36 @@ class FDTDSimulation:
             self.fdtd.eval("set(\"name\",\"" + rename + "\");")
 
 
+    def put_rounds(self, round_list, z_start, z_end, material, rename, as_group = 0):
+        '''
+        Draw a batch of rounds on the fdtd simulation CAD with a single transfer.
+
+        Parameters
+        ----------
+        round_list : List of Tuple
+            Rounds in the form of (center_point, inner_radius, outer_radius, start_radian, end_radian), e.g. the
+            outputs of Bend.get_round_parameters().
+        z_start : Float
+            The start point for the structure in z axis (unit: μm).
+        z_end : Float
+            The end point for the structure in z axis (unit: μm).
+        material : str or float
+            Material setting for the structure in Lumerical FDTD (SiO2 = "SiO2 (Glass) - Palik", SiO2 = "SiO2 (Glass) - Palik", default: SiO2). When it is a float, the material in FDTD will be
+            <Object defined dielectric>, and index will be defined.
+        rename : String
+            New name of the structures in Lumerical (the name of the structure group if as_group is True).
+        as_group : Bool
+            Whether to build the rounds in a structure group parameterized by the round matrix (default: False).
+
+        Notes
+        -----
+        The rounds are sent as a (N, 6) matrix [x, y, inner radius, outer radius, theta start, theta stop] and built
+        with ring primitives by a script loop (see draw_rounds_by_script), instead of one script command per property
+        and round.
+        '''
+        draw_rounds_by_script(lambda name, value: self.putv(name, value, cache=0), self.fdtd.eval, round_list, z_start,
+                              z_end, material, rename, as_group)
+
     def add_structure_circle(self, center_point, radius, material=SiO2, z_start = -0.11, z_end = 0.11,rename = "circle"):
         '''
         Draw the a circle on the simulation CAD.
@@ -1776,7 +2044,12 @@ class FDTDSimulation:
         command : str
             Command that can be evaluated in fdtd.
         '''
-        self.fdtd.eval(command)
+        try:
+            self.fdtd.eval(command)
+        finally:
+            ## a failed script may have been partially executed
+            self.__mirror_invalidate_by_script(command)
+            self.__transfer_cache_invalidate_by_script(command)
 
 
     def add_electric_dipole(self, center_point, source_name = "source", z_min = 0
@@ -1953,43 +2226,118 @@ class FDTDSimulation:
         wavelength = np.flip(self.get_wavelength())
         frequency = np.flip(self.get_frequency())
 
-        self.fdtd.putv("lam", wavelength)
-        self.fdtd.putv("f", frequency)
-        self.fdtd.putv("Ex", E[:, :, :, :, 0])
-        self.fdtd.putv("Ey", E[:, :, :, :, 1])
-        self.fdtd.putv("Ez", E[:, :, :, :, 2])
+        self.putv("lam", wavelength)
+        self.putv("f", frequency)
+        self.putv("Ex", E[:, :, :, :, 0])
+        self.putv("Ey", E[:, :, :, :, 1])
+        self.putv("Ez", E[:, :, :, :, 2])
         self.fdtd.eval("select(\"" + source_name + "\");")
 
         self.fdtd.eval("set(\"amplitude\"," + "%.6f" % (amplitude) + ");")
         self.fdtd.eval("set(\"phase\"," + "%.6f" % (phase) + ");")
 
-        self.fdtd.putv("x", origin_x)
-        self.fdtd.putv("y", origin_y)
-        self.fdtd.putv("z", origin_z)
+        self.putv("x", origin_x)
+        self.putv("y", origin_y)
+        self.putv("z", origin_z)
         self.fdtd.eval("EM = rectilineardataset(\"EM fields\",x,y,z);")
         self.fdtd.eval("EM.addparameter(\"lambda\", lam, \"f\", f);")
         self.fdtd.eval("EM.addattribute(\"E\", Ex, Ey, Ez);")
         if (type(H) != type(None)):
-            self.fdtd.putv("Hx", H[:, :, :, :, 0])
-            self.fdtd.putv("Hy", H[:, :, :, :, 1])
-            self.fdtd.putv("Hz", H[:, :, :, :, 2])
+            self.putv("Hx", H[:, :, :, :, 0])
+            self.putv("Hy", H[:, :, :, :, 1])
+            self.putv("Hz", H[:, :, :, :, 2])
             self.fdtd.eval("EM.addattribute(\"H\", Hx, Hy, Hz);")
         self.fdtd.eval("importdataset(EM);")
 
 
 
+    def add_mode_profile_source(self, position, mode_profile, mode_number = 1, source_name = "source", amplitude = 1,
+                                phase = 0, direction = FORWARD, normal_direction = HORIZONTAL):
+        """
+        Add a mode source from a solved mode profile (ModeProfileCache.get_channel_modes) as an imported source, so that
+        the mode is not solved by Lumerical in every run.
+
+        Parameters
+        ----------
+        position : Point or tuple
+            Center point of the source.
+        mode_profile : Dict
+            Profile from ModeProfileCache.get_channel_modes at the wavelengths of the simulation, u is the transverse
+            axis in the x-y plane (relative to the position) and v is the z axis.
+        mode_number : Int
+            The selected mode index (start from 1, default: 1).
+        source_name : String
+            Name of the source in Lumerical FDTD (default: "source").
+        amplitude : Float or Int
+            The amplitude of the source.
+        phase : Float or Int
+            The phase of the source.
+        direction : Int
+            The light propagation direction 1: the positive direction of the axis, 0: the negative direction (FORWARD:1,
+            BACKWARD:0 , default: FORWARD).
+        normal_direction : HORIZONAL or VERTICAL
+            The direction of the source. HORIZONAL: x-normal, VERTICAL: y-normal.
+
+        Notes
+        -----
+        This function should be called after setting the frequency points in any frequency domain monitor.
+        """
+        origin_x, origin_y, origin_z, E, H = mode_profile_to_imported_source(mode_profile, position,
+                                                                             np.flip(self.get_wavelength()),
+                                                                             mode_number, normal_direction, direction)
+        width = mode_profile["u"].max() - mode_profile["u"].min()
+        self.add_imported_source(position, width, height=mode_profile["v"].max() - mode_profile["v"].min(),
+                                 origin_x=origin_x, origin_y=origin_y, origin_z=origin_z, E=E, H=H,
+                                 z_min=mode_profile["v"].min(), z_max=mode_profile["v"].max(), source_name=source_name,
+                                 amplitude=amplitude, phase=phase, direction=direction,
+                                 normal_direction=normal_direction)
+
+    def reset_mode_profile_source(self, position, mode_profile, mode_number = 1, source_name = "source", amplitude = 1,
+                                  phase = 0, direction = FORWARD, normal_direction = HORIZONTAL):
+        """
+        Reset a mode source added by add_mode_profile_source with another mode profile.
+
+        Parameters
+        ----------
+        position : Point or tuple
+            Center point of the source.
+        mode_profile : Dict
+            Profile from ModeProfileCache.get_channel_modes at the wavelengths of the simulation.
+        mode_number : Int
+            The selected mode index (start from 1, default: 1).
+        source_name : String
+            Name of the source in Lumerical FDTD (default: "source").
+        amplitude : Float or Int
+            The amplitude of the source.
+        phase : Float or Int
+            The phase of the source.
+        direction : Int
+            The light propagation direction of the profile (FORWARD:1, BACKWARD:0 , default: FORWARD).
+        normal_direction : HORIZONAL or VERTICAL
+            The direction of the source. HORIZONAL: x-normal, VERTICAL: y-normal.
+        """
+        origin_x, origin_y, origin_z, E, H = mode_profile_to_imported_source(mode_profile, position,
+                                                                             np.flip(self.get_wavelength()),
+                                                                             mode_number, normal_direction, direction)
+        self.reset_imported_source(origin_x, origin_y, origin_z, E, H=H, source_name=source_name, amplitude=amplitude,
+                                   phase=phase)
+
     def clear_data_in_CAD_with_buffer(self):
         """
         Save commands to buffer for clearing the pre-saved data in CAD.
         """
         self.__buffer += "clear;"
+        self.invalidate_transfer_cache()
 
 
     def switch_to_layout_with_buffer(self):
         """
         Save commands to buffer for switching the Lumerical FDTD simulation to "Layout" mode.
         """
+        if self.__mirror_buffered_unchanged("mode", "layout", 1):
+            return
         self.__buffer += "switchtolayout;"
+        self.__mirror_buffered_set("mode", "layout", 1)
 
     def set_disable_with_buffer(self,item_name):
         """
@@ -2004,12 +2352,18 @@ class FDTDSimulation:
         if (type(item_name) == list or type(item_name) == np.ndarray):
             scripts = ""
             for name in item_name:
+                if self.__mirror_buffered_unchanged("enabled", name, 0):
+                    continue
                 scripts += "select(\"" + name + "\");"
                 scripts += "set(\"enabled\",0);"
+                self.__mirror_buffered_set("enabled", name, 0)
             self.__buffer += scripts
         else:
-            self.__buffer += "select(\""+item_name+"\");"
+            if self.__mirror_buffered_unchanged("enabled", item_name, 0):
+                return
+            self.__buffer += "select(\"" + item_name + "\");"
             self.__buffer += "set(\"enabled\",0);"
+            self.__mirror_buffered_set("enabled", item_name, 0)
 
     def set_enable_with_buffer(self,item_name):
         """
@@ -2027,12 +2381,18 @@ class FDTDSimulation:
         if (type(item_name) == list or type(item_name) == np.ndarray):
             scripts = ""
             for name in item_name:
+                if self.__mirror_buffered_unchanged("enabled", name, 1):
+                    continue
                 scripts += "select(\"" + name + "\");"
                 scripts += "set(\"enabled\",1);"
+                self.__mirror_buffered_set("enabled", name, 1)
             self.__buffer += scripts
         else:
+            if self.__mirror_buffered_unchanged("enabled", item_name, 1):
+                return
             self.__buffer += "select(\"" + item_name + "\");"
             self.__buffer += "set(\"enabled\",1);"
+            self.__mirror_buffered_set("enabled", item_name, 1)
 
     def reset_source_amplitude_with_buffer(self, source_name, amplitude):
         """
@@ -2049,8 +2409,11 @@ class FDTDSimulation:
         -----
         This function should be called after setting a source.
         """
+        if self.__mirror_buffered_unchanged("amplitude", source_name, amplitude):
+            return
         self.__buffer += "select(\"" + source_name + "\");"
         self.__buffer += "set(\"amplitude\"," + "%.6f"%(amplitude) + ");"
+        self.__mirror_buffered_set("amplitude", source_name, amplitude)
 
     def reset_source_phase_with_buffer(self, source_name, phase):
         """
@@ -2067,8 +2430,11 @@ class FDTDSimulation:
         -----
         This function should be called after setting a source.
         """
+        if self.__mirror_buffered_unchanged("phase", source_name, phase):
+            return
         self.__buffer += "select(\"" + source_name + "\");"
         self.__buffer += "set(\"phase\"," + "%.6f"%(phase) + ");"
+        self.__mirror_buffered_set("phase", source_name, phase)
 
     def print_buffer(self):
         """
@@ -2081,13 +2447,23 @@ class FDTDSimulation:
         clear buffer.
         """
         self.__buffer = ""
+        ## the buffered commands will never be applied
+        self.__mirror_buffered_clear()
 
 
     def eval_buffer(self):
         """
         Eval all the buffer in FDTD and clear.
         """
-        self.fdtd.eval(self.__buffer)
+        try:
+            self.fdtd.eval(self.__buffer)
+        except:
+            ## a failed buffer may have been partially executed
+            self.invalidate_state_mirror()
+            self.__transfer_cache_invalidate_by_script(self.__buffer)
+            raise
+        self.__mirror_buffered_commit()
+        self.__transfer_cache_invalidate_by_script(self.__buffer)
         self.__buffer = ""
 
     def add_buffer(self, temp_buffer):
@@ -2095,6 +2471,316 @@ class FDTDSimulation:
         Add buffer.
         """
         self.__buffer += temp_buffer
+        self.__mirror_invalidate_by_script(temp_buffer)
+        self.__transfer_cache_invalidate_by_script(temp_buffer)
+
+    def putv(self, variable_name, value, cache = None):
+        """
+        Put a variable into the Lumerical script workspace. With the transfer cache, the content of the variable is
+        hashed and the transfer is skipped when the workspace variable with the same name already holds identical
+        content.
+
+        Parameters
+        ----------
+        variable_name : String
+            Name of the variable in the script workspace.
+        value : Array or Float or String
+            Value of the variable.
+        cache : Bool
+            Whether the transfer can be skipped by the cache (default: None, as set by set_transfer_cache). The regions
+            of SPLayout pass True for the workspace variables they own (e.g. the grids of the topology regions), which
+            are cached even when the cache is disabled for the others. Without cache the variable is always sent.
+        """
+        if (type(cache) == type(None)):
+            cache = self.__transfer_cache
+        if cache:
+            digest, nbytes = self.__variable_digest(value)
+            if self.__variable_hashes.get(variable_name) == digest:
+                self.__transfer_statistics["skipped"] += 1
+                self.__transfer_statistics["bytes_saved"] += nbytes
+                return
+        else:
+            nbytes = len(value) if type(value) == str else np.asarray(value).nbytes
+        self.fdtd.putv(variable_name, value)
+        self.__transfer_statistics["sent"] += 1
+        self.__transfer_statistics["bytes_sent"] += nbytes
+        if cache:
+            self.__variable_hashes[variable_name] = digest
+        else:
+            self.__variable_hashes.pop(variable_name, None)
+
+    def putv_patch(self, variable_name, value, previous_value, patch_ratio = 0.25, cache = None):
+        """
+        Update a workspace variable that holds previous_value (sent by putv) to value. When the changed elements lie in a
+        small block, only the block is sent and assigned in the workspace, otherwise it falls back to putv.
+
+        Parameters
+        ----------
+        variable_name : String
+            Name of the variable in the script workspace.
+        value : Array
+            New value of the variable.
+        previous_value : Array
+            Value that was sent to the variable last time, it should have the same shape as value.
+        patch_ratio : Float
+            The block is sent only when its size is no more than patch_ratio of the full size (default: 0.25).
+        cache : Bool
+            Whether the variable is tracked by the cache of putv (default: None, as set by set_transfer_cache). With the
+            cache, the block is only sent when the cache confirms that the workspace holds previous_value, without the
+            cache the caller is responsible for it.
+        """
+        value = np.asarray(value)
+        previous_value = np.asarray(previous_value)
+        if (type(cache) == type(None)):
+            cache = self.__transfer_cache
+        if value.shape != previous_value.shape or value.ndim == 0:
+            self.putv(variable_name, value, cache=cache)
+            return
+        if cache and (self.__variable_hashes.get(variable_name) != self.__variable_digest(previous_value)[0]):
+            self.putv(variable_name, value, cache=cache)
+            return
+        changed_positions = np.nonzero(value != previous_value)
+        if len(changed_positions[0]) == 0:
+            self.__transfer_statistics["skipped"] += 1
+            self.__transfer_statistics["bytes_saved"] += value.nbytes
+            return
+        lower_indexes = [int(np.min(positions)) for positions in changed_positions]
+        upper_indexes = [int(np.max(positions)) + 1 for positions in changed_positions]
+        block = value[tuple(slice(lower, upper) for lower, upper in zip(lower_indexes, upper_indexes))]
+        if (block.size > patch_ratio * value.size):
+            self.putv(variable_name, value, cache=cache)
+            return
+        self.fdtd.putv("splayout_patch", np.ascontiguousarray(block))
+        index_string = ",".join([str(lower + 1) + ":" + str(upper) for lower, upper in zip(lower_indexes, upper_indexes)])
+        self.fdtd.eval(variable_name + "(" + index_string + ") = splayout_patch; clear(splayout_patch);")
+        if cache:
+            self.__variable_hashes[variable_name] = self.__variable_digest(value)[0]
+        else:
+            self.__variable_hashes.pop(variable_name, None)
+        self.__transfer_statistics["patched"] += 1
+        self.__transfer_statistics["bytes_sent"] += block.nbytes
+        self.__transfer_statistics["bytes_saved"] += value.nbytes - block.nbytes
+
+    @staticmethod
+    def __variable_digest(value):
+        if type(value) == str:
+            payload = value.encode()
+            return hashlib.blake2b(payload, digest_size=16).digest(), len(payload)
+        array = np.ascontiguousarray(value)
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(str(array.dtype).encode() + str(array.shape).encode())
+        hasher.update(array.data if array.size else b"")
+        return hasher.digest(), array.nbytes
+
+    def set_transfer_cache(self, enable = 1):
+        """
+        Enable or disable the content-hashed cache of putv for the variables put without specifying cache (disabled by
+        default, the variables owned by the regions of SPLayout are always cached).
+
+        Parameters
+        ----------
+        enable : Bool
+            Whether to use the cache (default: True).
+
+        Notes
+        -----
+        Variables cleared or assigned by scripts through eval, add_buffer or clear_data_in_CAD are dropped from the cache,
+        but scripts sent directly through FDTDSimulation.fdtd are not tracked, call invalidate_transfer_cache after them.
+        """
+        self.__transfer_cache = enable
+        self.invalidate_transfer_cache()
+
+    def invalidate_transfer_cache(self, variable_name = None):
+        """
+        Drop variables from the putv cache, the following putv of them will be sent.
+
+        Parameters
+        ----------
+        variable_name : String or List
+            Name(s) of the variables (default: None, all the variables).
+        """
+        if type(variable_name) == type(None):
+            self.__variable_hashes = {}
+        elif type(variable_name) == str:
+            self.__variable_hashes.pop(variable_name, None)
+        else:
+            for name in variable_name:
+                self.__variable_hashes.pop(name, None)
+
+    def get_transfer_statistics(self):
+        """
+        Get the statistics of putv.
+
+        Returns
+        -------
+        out : Dict
+            "sent", "skipped" and "patched" (putv_patch) for the number of transfers, "bytes_sent" and "bytes_saved" for
+            the payload sizes.
+        """
+        return dict(self.__transfer_statistics)
+
+    def __transfer_cache_invalidate_by_script(self, script):
+        if len(self.__variable_hashes) == 0:
+            return
+        if re.search(r"\b(load|newproject)\b", script):
+            self.invalidate_transfer_cache()
+            return
+        for match in re.finditer(r"\bclear\b\s*(\(([^)]*)\))?", script):
+            if type(match.group(2)) == type(None) or match.group(2).strip() == "":
+                self.invalidate_transfer_cache()
+                return
+            self.invalidate_transfer_cache([name.strip() for name in match.group(2).split(",")])
+        for name in list(self.__variable_hashes.keys()):
+            if re.search(r"\b" + re.escape(name) + r"\s*(\([^)]*\))?\s*=(?!=)", script):
+                self.__variable_hashes.pop(name)
+
+    def set_state_mirror(self, enable = 1, verify = 0):
+        """
+        Enable or disable the client-side mirror of the session state. With the mirror, switch_to_layout, set_enable,
+        set_disable, reset_source_amplitude, reset_source_phase, set_named_property (and their buffer versions) skip the
+        commands that would not change the session.
+
+        Parameters
+        ----------
+        enable : Bool
+            Whether to use the state mirror (default: True).
+        verify : Bool
+            Debug mode, every skipped command is verified against the real session, and an Exception is raised for a
+            mismatch (default: False).
+
+        Notes
+        -----
+        The mirror only knows the commands sent by FDTDSimulation. Scripts sent by eval or add_buffer invalidate the
+        related states, but scripts sent directly by FDTDSimulation.fdtd are not tracked, so invalidate_state_mirror
+        should be called after them. The commands saved to the buffer update the mirror only after eval_buffer succeeds.
+        """
+        self.__state_mirror = enable
+        self.__verify_state_mirror = verify
+        self.invalidate_state_mirror()
+
+    def invalidate_state_mirror(self):
+        """
+        Forget all the mirrored session states, the following commands will be sent to the session.
+        """
+        self.__state = {"mode": {}, "enabled": {}, "amplitude": {}, "phase": {}, "property": {}}
+        self.__buffered_state = {"mode": {}, "enabled": {}, "amplitude": {}, "phase": {}, "property": {}}
+
+    def get_elided_command_count(self):
+        """
+        Get the number of commands skipped by the state mirror.
+
+        Returns
+        -------
+        out : Int
+            Number of skipped commands.
+        """
+        return self.__elided_command_count
+
+    def set_named_property(self, item_name, property_name, value):
+        """
+        Set a property of an item in the simulation (setnamed), skipped when the mirror knows the property already has
+        the value.
+
+        Parameters
+        ----------
+        item_name : String
+            Name of the item.
+        property_name : String
+            Name of the property.
+        value : Float or String
+            New value of the property.
+        """
+        key = (item_name, property_name)
+        if self.__mirror_unchanged("property", key, value):
+            return
+        self.fdtd.setnamed(item_name, property_name, value)
+        self.__mirror_set("property", key, value)
+
+    def __mirror_unchanged(self, kind, name, value):
+        if not self.__state_mirror:
+            return False
+        if name in self.__state[kind] and self.__state[kind][name] == value:
+            self.__elided_command_count += 1
+            if self.__verify_state_mirror:
+                self.__verify_state(kind, name, value)
+            return True
+        return False
+
+    def __mirror_set(self, kind, name, value):
+        if self.__state_mirror:
+            self.__state[kind][name] = value
+
+    def __mirror_remove(self, item_name):
+        for state in [self.__state, self.__buffered_state]:
+            for kind in ["enabled", "amplitude", "phase"]:
+                state[kind].pop(item_name, None)
+            for key in list(state["property"].keys()):
+                if key[0] == item_name:
+                    state["property"].pop(key)
+
+    def __mirror_buffered_unchanged(self, kind, name, value):
+        ## the buffered commands are checked against the state after the buffer is evaluated
+        if self.__state_mirror and (name in self.__buffered_state[kind]):
+            if self.__buffered_state[kind][name] == value:
+                self.__elided_command_count += 1
+                return True
+            return False
+        return self.__mirror_unchanged(kind, name, value)
+
+    def __mirror_buffered_set(self, kind, name, value):
+        if self.__state_mirror:
+            self.__buffered_state[kind][name] = value
+
+    def __mirror_buffered_commit(self):
+        for kind in self.__buffered_state.keys():
+            self.__state[kind].update(self.__buffered_state[kind])
+        self.__mirror_buffered_clear()
+
+    def __mirror_buffered_clear(self):
+        self.__buffered_state = {"mode": {}, "enabled": {}, "amplitude": {}, "phase": {}, "property": {}}
+
+    def __mirror_invalidate_by_script(self, script):
+        if not self.__state_mirror:
+            return
+        ## whole command tokens, the text in strings is not a command
+        code = re.sub(r"\"[^\"]*\"", "\"\"", script)
+        commands = set(re.findall(r"\b([A-Za-z_]\w*)\s*(?=\(|;|$)", code))
+        if commands & {"load", "loadproject", "newproject", "delete", "deleteall", "undo", "redo"}:
+            self.invalidate_state_mirror()
+            return
+        if commands & {"run", "runparallel", "switchtolayout"}:
+            self.__invalidate_state_kind("mode")
+        if commands & {"set", "setnamed"}:
+            ## the properties set with literal names are known, otherwise any state may have changed
+            set_count = len(re.findall(r"\bset(named)?\s*\(", code))
+            properties = re.findall(r"\bset\s*\(\s*\"([^\"]*)\"", script) + \
+                         re.findall(r"\bsetnamed\s*\(\s*(?:\"[^\"]*\"|[^,\"]+)\s*,\s*\"([^\"]*)\"", script)
+            if (len(properties) < set_count) or ("name" in properties):
+                self.invalidate_state_mirror()
+                return
+            for kind in ["enabled", "amplitude", "phase"]:
+                if kind in properties:
+                    self.__invalidate_state_kind(kind)
+            self.__invalidate_state_kind("property")
+
+    def __invalidate_state_kind(self, kind):
+        self.__state[kind] = {}
+        self.__buffered_state[kind] = {}
+
+    def __verify_state(self, kind, name, value):
+        if kind == "mode":
+            session_value = int(self.fdtd.layoutmode())
+        elif kind == "property":
+            session_value = self.fdtd.getnamed(name[0], name[1])
+        else:
+            session_value = self.fdtd.getnamed(name, kind)
+        if type(session_value) == str or type(value) == str:
+            consistent = (session_value == value)
+        else:
+            consistent = np.allclose(session_value, value)
+        if not consistent:
+            raise Exception("State mirror mismatch for " + kind + " of " + str(name) + ": mirror " + str(value) +
+                            ", session " + str(session_value) + ".")
 
     def add_port(self, position, mode_list, width=2,height=0.8, z_min = None, z_max = None, port_name=None,
                 amplitude=1 , phase = 0,wavelength_start=1.540,wavelength_end=1.570, points = 251,
@@ -2258,6 +2944,7 @@ class FDTDSimulation:
         self.fdtd.eval("set(\"x\"," + "%.6f" % (center_point.x) + "e-6);")
         self.fdtd.eval("set(\"y\"," + "%.6f" % (center_point.y) + "e-6);")
         self.fdtd.eval("set(\"z\"," + "%.6f" % (z) + "e-6);")
-        self.fdtd.putv("groupscript", group_script)
+        self.putv("groupscript", group_script, cache=0)
         self.fdtd.eval("set(\"script\", groupscript);")
-        self.fdtd.eval("clear;")
\ No newline at end of file
+        self.fdtd.eval("clear;")
+        self.invalidate_transfer_cache()
\ No newline at end of file
@@ -31,6 +31,8 @@ class MODESimulation:
                 "Lumerical MODE is not installed in the default path, please specify the python api path with fdtd_path=***.")
         self.lumapi = lumapi
         self.mode = self.lumapi.MODE(hide=hide)
+        ## the components (e.g. the pixels regions) evaluate their scripts through the "fdtd" session
+        self.fdtd = self.mode
         if (type(load_file) != type(None)):
             self.mode.eval("load(\"" + load_file + "\");")
         self.global_source_set_flag = 0
@@ -253,6 +255,39 @@ class MODESimulation:
             string += "%.6f"%(tuple_list[-1][0]) + "e-6," + "%.6f"%(tuple_list[-1][1]) + "e-6]"
         return string
 
+    @staticmethod
+    def lumerical_matrix(tuple_list):
+        """
+        Convert a tuple list to a vertices matrix that can be transferred to Lumerical in binary form.
+
+        Parameters
+        ----------
+        tuple_list : List
+            The List for conversion (unit: μm).
+
+        Returns
+        -------
+        out : Array
+            A (N, 2) float64 array of the vertices (unit: m).
+        """
+        tuple_list = [item.to_tuple() if type(item) == Point else item for item in tuple_list]
+        return np.asarray(tuple_list, dtype=np.float64).reshape(-1, 2) * 1e-6
+
+    def set_vertices(self, vertices):
+        """
+        Set the vertices of the selected polygon through a binary transfer.
+
+        Parameters
+        ----------
+        vertices : List of Tuple or Point
+            Points for the polygon (unit: μm).
+        """
+        if len(vertices) == 0:
+            self.mode.eval("set(\"vertices\",[]);")
+        else:
+            self.mode.putv("splayout_polygon_vertices", self.lumerical_matrix(vertices))
+            self.mode.eval("set(\"vertices\",splayout_polygon_vertices);clear(splayout_polygon_vertices);")
+
     def put_rectangle(self, bottom_left_corner_point, top_right_corner_point, z_start, z_end, material, rename):
         '''
         Draw a rectangle on the varFDTD simulation CAD.
@@ -310,9 +345,8 @@ class MODESimulation:
         rename : String
             New name of the structure in Lumerical.
         '''
-        lumerical_list = self.lumerical_list(tuple_list)
         self.mode.eval("addpoly;")
-        self.mode.eval("set(\"vertices\"," + lumerical_list + ");")
+        self.set_vertices(tuple_list)
         self.mode.eval("set(\"x\",0);")
         self.mode.eval("set(\"y\",0);")
         self.mode.eval("set(\"z min\"," + "%.6f"%(z_start) + "e-6);")
@@ -373,6 +407,35 @@ class MODESimulation:
         if (type(rename) == str):
             self.mode.eval("set(\"name\",\"" + rename + "\");")
 
+    def put_rounds(self, round_list, z_start, z_end, material, rename, as_group = 0):
+        '''
+        Draw a batch of rounds on the varFDTD simulation CAD with a single transfer.
+
+        Parameters
+        ----------
+        round_list : List of Tuple
+            Rounds in the form of (center_point, inner_radius, outer_radius, start_radian, end_radian), e.g. the
+            outputs of Bend.get_round_parameters().
+        z_start : Float
+            The start point for the structure in z axis (unit: μm).
+        z_end : Float
+            The end point for the structure in z axis (unit: μm).
+        material : str or float
+            Material setting for the structure in Lumerical MODE (SiO2 = "SiO2 (Glass) - Palik", SiO2 = "SiO2 (Glass) - Palik", default: SiO2). When it is a float, the material in MODE will be
+            <Object defined dielectric>, and index will be defined.
+        rename : String
+            New name of the structures in Lumerical (the name of the structure group if as_group is True).
+        as_group : Bool
+            Whether to build the rounds in a structure group parameterized by the round matrix (default: False).
+
+        Notes
+        -----
+        The rounds are sent as a (N, 6) matrix [x, y, inner radius, outer radius, theta start, theta stop] and built
+        with ring primitives by a script loop (see draw_rounds_by_script), instead of one script command per property
+        and round.
+        '''
+        draw_rounds_by_script(self.mode.putv, self.mode.eval, round_list, z_start, z_end, material, rename, as_group)
+
     def eval(self, command):
         '''
         Execute the command on the MODE.
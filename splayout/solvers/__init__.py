@@ -0,0 +1,3 @@
+from .fdfd2d import FDFDSimulation
+from .modesolver import solve_slab_modes, solve_channel_modes, rectangular_cross_section, ModeProfileCache, \
+    mode_profile_to_imported_source
@@ -0,0 +1,1307 @@
+from ..utils.utils import *
+from ..utils.rasterizer import polygon_cell_areas, grid_cell_edges
+from ..utils.integration import linear_interpolation_matrix
+from .modesolver import _slab_eigenmodes, ModeProfileCache
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+import scipy.constants
+import pickle
+
+default_material_indices = {Si: 3.478, SiO2: 1.444}
+
+
+def _difference_matrix(size, step, forward = 1):
+    """
+    First-order difference along a grid with zero (PEC) fields outside (unit: 1/μm).
+    """
+    if forward:
+        return scipy.sparse.diags([-np.ones(size), np.ones(size - 1)], [0, 1], shape=(size, size), format="csr") / step
+    return scipy.sparse.diags([np.ones(size), -np.ones(size - 1)], [0, -1], shape=(size, size), format="csr") / step
+
+
+class FDFDSimulation:
+    """
+    2D FDFD (finite-difference frequency-domain) simulation in NumPy/SciPy, a backend without Lumerical that provides the
+    methods of FDTDSimulation used by 2D topology optimization (AdjointForTO with TopologyOptRegion2D), the pixels
+    regions (RectanglePixelsRegion) and "draw_on_lumerical_CAD" of the components.
+
+    Parameters
+    ----------
+    mesh : Float
+        Grid unit of the uniform grid in x and y axis (unit: μm, default: 0.02), a finer add_mesh_region refines it.
+    polarization : TE or TM
+        TE: Ex, Ey and Hz (in-plane electric field, as the fundamental mode of 2D silicon waveguides), TM: Ez
+        (default: TE).
+    material_indices : Dict
+        Refractive indices of the material names, e.g. {Si: 3.478, SiO2: 1.444} (default: None, these two).
+    keep_factorization : Bool
+        Whether to keep the LU factorizations of the system matrices (one per frequency point), so that the following
+        runs with the same permittivity (e.g. the adjoint simulations) only solve with the new sources (default: True).
+
+    Notes
+    -----
+    The time dependence is exp(-iωt) and the boundaries are stretched-coordinate PML (outside the region of
+    add_fdtd_region). Mode sources are injected as total-field/scattered-field sources of the modes of the discrete
+    cross-sections, so that they are unidirectional. The structures are rasterized with sub-pixel averaging, the z axis is
+    ignored. Lumerical script (eval) is not supported.
+    For AdjointForTO, the backward sources should be at the positions of the mode expansion monitors. The gradients are
+    exact for TM, for TE they are as accurate as the electric fields averaged from the staggered grid to the nodes.
+    """
+    def __init__(self, mesh = 0.02, polarization = TE, material_indices = None, keep_factorization = 1):
+        if (polarization != TE and polarization != TM):
+            raise Exception("The polarization should be TE or TM.")
+        self.mesh = mesh
+        self.polarization = polarization
+        self.material_indices = dict(default_material_indices)
+        if (type(material_indices) != type(None)):
+            self.material_indices.update(material_indices)
+        self.keep_factorization = keep_factorization
+        self.global_monitor_set_flag = 0
+        self.global_source_set_flag = 0
+        self.__region = None
+        self.__structures = {}
+        self.__imports = {}
+        self.__sources = {}
+        self.__mode_monitors = {}
+        self.__power_monitors = {}
+        self.__field_regions = {}
+        self.__index_regions = {}
+        self.__variables = {}
+        self.__grid = None
+        self.__factorizations = {}
+        self.__factorized_epsilon = None
+        self.__solutions = None
+        self.__solved_epsilon = None
+        self.__statistics = {"factorizations": 0, "reused_factorizations": 0, "solves": 0}
+        self.__mode_cache = ModeProfileCache()
+
+    def __material_epsilon(self, material):
+        if (type(material) == float or type(material) == int):
+            return float(material) ** 2
+        if (material == ETCH):
+            return self.__region_background()
+        if (material in self.material_indices):
+            return self.material_indices[material] ** 2
+        raise Exception("Unknown material for FDFDSimulation: " + str(material) +
+                        ", specify its index in material_indices.")
+
+    def __region_background(self):
+        if (type(self.__region) == type(None)):
+            raise Exception("The simulation region is not defined, run add_fdtd_region first.")
+        return self.__region["background_epsilon"]
+
+    def __invalidate_grid(self):
+        self.__grid = None
+        self.__factorizations = {}
+        self.__factorized_epsilon = None
+        self.__solutions = None
+        for structure in self.__structures.values():
+            structure["fill"] = None
+
+    def add_fdtd_region(self, bottom_left_corner_point, top_right_corner_point, simulation_time = 5000,
+                        background_material = None, background_index = 1.444, mesh_order = 2, dimension = 2, height = 1,
+                        z_min = None, z_max = None, z_symmetric = 0, y_antisymmetric = 0, y_periodic = 0,
+                        pml_layers = 16, use_gpu = 0):
+        """
+        Add simulation region, the PML layers are outside the region.
+
+        Parameters
+        ----------
+        bottom_left_corner_point : Point
+            Lower left corner of the region.
+        top_right_corner_point : Point
+            Upper right corner of the region.
+        background_material : String or Float
+            Background material name or refractive index (default: None, background_index is used).
+        background_index : float
+            Background refractive index in the simualtion region  (default: 1.444).
+        pml_layers : Int
+            Number of PML layers (default: 16).
+
+        Notes
+        -----
+        simulation_time, mesh_order, dimension, height, z_min, z_max, z_symmetric, y_antisymmetric, y_periodic and
+        use_gpu are kept for compatibility with FDTDSimulation and ignored.
+        """
+        bottom_left_corner_point = tuple_to_point(bottom_left_corner_point)
+        top_right_corner_point = tuple_to_point(top_right_corner_point)
+        self.__region = {"x_min": min(bottom_left_corner_point.x, top_right_corner_point.x),
+                         "x_max": max(bottom_left_corner_point.x, top_right_corner_point.x),
+                         "y_min": min(bottom_left_corner_point.y, top_right_corner_point.y),
+                         "y_max": max(bottom_left_corner_point.y, top_right_corner_point.y),
+                         "background_epsilon": background_index ** 2,
+                         "pml_layers": int(pml_layers)}
+        if not (background_material is None):
+            self.__region["background_epsilon"] = self.__material_epsilon(background_material)
+        self.__invalidate_grid()
+
+    def add_mesh_region(self, bottom_left_corner_point, top_right_corner_point, x_mesh, y_mesh, z_mesh = 0.0025,
+                        height = 1, z_min = None, z_max = None):
+        """
+        Refine the uniform grid to the finest of x_mesh and y_mesh (the grid of FDFDSimulation is uniform).
+
+        Parameters
+        ----------
+        bottom_left_corner_point : Point
+            Lower left corner of the region.
+        top_right_corner_point : Point
+            Upper right corner of the region.
+        x_mesh : Float
+            The grid unit in x-axis (unit: μm).
+        y_mesh : Float
+            The grid unit in y-axis (unit: μm).
+        """
+        if (min(x_mesh, y_mesh) < self.mesh):
+            self.mesh = min(x_mesh, y_mesh)
+            self.__invalidate_grid()
+
+    def __add_structure(self, polygons, material, rename, default_name):
+        if (type(rename) != str):
+            rename = default_name + "_" + str(len(self.__structures))
+        enabled = self.__structures[rename]["enabled"] if rename in self.__structures else 1
+        self.__structures[rename] = {"polygons": [np.array([tuple_to_point(item).to_tuple() if type(item) == Point else item
+                                                            for item in polygon], dtype=np.float64)
+                                                  for polygon in polygons],
+                                     "epsilon": self.__material_epsilon(material),
+                                     "enabled": enabled,
+                                     "fill": None}
+
+    def put_rectangle(self, bottom_left_corner_point, top_right_corner_point, z_start, z_end, material, rename):
+        '''
+        Draw a rectangle, a structure with the same name is replaced.
+
+        Parameters
+        ----------
+        bottom_left_corner_point : tuple or Point
+            Bottom left corner point of the rectangle.
+        top_right_corner_point : tuple or Point
+            Top right corner point of the rectangle.
+        z_start : Float
+            The start point for the structure in z axis (unit: μm, ignored).
+        z_end : Float
+            The end point for the structure in z axis (unit: μm, ignored).
+        material : str or float
+            Material name or refractive index.
+        rename : String
+            Name of the structure.
+        '''
+        bottom_left_corner_point = tuple_to_point(bottom_left_corner_point)
+        top_right_corner_point = tuple_to_point(top_right_corner_point)
+        x_min, x_max = sorted([bottom_left_corner_point.x, top_right_corner_point.x])
+        y_min, y_max = sorted([bottom_left_corner_point.y, top_right_corner_point.y])
+        self.__add_structure([[(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)]], material, rename,
+                             "rect")
+
+    def put_polygon(self, tuple_list, z_start, z_end, material, rename):
+        '''
+        Draw a polygon, a structure with the same name is replaced.
+
+        Parameters
+        ----------
+        tuple_list : List of Tuple
+            Points for the polygon.
+        z_start : Float
+            The start point for the structure in z axis (unit: μm, ignored).
+        z_end : Float
+            The end point for the structure in z axis (unit: μm, ignored).
+        material : str or float
+            Material name or refractive index.
+        rename : String
+            Name of the structure.
+        '''
+        self.__add_structure([tuple_list], material, rename, "poly")
+
+    def update_polygon(self, polygon_name, point_list):
+        '''
+        Update the vertices of a polygon.
+
+        Parameters
+        ----------
+        polygon_name : str
+            Name of the polygon.
+        point_list : List of Point
+            Points for the polygon.
+        '''
+        if (polygon_name not in self.__structures):
+            raise Exception("No structure named " + polygon_name + ".")
+        structure = self.__structures[polygon_name]
+        structure["polygons"] = [np.array([tuple_to_point(item).to_tuple() if type(item) == Point else tuple(item)
+                                           for item in point_list], dtype=np.float64)]
+        structure["fill"] = None
+
+    def __round_polygon(self, center_point, inner_radius, outer_radius, start_radian, end_radian):
+        center_point = tuple_to_point(center_point)
+        points = max(int(np.ceil(abs(end_radian - start_radian) * outer_radius / (self.mesh / 2))), 16)
+        theta = np.linspace(start_radian, end_radian, points + 1)
+        full_circle = np.isclose(abs(end_radian - start_radian), 2 * np.pi)
+        outer = np.stack((center_point.x + outer_radius * np.cos(theta), center_point.y + outer_radius * np.sin(theta)), axis=1)
+        if (inner_radius <= 0):
+            if full_circle:
+                return [outer[:-1]]
+            return [np.concatenate(([center_point.to_tuple()], outer))]
+        inner = np.stack((center_point.x + inner_radius * np.cos(theta), center_point.y + inner_radius * np.sin(theta)), axis=1)
+        ## an annulus is a ring sector with a zero-width slit, the edges along the slit cancel each other
+        return [np.concatenate((outer, inner[::-1]))]
+
+    def put_round(self, center_point, inner_radius, outer_radius, start_radian, end_radian, z_start, z_end, material, rename):
+        '''
+        Draw a round (ring sector), a structure with the same name is replaced.
+
+        Parameters
+        ----------
+        center_point : Point
+            Points for the center of the round.
+        inner_radius : float
+            Inner radius of the round.
+        outer_radius : float
+            Outer radius of the round.
+        start_radian : float
+            The start radian of the round (unit: radian).
+        end_radian : float
+            The end radian of the round (unit: radian).
+        z_start : Float
+            The start point for the structure in z axis (unit: μm, ignored).
+        z_end : Float
+            The end point for the structure in z axis (unit: μm, ignored).
+        material : str or float
+            Material name or refractive index.
+        rename : String
+            Name of the structure.
+        '''
+        self.__add_structure(self.__round_polygon(center_point, inner_radius, outer_radius, start_radian, end_radian),
+                             material, rename, "round")
+
+    def put_rounds(self, round_list, z_start, z_end, material, rename, as_group = 0):
+        '''
+        Draw a batch of rounds as one structure.
+
+        Parameters
+        ----------
+        round_list : List of Tuple
+            Rounds in the form of (center_point, inner_radius, outer_radius, start_radian, end_radian).
+        z_start : Float
+            The start point for the structure in z axis (unit: μm, ignored).
+        z_end : Float
+            The end point for the structure in z axis (unit: μm, ignored).
+        material : str or float
+            Material name or refractive index.
+        rename : String
+            Name of the structure.
+        as_group : Bool
+            Kept for compatibility with FDTDSimulation.
+        '''
+        polygons = []
+        for center_point, inner_radius, outer_radius, start_radian, end_radian in round_list:
+            polygons += self.__round_polygon(center_point, inner_radius, outer_radius, start_radian, end_radian)
+        if (len(polygons)):
+            self.__add_structure(polygons, material, rename, "rounds")
+
+    def add_structure_circle(self, center_point, radius, material = SiO2, z_start = -0.11, z_end = 0.11, rename = "circle"):
+        '''
+        Draw a circle.
+
+        Parameters
+        ----------
+        center_point : Point
+            Center point of the circle.
+        radius : float
+            Radius of the circle (unit: μm).
+        material : str or float
+            Material name or refractive index (default: SiO2).
+        rename : String
+            Name of the structure (default: "circle").
+        '''
+        self.put_round(center_point, 0, radius, 0, 2 * np.pi, z_start, z_end, material, rename)
+
+    def add_structure_rectangle(self, center_point, x_length, y_length, material = SiO2, z_start = -0.11, z_end = 0.11, rename = "rect"):
+        '''
+        Draw a rectangle.
+
+        Parameters
+        ----------
+        center_point : Point
+            Center point of the rectangle.
+        x_length : float
+            Length in the x axis (unit: μm).
+        y_length : float
+            Length in the y axis (unit: μm).
+        material : str or float
+            Material name or refractive index (default: SiO2).
+        rename : String
+            Name of the structure (default: "rect").
+        '''
+        center_point = tuple_to_point(center_point)
+        self.put_rectangle((center_point.x - x_length / 2, center_point.y - y_length / 2),
+                           (center_point.x + x_length / 2, center_point.y + y_length / 2), z_start, z_end, material, rename)
+
+    def set_region_epsilon(self, region_name, x_positions, y_positions, epsilon):
+        """
+        Set the permittivity of a rectangular region sampled on a grid (as the import objects of the topology
+        optimization regions), it is interpolated onto the simulation grid and overrides the structures.
+
+        Parameters
+        ----------
+        region_name : String
+            Name of the region.
+        x_positions : Array
+            x positions of the samples (unit: μm), size: (nx,).
+        y_positions : Array
+            y positions of the samples (unit: μm), size: (ny,).
+        epsilon : Array
+            Permittivity, size: (nx, ny).
+        """
+        enabled = self.__imports[region_name]["enabled"] if region_name in self.__imports else 1
+        self.__imports[region_name] = {"x": np.array(x_positions, dtype=np.float64).flatten(),
+                                       "y": np.array(y_positions, dtype=np.float64).flatten(),
+                                       "epsilon": np.real(np.array(epsilon, dtype=np.complex128)).reshape(
+                                           np.size(x_positions), np.size(y_positions)),
+                                       "enabled": enabled}
+
+    def add_mode_source(self, position, width = 2, height = 0.8, z_min = None, z_max = None, source_name = "source",
+                        mode_number = 1, amplitude = 1, phase = 0, wavelength_start = 1.540, wavelength_end = 1.570,
+                        direction = FORWARD, update_mode = 0, normal_direction = HORIZONTAL):
+        """
+        Add a unidirectional mode source.
+
+        Parameters
+        ----------
+        position : Point or tuple
+            Center point of the source.
+        width : Float
+            Width of the source (unit: μm, default: 2).
+        source_name : String
+            Name of the source (default: "source").
+        mode_number : Int
+            The selected mode index (start from 1).
+        amplitude : Float or Int
+            The amplitude of the electric field (unit: V/m, default: 1).
+        phase : Float or Int
+            The phase of the source (unit: degree, default: 0).
+        wavelength_start : Float
+            The start wavelength of the source (unit: μm, default: 1.540).
+        wavelength_end : Float
+            The end wavelength of the source (unit: μm, default: 1.570).
+        direction : Int
+            The light propagation direction 1: the positive direction of the axis, 0: the negative direction (FORWARD:1,
+            BACKWARD:0 , default: FORWARD).
+        normal_direction : HORIZONAL or VERTICAL
+            The direction of the mode source. HORIZONAL: x-normal, VERTICAL: y-normal.
+
+        Notes
+        -----
+        height, z_min, z_max and update_mode are kept for compatibility with FDTDSimulation and ignored, the modes are
+        solved in every run from the permittivity at the source.
+        """
+        if (type(mode_number) == str):
+            raise Exception("FDFDSimulation only supports the mode_number as an Int.")
+        if (direction != FORWARD and direction != BACKWARD):
+            raise Exception("Wrong source direction!")
+        if (normal_direction != HORIZONTAL and normal_direction != VERTICAL):
+            raise Exception("Unsupported normal_direction specified!")
+        self.__sources[source_name] = {"position": tuple_to_point(position), "width": width,
+                                       "mode_number": int(mode_number), "amplitude": amplitude, "phase": phase,
+                                       "direction": direction, "normal_direction": normal_direction, "enabled": 1}
+        if not self.global_source_set_flag:
+            self.wavelength_start = wavelength_start * 1e-6
+            self.wavelength_end = wavelength_end * 1e-6
+            self.global_source_set_flag = 1
+
+    def reset_source_amplitude(self, source_name, amplitude):
+        """
+        Reset the amplitude of a source.
+
+        Parameters
+        ----------
+        source_name : String
+            Name of the source.
+        amplitude : Float
+            The amplitude of the source.
+        """
+        self.__sources[source_name]["amplitude"] = amplitude
+
+    def reset_source_phase(self, source_name, phase):
+        """
+        Reset the phase of a source.
+
+        Parameters
+        ----------
+        source_name : String
+            Name of the source.
+        phase : Float
+            The phase of the source (unit: degree).
+        """
+        self.__sources[source_name]["phase"] = phase
+
+    def reset_source_mode(self, source_name, mode_number):
+        """
+        Reset the mode of a source.
+
+        Parameters
+        ----------
+        source_name : String
+            Name of the source.
+        mode_number : Int
+            The selected mode index (start from 1).
+        """
+        self.__sources[source_name]["mode_number"] = int(mode_number)
+
+    def __set_global_monitor(self, points):
+        if not self.global_monitor_set_flag:
+            self.frequency_points = points
+            self.global_monitor_set_flag = 1
+
+    def add_power_monitor(self, position, width = 2, height = 0.8, z_min = None, z_max = None, monitor_name = "powermonitor",
+                          points = 1001, normal_direction = HORIZONTAL):
+        """
+        Add power monitor (a line of the 2D simulation).
+
+        Parameters
+        ----------
+        position : Point or tuple
+           Center point of the monitor.
+        width : Float
+           Width of the monitor (unit: μm, default: 2).
+        monitor_name : String
+            Name of the monitor (default: "powermonitor").
+        points : Int
+            The number of the frequency points, each point is a factorization of the system matrix (default: 1001).
+        normal_direction : HORIZONAL or VERTICAL
+            The direction of the monitor. HORIZONAL: x-normal, VERTICAL: y-normal.
+        """
+        if (normal_direction != HORIZONTAL and normal_direction != VERTICAL):
+            raise Exception("Unsupported normal_direction specified!")
+        self.__power_monitors[monitor_name] = {"position": tuple_to_point(position), "width": width,
+                                               "normal_direction": normal_direction}
+        self.__set_global_monitor(points)
+
+    def add_mode_expansion(self, position, mode_list, width = 2, height = 0.8, z_min = None, z_max = None,
+                           expansion_name = "expansion", points = 251, update_mode = 0,
+                           normal_direction = HORIZONTAL, auto_update = 0, align = 1):
+        """
+        Add mode expansion monitor (with a power monitor named expansion_name + "_expansion").
+
+        Parameters
+        ----------
+        position : Point or tuple
+            Center point of the monitor.
+        mode_list : List
+            List that contains the index of desired mode (start from 1).
+        width : Float
+            Width of the monitor (unit: μm, default: 2).
+        expansion_name : String
+            Name of the mode expansion monitor (default: "expansion").
+        points : Int
+            The number of the frequency points, each point is a factorization of the system matrix (default: 251).
+        normal_direction : HORIZONAL or VERTICAL
+            The direction of the monitor. HORIZONAL: x-normal, VERTICAL: y-normal.
+        """
+        if (type(mode_list) == str):
+            raise Exception("FDFDSimulation only supports the mode_list as a list of Int.")
+        self.add_power_monitor(position, width=width, monitor_name=expansion_name + "_expansion", points=points,
+                               normal_direction=normal_direction)
+        self.__mode_monitors[expansion_name] = {"position": tuple_to_point(position), "width": width,
+                                                "mode_list": [int(mode) for mode in np.array([mode_list]).flatten()],
+                                                "normal_direction": normal_direction}
+
+    def reset_mode_expansion_modes(self, expansion_name, mode_list):
+        """
+        Reset mode list for mode expansion monitor.
+
+        Parameters
+        ----------
+        expansion_name : String
+            Name of the mode expansion monitor.
+        mode_list : List
+            List that contains the index of desired mode (start from 1).
+        """
+        self.__mode_monitors[expansion_name]["mode_list"] = [int(mode) for mode in np.array([mode_list]).flatten()]
+
+    def add_index_region(self, bottom_left_corner_point, top_right_corner_point, height = 1, z_min = None, z_max = None,
+                         index_monitor_name = "index", dimension = 2):
+        """
+        Add index monitor (x-y plane).
+
+        Parameters
+        ----------
+        bottom_left_corner_point : Point
+            Lower left corner of the region.
+        top_right_corner_point : Point
+            Upper right corner of the region.
+        index_monitor_name : String
+            Name of the monitor (default: "index").
+        """
+        self.__index_regions[index_monitor_name] = {"bottom_left": tuple_to_point(bottom_left_corner_point),
+                                                    "top_right": tuple_to_point(top_right_corner_point)}
+
+    def add_field_region(self, bottom_left_corner_point, top_right_corner_point, height = 1, z_min = None, z_max = None,
+                         field_monitor_name = "field", dimension = 2, frequency_indices = None, down_sample = 1):
+        """
+        Add field monitor (x-y plane).
+
+        Parameters
+        ----------
+        bottom_left_corner_point : Point
+            Lower left corner of the region.
+        top_right_corner_point : Point
+            Upper right corner of the region.
+        field_monitor_name : String
+            Name of the monitor (default: "field").
+        frequency_indices : List of Int
+            Indices of the global frequency points recorded by the monitor (default: None, all the frequency points).
+        down_sample : Int
+            Spatial down sampling factor of the monitor in each axis (default: 1).
+        """
+        if (down_sample < 1):
+            raise Exception("The down_sample should be at least 1.")
+        self.__field_regions[field_monitor_name] = {
+            "bottom_left": tuple_to_point(bottom_left_corner_point),
+            "top_right": tuple_to_point(top_right_corner_point),
+            "frequency_indices": None if type(frequency_indices) == type(None) else np.unique(np.array([frequency_indices]).flatten().astype(int)),
+            "down_sample": int(down_sample)}
+
+    def putv(self, variable_name, value, cache = None):
+        """
+        Keep a variable (there is no script workspace, kept for compatibility with FDTDSimulation).
+
+        Parameters
+        ----------
+        variable_name : String
+            Name of the variable.
+        value : Any
+            Value of the variable.
+        """
+        self.__variables[variable_name] = value
+
+    def getv(self, variable_name):
+        """
+        Get a variable kept by putv.
+
+        Parameters
+        ----------
+        variable_name : String
+            Name of the variable.
+
+        Returns
+        -------
+        out : Any
+            Value of the variable.
+        """
+        return self.__variables[variable_name]
+
+    def eval(self, command):
+        """
+        Lumerical script is not supported by FDFDSimulation.
+        """
+        raise Exception("Lumerical script is not supported by FDFDSimulation.")
+
+    def switch_to_layout(self):
+        """
+        Kept for compatibility with FDTDSimulation (the results stay available until the next run).
+        """
+        pass
+
+    def __set_enabled(self, item_name, enabled):
+        if (type(item_name) == list or type(item_name) == np.ndarray):
+            for name in item_name:
+                self.__set_enabled(str(name), enabled)
+            return
+        item_name = str(item_name)
+        found = 0
+        for items in [self.__sources, self.__structures, self.__imports]:
+            if (item_name in items):
+                items[item_name]["enabled"] = enabled
+                found = 1
+        if not found:
+            raise Exception("No item named " + item_name + " in the simulation.")
+
+    def set_disable(self, item_name):
+        """
+        Set an item (source, structure or region) of the simulation to "disable" state.
+
+        Parameters
+        ----------
+        item_name : String or list
+            Name of the item.
+        """
+        self.__set_enabled(item_name, 0)
+
+    def set_enable(self, item_name):
+        """
+        Set an item (source, structure or region) of the simulation to "enable" state.
+
+        Parameters
+        ----------
+        item_name : String or list
+            Name of the item.
+        """
+        self.__set_enabled(item_name, 1)
+
+    def remove(self, item_name):
+        """
+        Remove an item from the simulation.
+
+        Parameters
+        ----------
+        item_name : String
+            Name of the item.
+        """
+        for items in [self.__sources, self.__structures, self.__imports, self.__mode_monitors, self.__power_monitors,
+                      self.__field_regions, self.__index_regions]:
+            if (item_name in items):
+                del items[item_name]
+
+    def get_wavelength(self):
+        """
+        Get wavelength points.
+
+        Returns
+        -------
+        out : Array
+            Wavelength points (unit: m), size: (frequency points,).
+        """
+        if self.global_source_set_flag and self.global_monitor_set_flag:
+            wavelength = np.linspace(self.wavelength_start, self.wavelength_end, self.frequency_points)
+        else:
+            raise Exception("The source is not well defined!")
+        return wavelength
+
+    def get_frequency(self):
+        """
+        Get frequency points.
+
+        Returns
+        -------
+        out : Array
+            Frequency points (unit: Hz), size: (frequency points,).
+        """
+        return scipy.constants.speed_of_light / self.get_wavelength()
+
+    def get_omega(self):
+        """
+        Get omega points (omega = 2*pi*frequency).
+
+        Returns
+        -------
+        out : Array
+            Omega points (unit: rad/s), size: (frequency points,).
+        """
+        return 2.0 * np.pi * self.get_frequency()
+
+    def __get_grid(self):
+        if (type(self.__grid) != type(None)):
+            return self.__grid
+        region = self.__region
+        if (type(region) == type(None)):
+            raise Exception("The simulation region is not defined, run add_fdtd_region first.")
+        step = self.mesh
+        layers = region["pml_layers"]
+        x_index = np.arange(int(np.ceil(region["x_min"] / step - 1e-6)) - layers, int(np.floor(region["x_max"] / step + 1e-6)) + layers + 1)
+        y_index = np.arange(int(np.ceil(region["y_min"] / step - 1e-6)) - layers, int(np.floor(region["y_max"] / step + 1e-6)) + layers + 1)
+        x = x_index * step
+        y = y_index * step
+        self.__grid = {"x": x, "y": y, "x_edges": grid_cell_edges(x), "y_edges": grid_cell_edges(y), "step": step}
+        return self.__grid
+
+    def __pml_stretch(self, positions, lower, upper, k0):
+        grid = self.__get_grid()
+        thickness = max(self.__region["pml_layers"] * grid["step"], grid["step"])
+        depth = np.clip(np.maximum(lower - positions, positions - upper) / thickness, 0, 1)
+        ## polynomial grading (order 3) for a reflection of 1e-8 at normal incidence
+        return 1 + 1j * 4 * np.log(1e8) / (2 * k0 * thickness) * depth ** 3
+
+    def __structure_fill(self, structure):
+        if (type(structure["fill"]) != type(None)):
+            return structure["fill"]
+        grid = self.__get_grid()
+        vertices = np.concatenate(structure["polygons"], axis=0)
+        x_start = max(np.searchsorted(grid["x_edges"], vertices[:, 0].min(), side="right") - 1, 0)
+        x_end = min(np.searchsorted(grid["x_edges"], vertices[:, 0].max(), side="left"), grid["x"].size)
+        y_start = max(np.searchsorted(grid["y_edges"], vertices[:, 1].min(), side="right") - 1, 0)
+        y_end = min(np.searchsorted(grid["y_edges"], vertices[:, 1].max(), side="left"), grid["y"].size)
+        if (x_end <= x_start or y_end <= y_start):
+            structure["fill"] = (0, 0, 0, 0, np.zeros((0, 0)))
+            return structure["fill"]
+        x_edges = grid["x_edges"][x_start:x_end + 1]
+        y_edges = grid["y_edges"][y_start:y_end + 1]
+        area = np.zeros((x_end - x_start, y_end - y_start))
+        for polygon in structure["polygons"]:
+            area += polygon_cell_areas(polygon, x_edges, y_edges)
+        fill = np.clip(area / (np.diff(x_edges)[:, None] * np.diff(y_edges)[None, :]), 0, 1)
+        structure["fill"] = (x_start, x_end, y_start, y_end, fill)
+        return structure["fill"]
+
+    def get_epsilon(self):
+        """
+        Get the permittivity on the simulation grid (PML included).
+
+        Returns
+        -------
+        out : Array, Array, Array
+            Permittivity, x positions (unit: μm) and y positions (unit: μm), size: (nx, ny), (nx,), (ny,).
+        """
+        grid = self.__get_grid()
+        background = self.__region_background()
+        epsilon = np.full((grid["x"].size, grid["y"].size), background)
+        coverage = np.zeros(epsilon.shape)
+        for structure in self.__structures.values():
+            if not structure["enabled"]:
+                continue
+            x_start, x_end, y_start, y_end, fill = self.__structure_fill(structure)
+            block = epsilon[x_start:x_end, y_start:y_end]
+            covered = coverage[x_start:x_end, y_start:y_end]
+            ## a later structure takes the uncovered part of a cell first (abutting structures add up), only the
+            ## exceeding part overrides the earlier structures
+            overlap = np.maximum(fill + covered - 1, 0)
+            structured = block - background * (1 - covered)
+            kept = np.divide(covered - overlap, covered, out=np.zeros(covered.shape), where=covered > 0)
+            epsilon[x_start:x_end, y_start:y_end] = (background * (1 - covered - fill + overlap) + structured * kept +
+                                                     structure["epsilon"] * fill)
+            coverage[x_start:x_end, y_start:y_end] = covered + fill - overlap
+        tolerance = grid["step"] * 1e-3
+        for region in self.__imports.values():
+            if not region["enabled"]:
+                continue
+            x_mask = (grid["x"] >= region["x"].min() - tolerance) & (grid["x"] <= region["x"].max() + tolerance)
+            y_mask = (grid["y"] >= region["y"].min() - tolerance) & (grid["y"] <= region["y"].max() + tolerance)
+            if not (np.any(x_mask) and np.any(y_mask)):
+                continue
+            x_matrix = linear_interpolation_matrix(region["x"], grid["x"][x_mask])
+            y_matrix = linear_interpolation_matrix(region["y"], grid["y"][y_mask])
+            epsilon[np.ix_(x_mask, y_mask)] = x_matrix.dot(region["epsilon"]).dot(y_matrix.transpose())
+        return epsilon, grid["x"], grid["y"]
+
+    def __system_matrix(self, epsilon, k0):
+        grid = self.__get_grid()
+        region = self.__region
+        step = grid["step"]
+        nx = grid["x"].size
+        ny = grid["y"].size
+        sx_node = self.__pml_stretch(grid["x"], region["x_min"], region["x_max"], k0)
+        sx_half = self.__pml_stretch(grid["x"] + step / 2, region["x_min"], region["x_max"], k0)
+        sy_node = self.__pml_stretch(grid["y"], region["y_min"], region["y_max"], k0)
+        sy_half = self.__pml_stretch(grid["y"] + step / 2, region["y_min"], region["y_max"], k0)
+        dxf = scipy.sparse.kron(scipy.sparse.diags(1 / sx_half).dot(_difference_matrix(nx, step, 1)), scipy.sparse.identity(ny))
+        dxb = scipy.sparse.kron(scipy.sparse.diags(1 / sx_node).dot(_difference_matrix(nx, step, 0)), scipy.sparse.identity(ny))
+        dyf = scipy.sparse.kron(scipy.sparse.identity(nx), scipy.sparse.diags(1 / sy_half).dot(_difference_matrix(ny, step, 1)))
+        dyb = scipy.sparse.kron(scipy.sparse.identity(nx), scipy.sparse.diags(1 / sy_node).dot(_difference_matrix(ny, step, 0)))
+        if (self.polarization == TM):
+            return (dxb.dot(dxf) + dyb.dot(dyf) + scipy.sparse.diags(k0 ** 2 * epsilon.flatten())).tocsc()
+        epsilon_x, epsilon_y = self.__edge_epsilon(epsilon)
+        return (dxb.dot(scipy.sparse.diags(1 / epsilon_y.flatten())).dot(dxf) +
+                dyb.dot(scipy.sparse.diags(1 / epsilon_x.flatten())).dot(dyf) +
+                k0 ** 2 * scipy.sparse.identity(nx * ny)).tocsc()
+
+    @staticmethod
+    def __edge_epsilon(epsilon):
+        ## Ex at (i, j+1/2), Ey at (i+1/2, j)
+        epsilon_x = epsilon.copy()
+        epsilon_x[:, :-1] = (epsilon[:, :-1] + epsilon[:, 1:]) / 2
+        epsilon_y = epsilon.copy()
+        epsilon_y[:-1, :] = (epsilon[:-1, :] + epsilon[1:, :]) / 2
+        return epsilon_x, epsilon_y
+
+    def __line(self, position, width, normal_direction):
+        """
+        Indices of a source/monitor line: the normal index, the transverse indices and the axis of the normal.
+        """
+        grid = self.__get_grid()
+        position = tuple_to_point(position)
+        if (normal_direction == HORIZONTAL):
+            normal_positions, transverse_positions, center, transverse_center = grid["x"], grid["y"], position.x, position.y
+        else:
+            normal_positions, transverse_positions, center, transverse_center = grid["y"], grid["x"], position.y, position.x
+        normal_index = int(np.argmin(np.abs(normal_positions - center)))
+        tolerance = grid["step"] * 1e-3
+        transverse = np.where(np.abs(transverse_positions - transverse_center) <= width / 2 + tolerance)[0]
+        if (transverse.size < 3 or normal_index < 2 or normal_index > normal_positions.size - 3):
+            raise Exception("The source or monitor should be inside the simulation region.")
+        return normal_index, transverse, 0 if normal_direction == HORIZONTAL else 1
+
+    @staticmethod
+    def __take_line(array, normal_index, transverse, axis):
+        if (axis == 0):
+            return array[normal_index, transverse]
+        return array[transverse, normal_index]
+
+    def __line_mode(self, epsilon, position, width, normal_direction, mode_number, frequency_index):
+        """
+        Mode of the discrete cross-section at a line.
+
+        Returns
+        -------
+        out : Dict
+            normal_index, transverse, axis, profile (dominant field, max |E| = 1 V/m), weight (for the projection),
+            theta (phase advance per grid unit), power (unit: W/m, of the profile).
+        """
+        step = self.__get_grid()["step"]
+        normal_index, transverse, axis = self.__line(position, width, normal_direction)
+        wavelength = self.get_wavelength()[frequency_index] * 1e6
+        k0 = 2 * np.pi / wavelength
+        epsilon_node = self.__take_line(epsilon, normal_index, transverse, axis)
+        epsilon_edge = epsilon_node.copy()
+        epsilon_edge[:-1] = (epsilon_node[:-1] + epsilon_node[1:]) / 2
+        ## the modes of a line are solved once for its permittivity and wavelength
+        key = ModeProfileCache.key(epsilon_node, k0, step, self.polarization)
+        line_modes = self.__mode_cache.get(key)
+        if (type(line_modes) == type(None)):
+            beta_square, profiles = _slab_eigenmodes(epsilon_node, epsilon_edge, k0, step, self.polarization)
+            line_modes = {"beta_square": beta_square, "profiles": profiles}
+            self.__mode_cache.put(key, line_modes)
+        beta_square, profiles = line_modes["beta_square"], line_modes["profiles"]
+        if (mode_number > beta_square.size or beta_square[mode_number - 1] <= 0):
+            raise Exception("The mode " + str(mode_number) + " is not supported by the cross-section.")
+        cosine = 1 - beta_square[mode_number - 1] * step ** 2 / 2
+        if (cosine <= -1):
+            raise Exception("The grid is too coarse for the mode, use a smaller mesh.")
+        theta = np.arccos(cosine)
+        profile = profiles[:, mode_number - 1]
+        profile = profile * np.sign(profile[np.argmax(np.abs(profile))])
+        omega = 2 * np.pi * scipy.constants.speed_of_light / (wavelength * 1e-6)
+        beta_flux = np.sin(theta) / (step * 1e-6)
+        if (self.polarization == TM):
+            weight = np.ones(profile.size)
+            profile = profile / np.max(np.abs(profile))
+            power = np.sum(beta_flux * profile ** 2 / (2 * omega * scipy.constants.mu_0)) * step * 1e-6
+        else:
+            weight = 1 / epsilon_node
+            electric = beta_flux * profile / (omega * scipy.constants.epsilon_0 * epsilon_node)
+            profile = profile / np.max(np.abs(electric))
+            power = np.sum(beta_flux * profile ** 2 / (2 * omega * scipy.constants.epsilon_0 * epsilon_node)) * step * 1e-6
+        return {"normal_index": normal_index, "transverse": transverse, "axis": axis, "profile": profile,
+                "weight": weight, "theta": theta, "power": power}
+
+    def __source_vector(self, system_matrix, epsilon, source, frequency_index):
+        mode = self.__line_mode(epsilon, source["position"], source["width"], source["normal_direction"],
+                                source["mode_number"], frequency_index)
+        shape = epsilon.shape
+        normal_index = mode["normal_index"]
+        sign = 1 if source["direction"] == FORWARD else -1
+        ## incident field on the neighbouring lines, total field on the side of the propagation direction
+        incident = np.zeros(shape, dtype=np.complex128)
+        mask = np.zeros(shape)
+        amplitude = source["amplitude"] * np.exp(1j * np.deg2rad(source["phase"]))
+        if (self.polarization == TE):
+            ## the amplitude refers to the transverse electric field, which has the sign of sign * Hz
+            amplitude = amplitude * sign
+        for offset in range(-2, 3):
+            line = amplitude * mode["profile"] * np.exp(1j * sign * mode["theta"] * offset)
+            if (mode["axis"] == 0):
+                incident[normal_index + offset, mode["transverse"]] = line
+            else:
+                incident[mode["transverse"], normal_index + offset] = line
+        if (mode["axis"] == 0):
+            if (sign > 0):
+                mask[normal_index:, :] = 1
+            else:
+                mask[:normal_index + 1, :] = 1
+        else:
+            if (sign > 0):
+                mask[:, normal_index:] = 1
+            else:
+                mask[:, :normal_index + 1] = 1
+        incident = incident.flatten()
+        mask = mask.flatten()
+        vector = system_matrix.dot(mask * incident) - mask * system_matrix.dot(incident)
+        ## only the two lines at the boundary of the total field are sources, the rest is the truncation of the band
+        keep = np.zeros(shape)
+        lines = [normal_index - 1, normal_index] if sign > 0 else [normal_index, normal_index + 1]
+        if (mode["axis"] == 0):
+            keep[lines, :] = 1
+        else:
+            keep[:, lines] = 1
+        return vector * keep.flatten(), abs(amplitude) ** 2 * mode["power"]
+
+    def __get_factorization(self, frequency_index, system_matrix, epsilon):
+        if (type(self.__factorized_epsilon) == type(None) or not np.array_equal(self.__factorized_epsilon, epsilon)):
+            self.__factorizations = {}
+            self.__factorized_epsilon = epsilon.copy()
+        if (frequency_index in self.__factorizations):
+            self.__statistics["reused_factorizations"] += 1
+            return self.__factorizations[frequency_index]
+        factorization = scipy.sparse.linalg.splu(system_matrix)
+        self.__statistics["factorizations"] += 1
+        if self.keep_factorization:
+            self.__factorizations[frequency_index] = factorization
+        return factorization
+
+    def run(self, filename = "temp"):
+        """
+        Solve the fields of the enabled sources at all the frequency points.
+
+        Parameters
+        ----------
+        filename : String
+            Kept for compatibility with FDTDSimulation (nothing is saved).
+        """
+        epsilon, x, y = self.get_epsilon()
+        wavelength = self.get_wavelength() * 1e6
+        solutions = np.zeros((wavelength.size, x.size, y.size), dtype=np.complex128)
+        source_powers = {}
+        for name in self.__sources:
+            source_powers[name] = np.zeros(wavelength.size)
+        enabled_sources = [name for name in self.__sources if self.__sources[name]["enabled"]]
+        for frequency_index in range(0, wavelength.size):
+            system_matrix = None
+            right_hand_side = np.zeros(x.size * y.size, dtype=np.complex128)
+            for name in self.__sources:
+                if (type(system_matrix) == type(None)):
+                    system_matrix = self.__system_matrix(epsilon, 2 * np.pi / wavelength[frequency_index])
+                vector, power = self.__source_vector(system_matrix, epsilon, self.__sources[name], frequency_index)
+                source_powers[name][frequency_index] = power
+                if name in enabled_sources:
+                    right_hand_side += vector
+            if (len(enabled_sources) == 0):
+                continue
+            factorization = self.__get_factorization(frequency_index, system_matrix, epsilon)
+            solutions[frequency_index] = factorization.solve(right_hand_side).reshape(x.size, y.size)
+            self.__statistics["solves"] += 1
+        self.__solutions = solutions
+        self.__solved_epsilon = epsilon
+        self.__source_powers = source_powers
+        self.__enabled_sources = enabled_sources
+
+    def __require_solutions(self):
+        if (type(self.__solutions) == type(None)):
+            raise Exception("No results, run the simulation first.")
+
+    def get_source_power(self, source_name = None, wavelengths = None, datafile = None):
+        """
+        Get source power spectrum from source.
+
+        Parameters
+        ----------
+        source_name : String
+            Name of the source (default: None, the total of the enabled sources in the last run).
+        datafile : String
+            The name of the file for saving the data, None means no saving (default: None).
+
+        Returns
+        -------
+        out : Array
+            Spectrum (unit: W/m), size: (frequency points,).
+
+        Notes
+        -----
+        The power is that of the injected mode at the frequency points of the last run, wavelengths is kept for
+        compatibility with FDTDSimulation.
+        """
+        self.__require_solutions()
+        if (type(source_name) == type(None)):
+            source_power = np.zeros(self.__solutions.shape[0])
+            for name in self.__enabled_sources:
+                source_power += self.__source_powers[name]
+        else:
+            source_power = self.__source_powers[str(source_name)]
+        if (datafile != None):
+            np.save(datafile, source_power)
+        return source_power.copy()
+
+    def get_mode_coefficient(self, expansion_name, direction = FORWARD, datafile = None):
+        """
+        Get mode coefficients from mode expansion monitor after running the simulation (|coefficient|^2 is the power
+        in the mode).
+
+        Parameters
+        ----------
+        expansion_name : String
+            Name of the mode expansion monitor.
+        direction : Int
+            The light propagation direction 1: the positive direction of the axis, 0: the negative direction (FORWARD:1,
+            BACKWARD:0 , default: FORWARD).
+        datafile : String
+            The name of the file for saving the data, None means no saving (default: None).
+
+        Returns
+        -------
+        out : Array
+            Spectrum, size: (frequency points * number of modes,).
+        """
+        coefficients = self.__mode_coefficients(expansion_name, direction)
+        if (datafile != None):
+            np.save(datafile, coefficients.flatten())
+        return coefficients.flatten()
+
+    def __mode_coefficients(self, expansion_name, direction):
+        if (direction != FORWARD and direction != BACKWARD):
+            raise Exception("Wrong direction setting!")
+        self.__require_solutions()
+        monitor = self.__mode_monitors[expansion_name]
+        coefficients = np.zeros((self.__solutions.shape[0], len(monitor["mode_list"])), dtype=np.complex128)
+        for frequency_index in range(0, self.__solutions.shape[0]):
+            for k, mode_number in enumerate(monitor["mode_list"]):
+                mode = self.__line_mode(self.__solved_epsilon, monitor["position"], monitor["width"],
+                                        monitor["normal_direction"], mode_number, frequency_index)
+                field = self.__solutions[frequency_index]
+                norm = np.sum(mode["weight"] * mode["profile"] ** 2)
+                projections = [np.sum(mode["weight"] * mode["profile"] *
+                                      self.__take_line(field, mode["normal_index"] + offset, mode["transverse"], mode["axis"])) / norm
+                               for offset in [0, 1]]
+                phase = np.exp(1j * mode["theta"])
+                forward = (projections[1] - projections[0] / phase) / (phase - 1 / phase)
+                amplitude = forward if direction == FORWARD else projections[0] - forward
+                if (self.polarization == TE and direction == BACKWARD):
+                    ## referred to the transverse electric field as the sources
+                    amplitude = -amplitude
+                coefficients[frequency_index, k] = amplitude * np.sqrt(mode["power"])
+        return coefficients
+
+    def get_mode_transmission(self, expansion_name, direction = FORWARD, datafile = None):
+        """
+        Get the transmissions of the modes from mode expansion monitor (normalized by the total source power).
+
+        Parameters
+        ----------
+        expansion_name : String
+            Name of the mode expansion monitor.
+        direction : Int
+            FORWARD or BACKWARD (default: FORWARD).
+        datafile : String
+            The name of the file for saving the data, None means no saving (default: None).
+
+        Returns
+        -------
+        out : Array
+            Spectrum [[wavelength,transmission],...], size: (number of modes,2,frequency points).
+        """
+        coefficients = self.__mode_coefficients(expansion_name, direction)
+        source_power = self.get_source_power()
+        spectrum = np.zeros((coefficients.shape[1], 2, coefficients.shape[0]))
+        for i in range(0, coefficients.shape[1]):
+            spectrum[i, 0, :] = self.get_wavelength()
+            spectrum[i, 1, :] = np.abs(coefficients[:, i]) ** 2 / source_power
+        if (datafile != None):
+            np.save(datafile, spectrum)
+        return spectrum
+
+    def get_transmission(self, monitor_name, datafile = None):
+        """
+        Get the net power through a power monitor (normalized by the total source power).
+
+        Parameters
+        ----------
+        monitor_name : String
+            Name of the power monitor.
+        datafile : String
+            The name of the file for saving the data, None means no saving (default: None).
+
+        Returns
+        -------
+        out : Array
+            Spectrum [wavelength,transmission], size: (2,frequency points).
+        """
+        self.__require_solutions()
+        monitor = self.__power_monitors[monitor_name]
+        normal_index, transverse, axis = self.__line(monitor["position"], monitor["width"], monitor["normal_direction"])
+        step = self.__get_grid()["step"] * 1e-6
+        omega = self.get_omega()
+        flux = np.zeros(self.__solutions.shape[0])
+        for frequency_index in range(0, self.__solutions.shape[0]):
+            field = self.__solutions[frequency_index]
+            center = self.__take_line(field, normal_index, transverse, axis)
+            derivative = (self.__take_line(field, normal_index + 1, transverse, axis) -
+                          self.__take_line(field, normal_index - 1, transverse, axis)) / (2 * step)
+            if (self.polarization == TM):
+                ## S_n = Re(E_z conj(dE_z/dn) / (i omega mu_0)) / 2
+                density = np.real(center * np.conj(derivative / (1j * omega[frequency_index] * scipy.constants.mu_0))) / 2
+            else:
+                epsilon = self.__take_line(self.__solved_epsilon, normal_index, transverse, axis)
+                ## S_n = Re(E_t conj(H_z)) / 2, E_t = dH_z/dn / (i omega epsilon)
+                density = np.real(derivative / (1j * omega[frequency_index] * scipy.constants.epsilon_0 * epsilon) * np.conj(center)) / 2
+            flux[frequency_index] = np.sum(density) * step
+        spectrum = np.zeros((2, flux.size))
+        spectrum[0, :] = self.get_wavelength()
+        spectrum[1, :] = flux / self.get_source_power()
+        if (datafile != None):
+            np.save(datafile, spectrum)
+        return spectrum
+
+    def __electric_field(self, frequency_index):
+        """
+        Electric field at the nodes, size: (nx, ny, 3).
+        """
+        field = self.__solutions[frequency_index]
+        electric = np.zeros(field.shape + (3,), dtype=np.complex128)
+        if (self.polarization == TM):
+            electric[:, :, 2] = field
+            return electric
+        step = self.__get_grid()["step"] * 1e-6
+        omega = self.get_omega()[frequency_index]
+        epsilon_x, epsilon_y = self.__edge_epsilon(self.__solved_epsilon)
+        factor = -1j * omega * scipy.constants.epsilon_0
+        ## Ex = dHz/dy / (-i omega epsilon), Ey = -dHz/dx / (-i omega epsilon), averaged from the edges to the nodes
+        edge_x = np.zeros(field.shape, dtype=np.complex128)
+        edge_x[:, :-1] = (field[:, 1:] - field[:, :-1]) / step / (factor * epsilon_x[:, :-1])
+        edge_y = np.zeros(field.shape, dtype=np.complex128)
+        edge_y[:-1, :] = -(field[1:, :] - field[:-1, :]) / step / (factor * epsilon_y[:-1, :])
+        electric[:, 1:, 0] = (edge_x[:, 1:] + edge_x[:, :-1]) / 2
+        electric[:, 0, 0] = edge_x[:, 0] / 2
+        electric[1:, :, 1] = (edge_y[1:, :] + edge_y[:-1, :]) / 2
+        electric[0, :, 1] = edge_y[0, :] / 2
+        return electric
+
+    def __region_indices(self, bottom_left, top_right, down_sample = 1):
+        grid = self.__get_grid()
+        tolerance = grid["step"] * 1e-3
+        x_index = np.where((grid["x"] >= min(bottom_left.x, top_right.x) - tolerance) &
+                           (grid["x"] <= max(bottom_left.x, top_right.x) + tolerance))[0][::down_sample]
+        y_index = np.where((grid["y"] >= min(bottom_left.y, top_right.y) - tolerance) &
+                           (grid["y"] <= max(bottom_left.y, top_right.y) + tolerance))[0][::down_sample]
+        return x_index, y_index
+
+    def get_E_distribution(self, field_monitor_name = "field", data_name = "field_data_E", datafile = None, if_get_spatial = 0):
+        """
+        Get electric field distribution from field monitor.
+
+        Parameters
+        ----------
+        field_monitor_name : String
+            Name of the field monitor (default: "field").
+        data_name : String
+            Kept for compatibility with FDTDSimulation.
+        datafile : String
+            The name of the file for saving the data, None means no saving (default: None).
+        if_get_spatial : Bool
+            Whether get spatial information as return (default: 0).
+
+        Returns
+        -------
+        out : Array
+            if if_get_spatial == 0: field
+                size: (x mesh, y mesh, 1, frequency points, 3).
+            if if_get_spatial == 1: field, x mesh, y mesh, z mesh
+                size: (x mesh, y mesh, 1, frequency points, 3), (x mesh,), (y mesh,), (1,)
+        """
+        self.__require_solutions()
+        region = self.__field_regions[field_monitor_name]
+        x_index, y_index = self.__region_indices(region["bottom_left"], region["top_right"], region["down_sample"])
+        frequency_indices = region["frequency_indices"]
+        if (type(frequency_indices) == type(None)):
+            frequency_indices = np.arange(0, self.__solutions.shape[0])
+        field = np.zeros((x_index.size, y_index.size, 1, len(frequency_indices), 3), dtype=np.complex128)
+        for k, frequency_index in enumerate(frequency_indices):
+            field[:, :, 0, k, :] = self.__electric_field(frequency_index)[np.ix_(x_index, y_index)]
+        if (datafile != None):
+            np.save(datafile, field)
+        if if_get_spatial:
+            grid = self.__get_grid()
+            return field, grid["x"][x_index] * 1e-6, grid["y"][y_index] * 1e-6, np.zeros(1)
+        return field
+
+    def get_epsilon_distribution(self, index_monitor_name = "index", data_name = "index_data", datafile = None):
+        """
+        Get epsilon distribution from index monitor (the permittivity of the current structures).
+
+        Parameters
+        ----------
+        index_monitor_name : String
+            Name of the index monitor (default: "index").
+        data_name : String
+            Kept for compatibility with FDTDSimulation.
+        datafile : String
+            The name of the file for saving the data, None means no saving (default: None).
+
+        Returns
+        -------
+        out : Array
+            Spectrum, size: (x mesh, y mesh, 1, 3).
+        """
+        region = self.__index_regions[index_monitor_name]
+        epsilon, x, y = self.get_epsilon()
+        x_index, y_index = self.__region_indices(region["bottom_left"], region["top_right"])
+        epsilon = epsilon[np.ix_(x_index, y_index)]
+        if (self.polarization == TE):
+            epsilon_x, epsilon_y = self.__edge_epsilon(self.get_epsilon()[0])
+            fields_eps = np.stack((epsilon_x[np.ix_(x_index, y_index)], epsilon_y[np.ix_(x_index, y_index)], epsilon), axis=-1)
+        else:
+            fields_eps = np.stack((epsilon, epsilon, epsilon), axis=-1)
+        fields_eps = fields_eps[:, :, None, :]
+        if (datafile != None):
+            np.save(datafile, fields_eps)
+        return fields_eps
+
+    def get_solver_statistics(self):
+        """
+        Return the counts of the LU factorizations (new and reused), the solves and the mode solves of the sources and
+        the monitors.
+
+        Returns
+        -------
+        out : Dict
+            factorizations, reused_factorizations, solves and mode_solves.
+        """
+        statistics = dict(self.__statistics)
+        statistics["mode_solves"] = self.__mode_cache.get_statistics()[1]
+        return statistics
+
+    def clear_factorizations(self):
+        """
+        Drop the kept LU factorizations (e.g. to release the memory).
+        """
+        self.__factorizations = {}
+        self.__factorized_epsilon = None
+
+    def save(self, filename = "temp"):
+        """
+        Save the simulation setup (structures, sources and monitors, without the results) as a pickle file.
+
+        Parameters
+        ----------
+        filename : String
+            File name or File path (default: "temp").
+        """
+        state = {"mesh": self.mesh, "polarization": self.polarization, "material_indices": self.material_indices,
+                 "region": self.__region, "structures": self.__structures, "imports": self.__imports,
+                 "sources": self.__sources, "mode_monitors": self.__mode_monitors,
+                 "power_monitors": self.__power_monitors, "field_regions": self.__field_regions,
+                 "index_regions": self.__index_regions,
+                 "wavelength": (getattr(self, "wavelength_start", None), getattr(self, "wavelength_end", None),
+                                getattr(self, "frequency_points", None)),
+                 "flags": (self.global_source_set_flag, self.global_monitor_set_flag)}
+        with open(filename, "wb") as simulation_file:
+            pickle.dump(state, simulation_file)
+
+    def load(self, filename):
+        """
+        Load a simulation setup saved by save.
+
+        Parameters
+        ----------
+        filename : String
+            File path of the setup.
+        """
+        with open(filename, "rb") as simulation_file:
+            state = pickle.load(simulation_file)
+        self.mesh = state["mesh"]
+        self.polarization = state["polarization"]
+        self.material_indices = state["material_indices"]
+        self.__region = state["region"]
+        self.__structures = state["structures"]
+        self.__imports = state["imports"]
+        self.__sources = state["sources"]
+        self.__mode_monitors = state["mode_monitors"]
+        self.__power_monitors = state["power_monitors"]
+        self.__field_regions = state["field_regions"]
+        self.__index_regions = state["index_regions"]
+        self.wavelength_start, self.wavelength_end, self.frequency_points = state["wavelength"]
+        self.global_source_set_flag, self.global_monitor_set_flag = state["flags"]
+        self.__invalidate_grid()
+
+    def clone(self, hide = 1):
+        """
+        Create an empty FDFDSimulation with the same settings, use load to copy a saved setup into it.
+
+        Returns
+        -------
+        out : FDFDSimulation
+            The new simulation.
+        """
+        return FDFDSimulation(mesh=self.mesh, polarization=self.polarization, material_indices=self.material_indices,
+                              keep_factorization=self.keep_factorization)
+
+    def close(self):
+        """
+        Drop the results and the factorizations.
+        """
+        self.__solutions = None
+        self.clear_factorizations()
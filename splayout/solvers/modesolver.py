@@ -0,0 +1,513 @@
+from ..utils.utils import *
+from collections import OrderedDict
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+import scipy.constants
+import hashlib
+import os
+
+
+def _slab_eigenmodes(epsilon_node, epsilon_edge, k0, step, polarization):
+    """
+    Eigenmodes of a 1D cross-section discretized with a uniform grid (zero fields outside).
+
+    Parameters
+    ----------
+    epsilon_node : Array
+        Permittivity at the nodes of the line (for the dominant field).
+    epsilon_edge : Array
+        Permittivity between the nodes of the line (for the transverse derivative), same size as epsilon_node.
+    k0 : Float
+        Wave number in vacuum (unit: 1/μm).
+    step : Float
+        Grid unit (unit: μm).
+    polarization : TE or TM
+        TE: Hz is the dominant field (electric field in the plane of the slab), TM: Ez.
+
+    Returns
+    -------
+    out : Array, Array
+        Squared propagation constants in descending order (unit: 1/μm^2), profiles of the dominant field, size: (modes,),
+        (line points, modes).
+    """
+    size = epsilon_node.size
+    forward = (np.eye(size, k=1) - np.eye(size)) / step
+    backward = (np.eye(size) - np.eye(size, k=-1)) / step
+    if (polarization == TM):
+        operator = backward.dot(forward) + np.diag(k0 ** 2 * epsilon_node)
+        beta_square, profiles = np.linalg.eigh(operator)
+    else:
+        root = np.sqrt(epsilon_node)
+        operator = backward.dot(np.diag(1 / epsilon_edge)).dot(forward) + k0 ** 2 * np.eye(size)
+        beta_square, profiles = np.linalg.eigh(root[:, None] * operator * root[None, :])
+        profiles = root[:, None] * profiles
+    order = np.argsort(beta_square)[::-1]
+    return beta_square[order], profiles[:, order]
+
+
+def solve_slab_modes(positions, epsilon, wavelength, number_of_modes = 1, polarization = TE):
+    """
+    Solve the modes of a slab (1D cross-section) with the finite-difference method.
+
+    Parameters
+    ----------
+    positions : Array
+        Uniform positions of the cross-section (unit: μm), size: (n,).
+    epsilon : Array
+        Permittivity at the positions, size: (n,).
+    wavelength : Float
+        Wavelength (unit: μm).
+    number_of_modes : Int
+        Number of modes with the largest effective indices (default: 1).
+    polarization : TE or TM
+        TE: Hz is the dominant field (electric field in the plane of the slab), TM: Ez (default: TE).
+
+    Returns
+    -------
+    out : Array, Array
+        Effective indices and profiles of the dominant field (max |profile| = 1), size: (modes,), (n, modes).
+    """
+    positions = np.asarray(positions, dtype=np.float64).flatten()
+    epsilon = np.real(np.asarray(epsilon)).astype(np.float64).flatten()
+    if (positions.size != epsilon.size or positions.size < 3):
+        raise Exception("The positions and the epsilon of a slab should have the same size (at least 3).")
+    step = (positions[-1] - positions[0]) / (positions.size - 1)
+    epsilon_edge = epsilon.copy()
+    epsilon_edge[:-1] = (epsilon[:-1] + epsilon[1:]) / 2
+    k0 = 2 * np.pi / wavelength
+    beta_square, profiles = _slab_eigenmodes(epsilon, epsilon_edge, k0, step, polarization)
+    beta_square = beta_square[:number_of_modes]
+    profiles = profiles[:, :number_of_modes]
+    profiles = profiles / np.max(np.abs(profiles), axis=0)
+    profiles = profiles * np.sign(profiles[np.argmax(np.abs(profiles), axis=0), np.arange(profiles.shape[1])])
+    return np.sqrt(beta_square.astype(np.complex128)) / k0, profiles
+
+
+def _difference_operators(positions):
+    """
+    Forward (node to edge) and backward (edge to node) differences on a rectilinear axis with zero fields outside.
+    """
+    size = positions.size
+    node_steps = np.diff(positions)
+    node_steps = np.append(node_steps, node_steps[-1])
+    edge_steps = np.concatenate(([node_steps[0]], (node_steps[:-1] + node_steps[1:]) / 2))
+    forward = scipy.sparse.diags([-1 / node_steps, 1 / node_steps[:-1]], [0, 1], shape=(size, size), format="csr")
+    backward = scipy.sparse.diags([1 / edge_steps, -1 / edge_steps[1:]], [0, -1], shape=(size, size), format="csr")
+    return forward, backward, edge_steps
+
+
+def solve_channel_modes(u_positions, v_positions, epsilon, wavelength, number_of_modes = 1, neff_guess = None):
+    """
+    Solve the full-vectorial modes of a waveguide cross-section with the finite-difference method (Yee grid, the
+    boundaries are perfect electric conductors, so the cross-section should be large enough for the modes to decay).
+
+    Parameters
+    ----------
+    u_positions : Array
+        Positions of the first transverse axis (unit: μm), size: (nu,).
+    v_positions : Array
+        Positions of the second transverse axis (unit: μm), size: (nv,).
+    epsilon : Array
+        Permittivity at the nodes, size: (nu, nv).
+    wavelength : Float
+        Wavelength (unit: μm).
+    number_of_modes : Int
+        Number of modes with the effective indices closest to neff_guess (default: 1).
+    neff_guess : Float
+        Guess of the effective index (default: None, the largest refractive index of the cross-section).
+
+    Returns
+    -------
+    out : Array, Array, Array
+        Effective indices (descending), electric fields (unit: V/m) and magnetic fields (unit: A/m) at the nodes, the
+        components are (u, v, w) with w = u x v the propagation direction and the power of each mode is 1 W,
+        size: (modes,), (modes, nu, nv, 3), (modes, nu, nv, 3).
+    """
+    u_positions = np.asarray(u_positions, dtype=np.float64).flatten()
+    v_positions = np.asarray(v_positions, dtype=np.float64).flatten()
+    epsilon = np.asarray(epsilon)
+    nu = u_positions.size
+    nv = v_positions.size
+    if (epsilon.shape != (nu, nv)):
+        raise Exception("The size of epsilon should be (u points, v points).")
+    k0 = 2 * np.pi / wavelength
+    uf, ub, u_steps = _difference_operators(u_positions)
+    vf, vb, v_steps = _difference_operators(v_positions)
+    identity_u = scipy.sparse.identity(nu)
+    identity_v = scipy.sparse.identity(nv)
+    duf = scipy.sparse.kron(uf, identity_v, format="csr")
+    dub = scipy.sparse.kron(ub, identity_v, format="csr")
+    dvf = scipy.sparse.kron(identity_u, vf, format="csr")
+    dvb = scipy.sparse.kron(identity_u, vb, format="csr")
+    ## Eu at (i+1/2, j), Ev at (i, j+1/2), Ew at (i, j)
+    epsilon_u = epsilon.astype(np.complex128)
+    epsilon_u[:-1, :] = (epsilon[:-1, :] + epsilon[1:, :]) / 2
+    epsilon_v = epsilon.astype(np.complex128)
+    epsilon_v[:, :-1] = (epsilon[:, :-1] + epsilon[:, 1:]) / 2
+    inverse_w = scipy.sparse.diags(1 / epsilon.flatten())
+    identity = scipy.sparse.identity(nu * nv)
+    ## beta [Eu, Ev] = P [Hu, Hv] and beta [Hu, Hv] = Q [Eu, Ev] (H scaled by the impedance of vacuum)
+    p_matrix = scipy.sparse.bmat([[-duf.dot(inverse_w).dot(dvb) / k0, k0 * identity + duf.dot(inverse_w).dot(dub) / k0],
+                                  [-k0 * identity - dvf.dot(inverse_w).dot(dvb) / k0, dvf.dot(inverse_w).dot(dub) / k0]])
+    q_matrix = scipy.sparse.bmat([[dub.dot(dvf) / k0, -k0 * scipy.sparse.diags(epsilon_v.flatten()) - dub.dot(duf) / k0],
+                                  [k0 * scipy.sparse.diags(epsilon_u.flatten()) + dvb.dot(dvf) / k0, -dvb.dot(duf) / k0]])
+    operator = p_matrix.dot(q_matrix).tocsc()
+    if (type(neff_guess) == type(None)):
+        neff_guess = np.sqrt(np.max(np.real(epsilon)))
+    beta_square, vectors = scipy.sparse.linalg.eigs(operator, k=number_of_modes, sigma=(k0 * neff_guess) ** 2,
+                                                    which="LM")
+    order = np.argsort(np.real(beta_square))[::-1]
+    beta_square = beta_square[order]
+    vectors = vectors[:, order]
+    beta = np.sqrt(beta_square)
+    area = (u_steps[:, None] * v_steps[None, :]) * 1e-12
+    electric_fields = np.zeros((number_of_modes, nu, nv, 3), dtype=np.complex128)
+    magnetic_fields = np.zeros((number_of_modes, nu, nv, 3), dtype=np.complex128)
+    impedance = np.sqrt(scipy.constants.mu_0 / scipy.constants.epsilon_0)
+    for k in range(0, number_of_modes):
+        electric = vectors[:, k]
+        magnetic = q_matrix.dot(electric) / beta[k]
+        eu, ev = electric[:nu * nv], electric[nu * nv:]
+        hu, hv = magnetic[:nu * nv], magnetic[nu * nv:]
+        ew = 1j * (dub.dot(hv) - dvb.dot(hu)) / (k0 * epsilon.flatten())
+        hw = -1j * (duf.dot(ev) - dvf.dot(eu)) / k0
+        electric_field = np.stack((_to_nodes(eu.reshape(nu, nv), 0), _to_nodes(ev.reshape(nu, nv), 1),
+                                   ew.reshape(nu, nv)), axis=-1)
+        magnetic_field = np.stack((_to_nodes(hu.reshape(nu, nv), 1), _to_nodes(hv.reshape(nu, nv), 0),
+                                   _to_nodes(_to_nodes(hw.reshape(nu, nv), 0), 1)), axis=-1) / impedance
+        power = np.sum(np.real(electric_field[:, :, 0] * np.conj(magnetic_field[:, :, 1]) -
+                               electric_field[:, :, 1] * np.conj(magnetic_field[:, :, 0])) * area) / 2
+        index = np.unravel_index(np.argmax(np.abs(electric_field)), electric_field.shape)
+        phase = np.exp(-1j * np.angle(electric_field[index]))
+        scale = phase / np.sqrt(np.abs(power))
+        electric_fields[k] = electric_field * scale
+        magnetic_fields[k] = magnetic_field * scale
+    return beta / k0, electric_fields, magnetic_fields
+
+
+def _to_nodes(field, axis):
+    """
+    Average a staggered field (at i+1/2 along the axis) to the nodes.
+    """
+    padded = np.concatenate((np.zeros_like(field.take([0], axis=axis)), field), axis=axis)
+    return (padded.take(range(0, field.shape[axis]), axis=axis) + padded.take(range(1, field.shape[axis] + 1), axis=axis)) / 2
+
+
+def rectangular_cross_section(width, height, core_index = 3.478, cladding_index = 1.444, substrate_index = None,
+                              span_u = None, span_v = None, mesh = 0.02):
+    """
+    Permittivity of a rectangular channel waveguide cross-section centered at (0, 0).
+
+    Parameters
+    ----------
+    width : Float
+        Width of the core (in the u axis, unit: μm).
+    height : Float
+        Height of the core (in the v axis, unit: μm).
+    core_index : Float
+        Refractive index of the core (default: 3.478).
+    cladding_index : Float
+        Refractive index of the cladding (default: 1.444).
+    substrate_index : Float
+        Refractive index below the core, v < -height/2 (default: None, the cladding index).
+    span_u : Float
+        Span of the cross-section in the u axis (unit: μm, default: None, width + 2).
+    span_v : Float
+        Span of the cross-section in the v axis (unit: μm, default: None, height + 2).
+    mesh : Float
+        Grid unit (unit: μm, default: 0.02).
+
+    Returns
+    -------
+    out : Array, Array, Array
+        u positions (unit: μm), v positions (unit: μm), permittivity, size: (nu,), (nv,), (nu, nv).
+    """
+    if (type(span_u) == type(None)):
+        span_u = width + 2
+    if (type(span_v) == type(None)):
+        span_v = height + 2
+    if (type(substrate_index) == type(None)):
+        substrate_index = cladding_index
+    u_positions = np.linspace(-span_u / 2, span_u / 2, int(round(span_u / mesh)) + 1)
+    v_positions = np.linspace(-span_v / 2, span_v / 2, int(round(span_v / mesh)) + 1)
+    ## filling fractions of the cells centered at the nodes
+    u_fill = np.clip((np.minimum(u_positions + mesh / 2, width / 2) - np.maximum(u_positions - mesh / 2, -width / 2)) / mesh, 0, 1)
+    v_fill = np.clip((np.minimum(v_positions + mesh / 2, height / 2) - np.maximum(v_positions - mesh / 2, -height / 2)) / mesh, 0, 1)
+    substrate_fill = np.clip((-height / 2 - (v_positions - mesh / 2)) / mesh, 0, 1)
+    background = cladding_index ** 2 * (1 - substrate_fill) + substrate_index ** 2 * substrate_fill
+    fill = u_fill[:, None] * v_fill[None, :]
+    epsilon = fill * core_index ** 2 + (1 - fill) * background[None, :]
+    return u_positions, v_positions, epsilon
+
+
+class ModeProfileCache:
+    """
+    Persistent cache of the mode profiles of waveguide cross-sections, keyed on the grid, the permittivity (geometry and
+    materials) and the wavelength, so that a port is solved once instead of once per simulation run.
+
+    Parameters
+    ----------
+    directory : String
+        Directory for the cached profiles (one .npz file per cross-section and wavelength), the profiles are kept
+        across sessions (default: None, only kept in memory).
+    max_size : Int
+        Maximum number of profiles kept in memory, the least recently used one is dropped (default: 256).
+    """
+    def __init__(self, directory = None, max_size = 256):
+        if (max_size < 1):
+            raise Exception("The size of the mode profile cache should be at least 1.")
+        self.directory = directory
+        self.max_size = int(max_size)
+        if (type(directory) != type(None)) and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.__profiles = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    @staticmethod
+    def key(*items):
+        """
+        Key of a cross-section.
+
+        Parameters
+        ----------
+        items : Array, Float, Int or String
+            Grid, permittivity, wavelength and solver settings of the cross-section.
+
+        Returns
+        -------
+        out : String
+            Hexadecimal digest of the items (arrays are converted to complex128, regardless of their type).
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for item in items:
+            if (type(item) == str):
+                digest.update(b"s" + item.encode())
+            else:
+                item = np.ascontiguousarray(item, dtype=np.complex128)
+                digest.update(b"a" + str(item.shape).encode() + item.tobytes())
+        return digest.hexdigest()
+
+    def __filename(self, key):
+        return os.path.join(self.directory, "mode_" + key + ".npz")
+
+    def get(self, key):
+        """
+        Get the cached profile of a key (from memory, or from the directory).
+
+        Parameters
+        ----------
+        key : String
+            Key from ModeProfileCache.key.
+
+        Returns
+        -------
+        out : Dict or None
+            The cached profile, None if the cross-section has not been solved.
+        """
+        if key in self.__profiles:
+            self.__profiles.move_to_end(key)
+            self.__hits += 1
+            return self.__profiles[key]
+        if (type(self.directory) != type(None)) and os.path.isfile(self.__filename(key)):
+            with np.load(self.__filename(key)) as profile_file:
+                profile = {name: profile_file[name] for name in profile_file.files}
+            self.__remember(key, profile)
+            self.__hits += 1
+            return profile
+        self.__misses += 1
+        return None
+
+    def put(self, key, profile):
+        """
+        Save a profile (in memory, and in the directory if specified).
+
+        Parameters
+        ----------
+        key : String
+            Key from ModeProfileCache.key.
+        profile : Dict
+            Arrays of the profile.
+        """
+        self.__remember(key, profile)
+        if (type(self.directory) != type(None)):
+            np.savez(self.__filename(key), **profile)
+
+    def __remember(self, key, profile):
+        self.__profiles[key] = profile
+        self.__profiles.move_to_end(key)
+        while (len(self.__profiles) > self.max_size):
+            self.__profiles.popitem(last=False)
+
+    def get_channel_modes(self, u_positions, v_positions, epsilon, wavelengths, number_of_modes = 1, neff_guess = None):
+        """
+        Get the modes of a waveguide cross-section at the wavelengths, only the wavelengths without cached profiles are
+        solved (solve_channel_modes).
+
+        Parameters
+        ----------
+        u_positions : Array
+            Positions of the first transverse axis (unit: μm), size: (nu,).
+        v_positions : Array
+            Positions of the second transverse axis (the z axis for the sources, unit: μm), size: (nv,).
+        epsilon : Array
+            Permittivity at the nodes, size: (nu, nv).
+        wavelengths : Float or Array
+            Wavelengths (unit: μm), size: (frequency points,).
+        number_of_modes : Int
+            Number of modes (default: 1).
+        neff_guess : Float
+            Guess of the effective index (default: None, the largest refractive index of the cross-section).
+
+        Returns
+        -------
+        out : Dict
+            "wavelength" (unit: μm), "u" and "v" (unit: μm), "neff", "E" (unit: V/m) and "H" (unit: A/m), size:
+            (frequency points,), (nu,), (nv,), (frequency points, modes), (frequency points, modes, nu, nv, 3) for E and H.
+        """
+        wavelengths = np.array([wavelengths], dtype=np.float64).flatten()
+        neff = []
+        electric_fields = []
+        magnetic_fields = []
+        for wavelength in wavelengths:
+            key = self.key("channel", u_positions, v_positions, epsilon, wavelength, number_of_modes,
+                           -1 if type(neff_guess) == type(None) else neff_guess)
+            profile = self.get(key)
+            if (type(profile) == type(None)):
+                mode_neff, electric_field, magnetic_field = solve_channel_modes(u_positions, v_positions, epsilon,
+                                                                                wavelength, number_of_modes, neff_guess)
+                profile = {"neff": mode_neff, "E": electric_field, "H": magnetic_field}
+                self.put(key, profile)
+            neff.append(profile["neff"])
+            electric_fields.append(profile["E"])
+            magnetic_fields.append(profile["H"])
+        return {"wavelength": wavelengths, "u": np.asarray(u_positions, dtype=np.float64).flatten(),
+                "v": np.asarray(v_positions, dtype=np.float64).flatten(), "neff": np.array(neff),
+                "E": np.array(electric_fields), "H": np.array(magnetic_fields)}
+
+    def get_slab_modes(self, positions, epsilon, wavelengths, number_of_modes = 1, polarization = TE):
+        """
+        Get the modes of a slab at the wavelengths, only the wavelengths without cached profiles are solved
+        (solve_slab_modes).
+
+        Parameters
+        ----------
+        positions : Array
+            Uniform positions of the cross-section (unit: μm), size: (n,).
+        epsilon : Array
+            Permittivity at the positions, size: (n,).
+        wavelengths : Float or Array
+            Wavelengths (unit: μm), size: (frequency points,).
+        number_of_modes : Int
+            Number of modes (default: 1).
+        polarization : TE or TM
+            TE: Hz is the dominant field, TM: Ez (default: TE).
+
+        Returns
+        -------
+        out : Dict
+            "wavelength" (unit: μm), "positions" (unit: μm), "neff" and "profile" (the dominant field), size:
+            (frequency points,), (n,), (frequency points, modes), (frequency points, n, modes).
+        """
+        wavelengths = np.array([wavelengths], dtype=np.float64).flatten()
+        neff = []
+        profiles = []
+        for wavelength in wavelengths:
+            key = self.key("slab", positions, epsilon, wavelength, number_of_modes, polarization)
+            profile = self.get(key)
+            if (type(profile) == type(None)):
+                mode_neff, mode_profiles = solve_slab_modes(positions, epsilon, wavelength, number_of_modes, polarization)
+                profile = {"neff": mode_neff, "profile": mode_profiles}
+                self.put(key, profile)
+            neff.append(profile["neff"])
+            profiles.append(profile["profile"])
+        return {"wavelength": wavelengths, "positions": np.asarray(positions, dtype=np.float64).flatten(),
+                "neff": np.array(neff), "profile": np.array(profiles)}
+
+    def clear(self, remove_files = 0):
+        """
+        Drop the profiles kept in memory.
+
+        Parameters
+        ----------
+        remove_files : Bool
+            Whether to remove the cached files in the directory as well (default: 0).
+        """
+        self.__profiles.clear()
+        if remove_files and (type(self.directory) != type(None)):
+            for filename in os.listdir(self.directory):
+                if filename.startswith("mode_") and filename.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, filename))
+
+    def get_statistics(self):
+        """
+        Get the number of cache hits and misses (a miss is a mode solve).
+
+        Returns
+        -------
+        out : Int, Int
+            Hits, misses.
+        """
+        return self.__hits, self.__misses
+
+
+def mode_profile_to_imported_source(profile, position, wavelengths, mode_number = 1, normal_direction = HORIZONTAL,
+                                    direction = FORWARD):
+    """
+    Arrange a channel mode profile (ModeProfileCache.get_channel_modes) as the data of add_imported_source and
+    reset_imported_source.
+
+    Parameters
+    ----------
+    profile : Dict
+        Profile from ModeProfileCache.get_channel_modes, u is the transverse axis in the x-y plane (relative to the
+        position) and v is the z axis.
+    position : Point or tuple
+        Center point of the source.
+    wavelengths : Array
+        Wavelengths of the imported data in their order (unit: m), each should be in the profile.
+    mode_number : Int
+        The selected mode index (start from 1, default: 1).
+    normal_direction : HORIZONAL or VERTICAL
+        The direction of the source. HORIZONAL: x-normal, VERTICAL: y-normal.
+    direction : Int
+        The light propagation direction 1: the positive direction of the axis, 0: the negative direction (FORWARD:1,
+        BACKWARD:0 , default: FORWARD).
+
+    Returns
+    -------
+    out : Array, Array, Array, Array, Array
+        origin_x, origin_y, origin_z (unit: m), E and H, size of E and H: (x mesh, y mesh, z mesh, frequency points, 3).
+    """
+    position = tuple_to_point(position)
+    wavelength_indices = []
+    for wavelength in np.array([wavelengths]).flatten():
+        matched = np.where(np.isclose(profile["wavelength"] * 1e-6, wavelength, rtol=1e-9, atol=0))[0]
+        if (matched.size == 0):
+            raise Exception("The mode profile is not solved at the wavelength of " + str(wavelength) + " m.")
+        wavelength_indices.append(matched[0])
+    electric = profile["E"][wavelength_indices, mode_number - 1]
+    magnetic = profile["H"][wavelength_indices, mode_number - 1]
+    ## size: (frequency points, nu, nv, 3) -> (nu, nv, frequency points, 3)
+    electric = np.transpose(electric, (1, 2, 0, 3))
+    magnetic = np.transpose(magnetic, (1, 2, 0, 3))
+    ## a mode along -w has the same transverse E, opposite transverse H and opposite Ew
+    if (normal_direction == HORIZONTAL):
+        ## (u, v, w) = (y, z, x)
+        sign = 1 if direction == FORWARD else -1
+        E = np.stack((sign * electric[..., 2], electric[..., 0], electric[..., 1]), axis=-1)[None, :, :, :, :]
+        H = np.stack((magnetic[..., 2], sign * magnetic[..., 0], sign * magnetic[..., 1]), axis=-1)[None, :, :, :, :]
+        origin_x = np.array([position.x * 1e-6])
+        origin_y = (profile["u"] + position.y) * 1e-6
+    elif (normal_direction == VERTICAL):
+        ## (u, v) = (x, z) gives w = -y
+        sign = -1 if direction == FORWARD else 1
+        E = np.stack((electric[..., 0], -sign * electric[..., 2], electric[..., 1]), axis=-1)[:, None, :, :, :]
+        H = np.stack((sign * magnetic[..., 0], -magnetic[..., 2], sign * magnetic[..., 1]), axis=-1)[:, None, :, :, :]
+        origin_x = (profile["u"] + position.x) * 1e-6
+        origin_y = np.array([position.y * 1e-6])
+    else:
+        raise Exception("Unsupported normal_direction specified!")
+    origin_z = profile["v"] * 1e-6
+    return origin_x, origin_y, origin_z, E, H
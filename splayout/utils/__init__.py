@@ -1 +1,4 @@
-from .utils import *
\ No newline at end of file
+from .utils import *
+from .integration import trapezoid_weights, linear_interpolation_matrix
+from .rasterizer import points_in_polygon, grid_cell_edges, polygon_cell_areas, rasterize_polygons, rasterize_polygon_function, polygon_function_epsilon_derivatives
+from .tracing import enable_tracing, disable_tracing, is_tracing_enabled, clear_trace, trace_span, traced, payload_size, get_trace_events, export_chrome_trace, get_trace_summary, format_trace_summary
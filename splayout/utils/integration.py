@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def trapezoid_weights(positions):
+    """
+    Weights of the trapezoidal rule, so that np.trapz(y, x=positions) == np.dot(y, trapezoid_weights(positions)). A single
+    position means no integration along the axis (weight 1), which follows the integrate of Lumerical script.
+
+    Parameters
+    ----------
+    positions : Array
+        Monotonic sampling positions, size: (n,).
+
+    Returns
+    -------
+    out : Array
+        Weights, size: (n,).
+    """
+    positions = np.asarray(positions, dtype=np.float64).flatten()
+    if (positions.size == 1):
+        return np.ones(1)
+    steps = np.diff(positions)
+    weights = np.zeros(positions.size)
+    weights[:-1] += steps / 2
+    weights[1:] += steps / 2
+    return weights
+
+
+def linear_interpolation_matrix(source_positions, target_positions):
+    """
+    Matrix of the linear interpolation from the source positions to the target positions, so that
+    np.interp(target_positions, source_positions, y) == np.dot(linear_interpolation_matrix(source_positions, target_positions), y).
+    Targets out of the source range take the nearest source value.
+
+    Parameters
+    ----------
+    source_positions : Array
+        Monotonic source positions, size: (n,).
+    target_positions : Array
+        Target positions, size: (m,).
+
+    Returns
+    -------
+    out : Array
+        Interpolation weights, size: (m, n).
+    """
+    source_positions = np.asarray(source_positions, dtype=np.float64).flatten()
+    target_positions = np.asarray(target_positions, dtype=np.float64).flatten()
+    if (source_positions.size > 1 and source_positions[0] > source_positions[-1]):
+        return linear_interpolation_matrix(source_positions[::-1], target_positions)[:, ::-1]
+    matrix = np.zeros((target_positions.size, source_positions.size))
+    if (source_positions.size == 1):
+        matrix[:, 0] = 1
+        return matrix
+    clipped_positions = np.clip(target_positions, source_positions[0], source_positions[-1])
+    upper = np.clip(np.searchsorted(source_positions, clipped_positions, side="right"), 1, source_positions.size - 1)
+    lower = upper - 1
+    fraction = (clipped_positions - source_positions[lower]) / (source_positions[upper] - source_positions[lower])
+    rows = np.arange(target_positions.size)
+    matrix[rows, lower] += 1 - fraction
+    matrix[rows, upper] += fraction
+    return matrix
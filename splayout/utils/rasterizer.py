@@ -0,0 +1,256 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+def points_in_polygon(x, y, polygon):
+    """
+    Check whether points are inside a polygon (even-odd rule).
+
+    Parameters
+    ----------
+    x : Array
+        x coordinates of the points (unit: μm).
+    y : Array
+        y coordinates of the points (unit: μm), same size as x.
+    polygon : List of Point or List of Tuple or Array
+        Vertices of the polygon (unit: μm).
+
+    Returns
+    -------
+    out : Array
+        Boolean array, same size as x.
+    """
+    vertices = np.array([item.to_tuple() if hasattr(item, "to_tuple") else item for item in polygon], dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    inside = np.zeros(np.broadcast(x, y).shape, dtype=bool)
+    next_vertices = np.roll(vertices, -1, axis=0)
+    for (x0, y0), (x1, y1) in zip(vertices, next_vertices):
+        if (y0 == y1):
+            continue
+        crossing = (y0 > y) != (y1 > y)
+        x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crossing & (x < x_cross)
+    return inside
+
+
+def grid_cell_edges(positions):
+    """
+    Edges of the cells centered at the grid positions (midpoints between the positions).
+
+    Parameters
+    ----------
+    positions : Array
+        Monotonic grid positions, size: (n,).
+
+    Returns
+    -------
+    out : Array
+        Cell edges, size: (n+1,).
+    """
+    positions = np.asarray(positions, dtype=np.float64).flatten()
+    if (positions.size == 1):
+        return np.array([positions[0], positions[0]])
+    middles = (positions[:-1] + positions[1:]) / 2
+    return np.concatenate(([2 * positions[0] - middles[0]], middles, [2 * positions[-1] - middles[-1]]))
+
+
+def polygon_cell_areas(polygon, x_edges, y_edges):
+    """
+    Exact areas of a polygon inside the cells of a rectilinear grid (piecewise linear in the vertex positions, so that
+    finite differences of tiny perturbations are resolved).
+
+    Parameters
+    ----------
+    polygon : List of Point or List of Tuple or Array
+        Vertices of the polygon (unit: μm).
+    x_edges : Array
+        Cell edges in x axis (unit: μm), size: (nx+1,).
+    y_edges : Array
+        Cell edges in y axis (unit: μm), size: (ny+1,).
+
+    Returns
+    -------
+    out : Array
+        Areas (unit: μm^2), size: (nx, ny).
+    """
+    vertices = np.array([item.to_tuple() if hasattr(item, "to_tuple") else item for item in polygon], dtype=np.float64)
+    next_vertices = np.roll(vertices, -1, axis=0)
+    orientation = np.sign(np.sum(vertices[:, 0] * next_vertices[:, 1] - next_vertices[:, 0] * vertices[:, 1]))
+    x_edges = np.asarray(x_edges, dtype=np.float64)
+    y_edges = np.asarray(y_edges, dtype=np.float64)[None, :]
+    ## area of the polygon below each horizontal grid line, column by column
+    area_below = np.zeros((x_edges.size - 1, y_edges.size))
+    for (x0, y0), (x1, y1) in zip(vertices, next_vertices):
+        if (x0 == x1):
+            continue
+        first_column = max(np.searchsorted(x_edges, min(x0, x1), side="right") - 1, 0)
+        last_column = min(np.searchsorted(x_edges, max(x0, x1), side="left"), x_edges.size - 1)
+        if (last_column <= first_column):
+            continue
+        columns = np.arange(first_column, last_column)
+        a = np.maximum(min(x0, x1), x_edges[columns])
+        b = np.minimum(max(x0, x1), x_edges[columns + 1])
+        width = np.maximum(b - a, 0)[:, None]
+        ya = y0 + (a - x0) * (y1 - y0) / (x1 - x0)
+        yb = y0 + (b - x0) * (y1 - y0) / (x1 - x0)
+        lower = np.minimum(ya, yb)[:, None]
+        upper = np.maximum(ya, yb)[:, None]
+        span = upper - lower
+        below_fraction = np.where(span > 0, np.clip((y_edges - lower) / np.where(span > 0, span, 1), 0, 1),
+                                  (y_edges >= lower).astype(np.float64))
+        clipped = np.clip(y_edges, lower, upper)
+        integral = width * (below_fraction * (lower + clipped) / 2 + (1 - below_fraction) * y_edges)
+        area_below[columns] -= np.sign(x1 - x0) * integral
+    return np.diff(area_below, axis=1) * orientation
+
+
+def rasterize_polygons(polygons, x_positions, y_positions, polygon_epsilon, background_epsilon, supersampling = 8,
+                       anisotropic = 1):
+    """
+    Rasterize polygons to a permittivity distribution on a rectilinear grid with sub-pixel averaging.
+
+    The filling fraction of each cell is the exact overlapped area of the polygons (which should not overlap each
+    other), and the interface normal is estimated from supersampling the cell. With anisotropic averaging, the
+    permittivity of a boundary cell is the harmonic mean for the field component normal to the interface and the
+    arithmetic mean for the tangential components, otherwise the arithmetic mean is used for all.
+
+    Parameters
+    ----------
+    polygons : List
+        Polygons, each is a list of vertices (Point or Tuple, unit: μm).
+    x_positions : Array
+        x positions of the cell centers (unit: μm), size: (nx,).
+    y_positions : Array
+        y positions of the cell centers (unit: μm), size: (ny,).
+    polygon_epsilon : Float
+        Permittivity inside the polygons.
+    background_epsilon : Float
+        Permittivity outside the polygons.
+    supersampling : Int
+        Number of sampling points in each axis of a cell for the interface normals (default: 8).
+    anisotropic : Bool
+        Whether to use anisotropic averaging for the boundary cells (default: True).
+
+    Returns
+    -------
+    out : Array
+        Permittivity for the x, y and z field components, size: (nx, ny, 3).
+    """
+    x_edges = grid_cell_edges(x_positions)
+    y_edges = grid_cell_edges(y_positions)
+    fractions = (np.arange(supersampling) + 0.5) / supersampling
+    x_offsets = (fractions - 0.5)[None, :] * np.diff(x_edges)[:, None]
+    y_offsets = (fractions - 0.5)[None, :] * np.diff(y_edges)[:, None]
+    x_samples = (x_edges[:-1, None] + fractions[None, :] * np.diff(x_edges)[:, None]).flatten()
+    y_samples = (y_edges[:-1, None] + fractions[None, :] * np.diff(y_edges)[:, None]).flatten()
+    nx = x_edges.size - 1
+    ny = y_edges.size - 1
+
+    cell_areas = np.diff(x_edges)[:, None] * np.diff(y_edges)[None, :]
+    fill = np.zeros((nx, ny))
+    for polygon in polygons:
+        fill += polygon_cell_areas(polygon, x_edges, y_edges)
+    fill = np.clip(fill / np.where(cell_areas > 0, cell_areas, 1), 0, 1)
+    arithmetic_mean = fill * polygon_epsilon + (1 - fill) * background_epsilon
+    epsilon = np.repeat(arithmetic_mean[:, :, None], 3, axis=2)
+    if not anisotropic:
+        return epsilon
+
+    ## interface normals from the supersampled boundary cells
+    inside = np.zeros((x_samples.size, y_samples.size), dtype=bool)
+    xx, yy = np.meshgrid(x_samples, y_samples, indexing="ij")
+    for polygon in polygons:
+        inside |= points_in_polygon(xx, yy, polygon)
+    inside = inside.reshape(nx, supersampling, ny, supersampling).astype(np.float64)
+
+    inverse_mean = fill / polygon_epsilon + (1 - fill) / background_epsilon
+    normal_x = np.einsum("iajb,ia->ij", inside, x_offsets)
+    normal_y = np.einsum("iajb,jb->ij", inside, y_offsets)
+    norm = np.sqrt(normal_x ** 2 + normal_y ** 2)
+    boundary = (fill > 0) & (fill < 1) & (norm > 0)
+    normal_x = np.where(boundary, normal_x / np.where(norm > 0, norm, 1), 0)
+    normal_y = np.where(boundary, normal_y / np.where(norm > 0, norm, 1), 0)
+    epsilon[:, :, 0] = 1 / (normal_x ** 2 * inverse_mean + (1 - normal_x ** 2) / arithmetic_mean)
+    epsilon[:, :, 1] = 1 / (normal_y ** 2 * inverse_mean + (1 - normal_y ** 2) / arithmetic_mean)
+    return epsilon
+
+
+def rasterize_polygon_function(polygon_function, params, x_positions, y_positions, polygon_epsilon, background_epsilon,
+                               supersampling = 8):
+    """
+    Rasterize the polygons of a parameterized shape (polygon_function of the shape optimization regions).
+
+    Parameters
+    ----------
+    polygon_function : func
+        Polygons of the shape, input: Array (parameters), output: List of polygons (see rasterize_polygons).
+    params : numpy.array
+        A one-dimensional array in [0,1].
+    x_positions : Array
+        x positions of the cell centers (unit: μm), size: (nx,).
+    y_positions : Array
+        y positions of the cell centers (unit: μm), size: (ny,).
+    polygon_epsilon : Float
+        Permittivity inside the polygons.
+    background_epsilon : Float
+        Permittivity outside the polygons.
+    supersampling : Int
+        Number of sampling points in each axis of a cell for the interface normals (default: 8).
+
+    Returns
+    -------
+    out : Array
+        Permittivity for the x, y and z field components, size: (nx, ny, 3).
+    """
+    if (type(polygon_function) == type(None)):
+        raise Exception("polygon_function is not specified for the region.")
+    return rasterize_polygons(polygon_function(params), x_positions, y_positions, polygon_epsilon, background_epsilon,
+                              supersampling=supersampling)
+
+
+def polygon_function_epsilon_derivatives(polygon_function, params, dx, x_positions, y_positions, polygon_epsilon,
+                                         background_epsilon, supersampling = 8, workers = None):
+    """
+    Calculate the derivatives of the rasterized permittivity of a parameterized shape to the parameters by finite
+    difference, the parameters are perturbed in parallel.
+
+    Parameters
+    ----------
+    polygon_function : func
+        Polygons of the shape, input: Array (parameters), output: List of polygons (see rasterize_polygons).
+    params : numpy.array
+        A one-dimensional array in [0,1].
+    dx : Float
+        Micro element unit for the finite difference (unit: μm).
+    x_positions : Array
+        x positions of the cell centers (unit: μm), size: (nx,).
+    y_positions : Array
+        y positions of the cell centers (unit: μm), size: (ny,).
+    polygon_epsilon : Float
+        Permittivity inside the polygons.
+    background_epsilon : Float
+        Permittivity outside the polygons.
+    supersampling : Int
+        Number of sampling points in each axis of a cell for the interface normals (default: 8).
+    workers : Int
+        Number of threads (default: None, decided by ThreadPoolExecutor).
+
+    Returns
+    -------
+    out : Array
+        Derivatives (unit: 1/μm), size: (number of parameters, nx, ny, 3).
+    """
+    params = np.array(params, dtype=np.double).flatten()
+    origin_epsilon = rasterize_polygon_function(polygon_function, params, x_positions, y_positions, polygon_epsilon,
+                                                background_epsilon, supersampling=supersampling)
+
+    def epsilon_derivative(i):
+        perturbed_params = params.copy()
+        perturbed_params[i] = perturbed_params[i] + dx
+        return (rasterize_polygon_function(polygon_function, perturbed_params, x_positions, y_positions,
+                                           polygon_epsilon, background_epsilon, supersampling=supersampling)
+                - origin_epsilon) / dx
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return np.array(list(executor.map(epsilon_derivative, range(0, params.size))))
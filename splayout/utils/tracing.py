@@ -0,0 +1,370 @@
+import numpy as np
+import threading
+import functools
+import inspect
+import json
+import time
+import os
+
+
+class _TraceState:
+    def __init__(self):
+        self.enabled = 0
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.origin = time.perf_counter()
+        self.patches = []
+
+
+_state = _TraceState()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set_payload(self, bytes_out = 0):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+class _Span:
+    def __init__(self, name, category, bytes_in = 0, args = None):
+        self.name = name
+        self.category = category
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.args = args
+
+    def __enter__(self):
+        stack = getattr(_state.local, "stack", None)
+        if (type(stack) == type(None)):
+            stack = []
+            _state.local.stack = stack
+        stack.append(self)
+        self.children_duration = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def set_payload(self, bytes_out = 0):
+        self.bytes_out = bytes_out
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        duration = end - self.start
+        stack = _state.local.stack
+        stack.pop()
+        if (len(stack) > 0):
+            stack[-1].children_duration += duration
+        event = {"name": self.name,
+                 "cat": self.category,
+                 "ph": "X",
+                 "ts": (self.start - _state.origin) * 1e6,
+                 "dur": duration * 1e6,
+                 "pid": os.getpid(),
+                 "tid": threading.get_ident(),
+                 "args": {"self_dur": (duration - self.children_duration) * 1e6,
+                          "bytes_in": int(self.bytes_in),
+                          "bytes_out": int(self.bytes_out)}}
+        if (type(self.args) != type(None)):
+            event["args"].update(self.args)
+        if (type(exc_type) != type(None)):
+            event["args"]["exception"] = exc_type.__name__
+        with _state.lock:
+            _state.events.append(event)
+        return False
+
+
+def payload_size(value):
+    """
+    Estimate the size of the data carried by a value (arrays, strings, and lists, tuples or dicts of them).
+
+    Parameters
+    ----------
+    value : Any
+        The value.
+
+    Returns
+    -------
+    out : Int
+        Size (unit: byte).
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(payload_size(item) for item in value.values())
+    if isinstance(value, (int, float, complex, np.generic)):
+        return 8
+    return 0
+
+
+def trace_span(name, category = "user", **args):
+    """
+    Timed span for a block of user code (with statement), nothing is recorded when tracing is disabled.
+
+    Parameters
+    ----------
+    name : String
+        Name of the span.
+    category : String
+        Phase of the span (default: "user").
+    **args
+        Extra information recorded in the trace event.
+
+    Returns
+    -------
+    out : Context manager
+        Use as "with trace_span(...) as span:", span.set_payload(bytes_out) records the size of the output.
+    """
+    if not _state.enabled:
+        return _null_span
+    return _Span(name, category, 0, args if len(args) else None)
+
+
+def traced(function, name = None, category = "user"):
+    """
+    Wrap a function so that its calls are traced when tracing is enabled.
+
+    Parameters
+    ----------
+    function : Function
+        The function.
+    name : String
+        Name of the spans (default: None, the name of the function).
+    category : String
+        Phase of the spans (default: "user").
+
+    Returns
+    -------
+    out : Function
+        The wrapped function.
+    """
+    if (type(name) == type(None)):
+        name = getattr(function, "__qualname__", getattr(function, "__name__", "function"))
+
+    @functools.wraps(function)
+    def traced_function(*args, **kwargs):
+        if not _state.enabled:
+            return function(*args, **kwargs)
+        with _Span(name, category, payload_size(args) + payload_size(kwargs)) as span:
+            result = function(*args, **kwargs)
+            span.set_payload(payload_size(result))
+        return result
+
+    traced_function.__splayout_traced__ = function
+    return traced_function
+
+
+def _lumerical_category(method_name):
+    if (method_name == "run" or method_name.startswith("run_")):
+        return "solve"
+    if (method_name.startswith("get") or method_name.startswith("putv")):
+        return "transfer"
+    return "script"
+
+
+class _TracedFunctionAttribute:
+    """
+    Data descriptor that returns the traced version of a function stored in the instances (e.g. cost_function).
+    """
+    def __init__(self, attribute_name, owner_name):
+        self.attribute_name = attribute_name
+        self.span_name = owner_name + "." + attribute_name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        function = instance.__dict__[self.attribute_name]
+        if not callable(function):
+            return function
+        return traced(function, name=self.span_name, category="cost_function")
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.attribute_name] = value
+
+
+def _instrumented_targets():
+    from ..lumericalcommun.fdtdapi import FDTDSimulation
+    from ..lumericalcommun.modeapi import MODESimulation
+    from ..components import pixelsregion
+    from ..adjointmethod.adjointtopologyopt import AdjointForTO
+    from ..adjointmethod.adjointmultitoopt import AdjointForMultiTO
+    from ..adjointmethod.adjointshapeopt import AdjointForShapeOpt
+    from ..algorithms.binarybatalgorithm import BinaryBatAlgorithm
+    from ..algorithms.binarygeneticalgorithm import BinaryGeneticAlgorithm
+    from ..algorithms.binaryparticleswarmalgorithm import BinaryParticleSwarmAlgorithm
+    from ..algorithms.directbinarysearchalgorithm import DirectBinarySearchAlgorithm
+    from ..algorithms.particleswarmalgorithm import ParticleSwarmAlgorithm
+    methods = []
+    for simulation_class in [FDTDSimulation, MODESimulation]:
+        for method_name, method in list(vars(simulation_class).items()):
+            if inspect.isfunction(method) and not method_name.startswith("_"):
+                methods.append((simulation_class, method_name, _lumerical_category(method_name)))
+    for region_name, region_class in inspect.getmembers(pixelsregion, inspect.isclass):
+        if (region_class.__module__ == pixelsregion.__name__ and "update" in vars(region_class)):
+            methods.append((region_class, "update", "update"))
+    for adjoint_class in [AdjointForTO, AdjointForMultiTO, AdjointForShapeOpt]:
+        for method_name in ["call_fom", "call_grad", "value_and_grad"]:
+            if method_name in vars(adjoint_class):
+                methods.append((adjoint_class, method_name, "adjoint"))
+    attributes = []
+    for algorithm_class in [BinaryBatAlgorithm, BinaryGeneticAlgorithm, BinaryParticleSwarmAlgorithm,
+                            DirectBinarySearchAlgorithm, ParticleSwarmAlgorithm]:
+        attributes.append((algorithm_class, "cost_function"))
+        if (algorithm_class in [BinaryParticleSwarmAlgorithm, ParticleSwarmAlgorithm]):
+            attributes.append((algorithm_class, "batch_cost_function"))
+    return methods, attributes
+
+
+def enable_tracing():
+    """
+    Enable tracing: the methods of FDTDSimulation and MODESimulation, the update of the pixels regions, call_fom and
+    call_grad of the adjoint methods and the cost functions of the algorithms are recorded as timed spans with their
+    payload sizes. The instrumentation is installed only while tracing is enabled, so that there is no overhead otherwise.
+    """
+    if _state.enabled:
+        return
+    methods, attributes = _instrumented_targets()
+    for owner, method_name, category in methods:
+        method = vars(owner)[method_name]
+        _state.patches.append((owner, method_name, method))
+        setattr(owner, method_name, traced(method, name=owner.__name__ + "." + method_name, category=category))
+    for owner, attribute_name in attributes:
+        _state.patches.append((owner, attribute_name, vars(owner).get(attribute_name, None)))
+        setattr(owner, attribute_name, _TracedFunctionAttribute(attribute_name, owner.__name__))
+    _state.enabled = 1
+
+
+def disable_tracing():
+    """
+    Disable tracing and remove the instrumentation (the recorded events are kept).
+    """
+    _state.enabled = 0
+    while len(_state.patches):
+        owner, name, original = _state.patches.pop()
+        if (type(original) == type(None)):
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+
+
+def is_tracing_enabled():
+    """
+    Return whether tracing is enabled.
+
+    Returns
+    -------
+    out : Bool
+        Whether tracing is enabled.
+    """
+    return bool(_state.enabled)
+
+
+def clear_trace():
+    """
+    Drop all the recorded events.
+    """
+    with _state.lock:
+        _state.events = []
+    _state.origin = time.perf_counter()
+
+
+def get_trace_events():
+    """
+    Get the recorded events.
+
+    Returns
+    -------
+    out : List of Dict
+        Events in the Chrome trace-event format (complete events, ts and dur in μs).
+    """
+    with _state.lock:
+        return list(_state.events)
+
+
+def export_chrome_trace(filename):
+    """
+    Save the recorded events as a Chrome trace-event JSON file (open with chrome://tracing or Perfetto).
+
+    Parameters
+    ----------
+    filename : String
+        File path of the ".json" file.
+    """
+    with open(filename, "w") as trace_file:
+        json.dump({"traceEvents": get_trace_events(), "displayTimeUnit": "ms"}, trace_file)
+
+
+def get_trace_summary(by = "name"):
+    """
+    Aggregate the recorded events.
+
+    Parameters
+    ----------
+    by : String
+        "name" for each traced function or "category" for each phase ("script", "transfer", "solve", "update",
+        "adjoint", "cost_function" and "user"), default: "name".
+
+    Returns
+    -------
+    out : List of Dict
+        Rows with keys: name, category, calls, total (s), self (s, excluding nested spans), mean (s), max (s), bytes_in
+        and bytes_out, sorted by the self time.
+    """
+    if (by not in ["name", "category"]):
+        raise Exception("The trace summary can only be grouped by \"name\" or \"category\".")
+    rows = {}
+    for event in get_trace_events():
+        key = event["name"] if by == "name" else event["cat"]
+        if key not in rows:
+            rows[key] = {"name": key if by == "name" else "",
+                         "category": event["cat"],
+                         "calls": 0, "total": 0.0, "self": 0.0, "max": 0.0, "bytes_in": 0, "bytes_out": 0}
+        row = rows[key]
+        row["calls"] += 1
+        row["total"] += event["dur"] * 1e-6
+        row["self"] += event["args"]["self_dur"] * 1e-6
+        row["max"] = max(row["max"], event["dur"] * 1e-6)
+        row["bytes_in"] += event["args"]["bytes_in"]
+        row["bytes_out"] += event["args"]["bytes_out"]
+    for row in rows.values():
+        row["mean"] = row["total"] / row["calls"]
+    return sorted(rows.values(), key=lambda row: row["self"], reverse=True)
+
+
+def format_trace_summary(by = "category"):
+    """
+    Format the aggregated events as a table.
+
+    Parameters
+    ----------
+    by : String
+        "name" or "category" (default: "category").
+
+    Returns
+    -------
+    out : String
+        The table.
+    """
+    rows = get_trace_summary(by)
+    total_self = sum(row["self"] for row in rows)
+    first_column = "name" if by == "name" else "category"
+    width = max([len(first_column)] + [len(row[first_column]) for row in rows])
+    lines = [first_column.ljust(width) + "      calls    total(s)     self(s)   self(%)     mean(ms)      max(ms)    in(MB)   out(MB)"]
+    for row in rows:
+        lines.append(row[first_column].ljust(width) +
+                     "%11d %11.3f %11.3f %9.1f %12.3f %12.3f %9.2f %9.2f" % (
+                         row["calls"], row["total"], row["self"],
+                         100.0 * row["self"] / total_self if total_self > 0 else 0.0,
+                         row["mean"] * 1e3, row["max"] * 1e3, row["bytes_in"] / 1e6, row["bytes_out"] / 1e6))
+    return "\n".join(lines)
@@ -1,6 +1,7 @@
 import gdspy
 import math
 import os
+import numpy as np
 
 ## "macros"
 RIGHT = 0
@@ -21,6 +22,8 @@ FORWARD = 1
 BACKWARD = 0
 OUT = 1
 IN = 0
+TE = "TE"
+TM = "TM"
 
 ## global library
 common_lib = gdspy.GdsLibrary(unit=1.0e-6, precision=1.0e-9)
@@ -460,6 +463,78 @@ def tuple_to_point(input_tuple):
         raise Exception("Wrong data type input!")
     return output_point
 
+def draw_rounds_by_script(putv, eval, round_list, z_start, z_end, material, rename, as_group = 0):
+    """
+    Draw a batch of rounds on a Lumerical CAD with ring primitives, shared by FDTDSimulation.put_rounds and
+    MODESimulation.put_rounds.
+
+    Parameters
+    ----------
+    putv : func
+        Put a variable into the Lumerical script workspace, input: (variable name, value).
+    eval : func
+        Evaluate a Lumerical script, input: script.
+    round_list : List of Tuple
+        Rounds in the form of (center_point, inner_radius, outer_radius, start_radian, end_radian).
+    z_start : Float
+        The start point for the structure in z axis (unit: μm).
+    z_end : Float
+        The end point for the structure in z axis (unit: μm).
+    material : str or float
+        Material name, or refractive index for <Object defined dielectric>.
+    rename : String
+        New name of the structures in Lumerical (the name of the structure group if as_group is True).
+    as_group : Bool
+        Whether to build the rounds in a structure group parameterized by the round matrix (default: False).
+
+    Notes
+    -----
+    The rounds are sent as a (N, 6) matrix [x, y, inner radius, outer radius, theta start, theta stop], the loop bound
+    is read from the rows of the matrix, so the structure group can be edited through its user property.
+    """
+    if len(round_list) == 0:
+        return
+    round_parameters = np.zeros((len(round_list), 6))
+    for i, (center_point, inner_radius, outer_radius, start_radian, end_radian) in enumerate(round_list):
+        center_point = tuple_to_point(center_point)
+        round_parameters[i] = [center_point.x, center_point.y, inner_radius, outer_radius,
+                               180 * start_radian / math.pi, 180 * end_radian / math.pi]
+    loop_script = "for (i = 1:size(round_parameters, 1)){ \n" \
+                      "addring; \n" \
+                      "set(\"x\", round_parameters(i, 1)*1e-6); \n" \
+                      "set(\"y\", round_parameters(i, 2)*1e-6); \n" \
+                      "set(\"inner radius\", round_parameters(i, 3)*1e-6); \n" \
+                      "set(\"outer radius\", round_parameters(i, 4)*1e-6); \n" \
+                      "set(\"theta start\", round_parameters(i, 5)); \n" \
+                      "set(\"theta stop\", round_parameters(i, 6)); \n" \
+                      "set(\"z min\"," + "%.6f"%(z_start) + "e-6); \n" \
+                      "set(\"z max\"," + "%.6f"%(z_end) + "e-6); \n"
+    if type(material) == str:
+        loop_script += "set(\"material\",\"" + material + "\"); \n"
+    elif type(material) == float:
+        loop_script += "set(\"material\",\"" + "<Object defined dielectric>" + "\"); \n"
+        loop_script += "set(\"index\"," + str(material) + "); \n"
+    else:
+        raise Exception("Wrong material specification!")
+    if (type(rename) == str and not as_group):
+        loop_script += "set(\"name\",\"" + rename + "\"); \n"
+    loop_script += "}"
+    putv("round_parameters", round_parameters)
+    if as_group:
+        eval("addstructuregroup;")
+        if (type(rename) == str):
+            eval("set(\"name\",\"" + rename + "\");")
+        eval("set(\"x\", 0);")
+        eval("set(\"y\", 0);")
+        eval("set(\"z\", 0);")
+        eval("adduserprop(\"round_parameters\", 6, round_parameters);")
+        putv("groupscript", "deleteall; \n" + loop_script)
+        eval("set(\"script\", groupscript);")
+        eval("clear(groupscript);")
+    else:
+        eval(loop_script)
+    eval("clear(round_parameters);")
+
 def make_gdsii_file(filename,cover_source_layer=None,cover_target_layer=None,inv_source_layer=None,
                     inv_target_layer=None,lib = common_lib, precision = 0.001):
     """